@@ -2,39 +2,80 @@ import pygame
 import sys
 import math
 import random
+import numpy as np
 from pygame import Vector2
 
+from rvz.ballistics import BallisticTable
+from rvz.dirty import DirtyRenderer
+from rvz.pool import ObjectPool
+from rvz.profiler import PHASES, FrameProfiler, csv_path_from_argv
+from rvz.replay import PygameInput, Session, WallClock
+from rvz.sprites import SpriteAtlas
+from rvz.text import FontRegistry, TextCache
+from rvz.timers import TimerWheel
+
 class RabbitsVsZombies:
-    def __init__(self):
+    def __init__(self, seed=None, clock=None, events=None, dirty_rects=False, profile_csv=None):
         pygame.init()
         self.screen = pygame.display.set_mode((1200, 700))
         pygame.display.set_caption("Кролики против Зомби")
-        self.clock = pygame.time.Clock()
-        self.font = pygame.font.Font(None, 36)
+        
+        # Детерминизм: свой генератор случайных чисел, внедряемые часы и ввод
+        self.seed = seed
+        self.rng = random.Random(seed)
+        self.clock = clock or WallClock()
+        self.input = events or PygameInput()
+        self.frame = 0
+        self.fonts = FontRegistry()
+        self.text = TextCache()
+        self.font = self.fonts.get(None, 36)
         
         # Игровые состояния
         self.cabbages = 10
         self.carrots = 5
         self.score = 0
-        self.game_time = 0
         
-        # Системы игры
-        self.aiming_system = AimingSystem()
+        # Пул снарядов: они переиспользуются, а не собираются GC
+        # (зомби живут в массивах орды и объектов не создают)
+        self.projectile_pool = ObjectPool(Projectile)
+        
+        # Системы игры. Игровое время и все отложенные события (спавн, рост
+        # огорода, сбор урожая) ведет колесо таймеров
+        self.timers = TimerWheel()
         self.projectile_physics = ProjectilePhysics()
-        self.zombie_spawner = ZombieSpawner()
+        self.aiming_system = AimingSystem(self.rng, self.clock, self.projectile_physics)
         
         # Игровые объекты
-        self.projectiles = []
-        self.zombies = []
+        self.projectiles = ProjectileBatch()
+        self.particles = ParticleSystem()
+        self.zombies = ZombieHorde()
         self.rabbit = Rabbit()
-        self.garden = Garden()
+        self.garden = Garden(self.rng, self.timers)
+        self.zombie_spawner = ZombieSpawner(self.rng, self.timers, self.zombies)
+        
+        # Автоматическое пополнение овощей из огорода каждые 10 секунд
+        self.timers.every(10, self.collect_harvest)
         
         # Физические константы
         self.gravity = 980
         self.ground_level = 550
         
+        # Статический слой (небо, холмы, трава, грядка, кролик) рисуется один раз
+        self.background = None
+        
+        # Режим грязных прямоугольников: фон восстанавливается и выводится
+        # на экран только там, где что-то двигалось
+        self.dirty = DirtyRenderer() if dirty_rects else None
+        
+        # Время фаз кадра: оверлей по F3, CSV по --profile-csv
+        # (у этой реализации есть отдельные фазы частиц и таймеров)
+        self.profiler = FrameProfiler(PHASES + ('particles', 'timers'), csv_path=profile_csv)
+        
+        # Тела зомби всех типов во всех кадрах анимации рисуются один раз
+        self.zombie_sprites = Zombie.build_atlas()
+        
     def handle_events(self):
-        for event in pygame.event.get():
+        for event in self.input.events_for(self.frame):
             if event.type == pygame.QUIT:
                 return False
             elif event.type == pygame.MOUSEMOTION:
@@ -48,131 +89,161 @@ class RabbitsVsZombies:
                 if event.key == pygame.K_r:  # Перезарядка овощей
                     self.cabbages += 5
                     self.carrots += 3
+                elif event.key == pygame.K_a:  # Автоприцел
+                    self.aiming_system.assist = not self.aiming_system.assist
+                elif event.key == pygame.K_F3:  # Профилировщик кадра
+                    self.profiler.toggle()
         return True
     
     def shoot_cabbage(self, target_pos):
         start_pos = Vector2(100, self.ground_level - 20)
         power = self.aiming_system.get_shot_power()
+        target_pos = self.aiming_system.assisted_target(start_pos, target_pos, 600 * power, 'cabbage', 1.0)
         
-        projectile = Projectile(
+        projectile = self.projectile_pool.acquire(
             type='cabbage',
             position=start_pos,
             target=Vector2(target_pos),
             power=power,
-            mass=1.0
+            mass=1.0,
+            rng=self.rng,
+            clock=self.clock
         )
-        self.projectiles.append(projectile)
+        self.projectiles.add(projectile, self.projectile_physics)
         self.cabbages -= 1
     
     def shoot_carrots(self, target_pos):
         start_pos = Vector2(100, self.ground_level - 20)
         power = self.aiming_system.get_shot_power()
+        target_pos = self.aiming_system.assisted_target(start_pos, target_pos, 600 * power * 0.8, 'carrot', 0.3)
         
         # Веерный залп из 5 морковок
         for i in range(5):
             spread = (i - 2) * 15  # Разброс по горизонтали
             adjusted_target = Vector2(target_pos[0] + spread, target_pos[1])
             
-            projectile = Projectile(
+            projectile = self.projectile_pool.acquire(
                 type='carrot',
                 position=start_pos,
                 target=adjusted_target,
                 power=power * 0.8,  # Меньшая мощность для веерного выстрела
-                mass=0.3
+                mass=0.3,
+                rng=self.rng,
+                clock=self.clock
             )
-            self.projectiles.append(projectile)
+            self.projectiles.add(projectile, self.projectile_physics)
         
         self.carrots -= 1
     
     def update(self, dt):
-        self.game_time += dt
+        profiler = self.profiler
         
         # Обновление систем
         self.aiming_system.update(dt)
-        self.zombie_spawner.update(dt, self.zombies)
-        self.garden.update(dt)
-        
-        # Обновление снарядов
-        for projectile in self.projectiles[:]:
-            projectile.update(dt, self.projectile_physics)
-            
-            # Проверка столкновений со зомби
-            for zombie in self.zombies[:]:
-                if projectile.check_collision(zombie):
-                    damage = projectile.calculate_damage()
-                    zombie.take_damage(damage)
-                    
-                    # Эффект попадания
-                    if projectile.type == 'carrot':
-                        self.create_explosion_effect(projectile.position)
-                    
-                    if projectile in self.projectiles:
-                        self.projectiles.remove(projectile)
-                    break
-            
-            # Удаление снарядов за пределами экрана
-            if (projectile.position.x > 1300 or projectile.position.x < -100 or 
-                projectile.position.y > 800):
-                if projectile in self.projectiles:
-                    self.projectiles.remove(projectile)
-        
-        # Обновление зомби
-        for zombie in self.zombies[:]:
-            zombie.update(dt)
-            if zombie.health <= 0:
-                self.zombies.remove(zombie)
-                self.score += zombie.points
-                # Шанс выпадения овоща
-                if random.random() < 0.3:
-                    self.cabbages += 1
-                if random.random() < 0.2:
-                    self.carrots += 1
-        
-        # Автоматическое пополнение овощей из огорода
-        if self.game_time % 10 < dt:  # Каждые 10 секунд
-            harvest = self.garden.harvest()
-            self.cabbages += harvest['cabbages']
-            self.carrots += harvest['carrots']
+        profiler.lap('aim')
+        
+        # Наступившие таймеры: спавн зомби, рост огорода, сбор урожая
+        self.timers.advance(dt)
+        profiler.lap('timers')
+        
+        # Обновление снарядов: один векторный шаг для всех летящих
+        projectiles = self.projectiles
+        self.projectile_physics.update_batch(projectiles, dt)
+        profiler.lap('projectiles')
+        
+        # Проверка столкновений со зомби (первое попадание по порядку орды)
+        hits = projectiles.first_hits(self.zombies)
+        alive = hits < 0
+        hit_rows = np.flatnonzero(~alive)
+        self.zombies.take_damage(hits[hit_rows], projectiles.calculate_damage(hit_rows))
+        for row in hit_rows:
+            # Эффект попадания
+            if projectiles.items[row].type == 'carrot':
+                self.create_explosion_effect(Vector2(projectiles.pos[row].tolist()))
+        
+        # Удаление попавших снарядов и снарядов за пределами экрана
+        pos = projectiles.pos[:projectiles.count]
+        alive &= (pos[:, 0] <= 1300) & (pos[:, 0] >= -100) & (pos[:, 1] <= 800)
+        projectiles.compact(alive, self.projectile_pool.release)
+        profiler.lap('collisions')
+        
+        # Частицы эффектов
+        self.particles.update(dt)
+        profiler.lap('particles')
+        
+        # Обновление зомби: один векторный шаг для всей орды, погибшие
+        # удаляются одним проходом
+        self.zombies.update(dt, self.timers.now)
+        for points in self.zombies.remove_dead():
+            self.score += points
+            # Шанс выпадения овоща
+            if self.rng.random() < 0.3:
+                self.cabbages += 1
+            if self.rng.random() < 0.2:
+                self.carrots += 1
+        profiler.lap('zombies')
+    
+    def collect_harvest(self):
+        harvest = self.garden.harvest()
+        self.cabbages += harvest['cabbages']
+        self.carrots += harvest['carrots']
     
     def create_explosion_effect(self, position):
         # Создание частиц для эффекта взрыва моркови
+        velocities = []
+        lifetimes = []
         for _ in range(8):
-            particle = {
-                'position': Vector2(position),
-                'velocity': Vector2(random.uniform(-200, 200), random.uniform(-200, 0)),
-                'lifetime': random.uniform(0.5, 1.5),
-                'color': (255, 165, 0)
-            }
-            # В реальной реализации нужно добавить систему частиц
+            velocities.append((self.rng.uniform(-200, 200), self.rng.uniform(-200, 0)))
+            lifetimes.append(self.rng.uniform(0.5, 1.5))
+        self.particles.emit(position, velocities, lifetimes, (255, 165, 0))
     
-    def render(self):
+    def build_background(self):
+        # Всё неподвижное рендерится в отдельную поверхность
+        self.background = pygame.Surface(self.screen.get_size())
+        
         # Фон
-        self.screen.fill((135, 206, 235))  # Небесный голубой
+        self.background.fill((135, 206, 235))  # Небесный голубой
         
         # Отрисовка ландшафта
-        self.draw_landscape()
+        self.draw_landscape(self.background)
+        
+        # Грядка и кролик с пушкой не двигаются
+        self.garden.draw_bed(self.background)
+        self.rabbit.draw(self.background)
+    
+    def render(self):
+        # Возвращает прямоугольники, задетые подвижными объектами
+        # Статический слой как основа кадра
+        if self.background is None:
+            self.build_background()
+        if self.dirty is not None:
+            self.dirty.restore(self.screen, self.background)
+        else:
+            self.screen.blit(self.background, (0, 0))
         
-        # Отрисовка огорода
-        self.garden.draw(self.screen)
+        # Отрисовка урожая на грядке
+        rects = [self.garden.draw(self.screen)]
         
         # Отрисовка зомби
-        for zombie in self.zombies:
-            zombie.draw(self.screen)
+        rects += self.zombies.draw(self.screen, self.zombie_sprites)
         
         # Отрисовка снарядов
-        for projectile in self.projectiles:
-            projectile.draw(self.screen)
+        rects += self.projectiles.draw(self.screen)
         
-        # Отрисовка кролика и пушки
-        self.rabbit.draw(self.screen)
+        # Частицы одним проходом по пикселям
+        rects.append(self.particles.draw(self.screen))
         
         # Отрисовка прицела
-        self.aiming_system.draw(self.screen)
+        rects.append(self.aiming_system.draw(self.screen))
         
         # Отрисовка UI
-        self.draw_ui()
+        rects += self.draw_ui()
+        
+        # Профилировщик кадра (F3)
+        rects.append(self.profiler.draw(self.screen, self.fonts.get(None, 22)))
+        return rects
     
-    def draw_landscape(self):
+    def draw_landscape(self, surface):
         # Холмистый ландшафт с использованием синусоиды
         points = [(0, self.ground_level)]
         for x in range(0, 1201, 20):
@@ -181,43 +252,61 @@ class RabbitsVsZombies:
         points.append((1200, 700))
         points.append((0, 700))
         
-        pygame.draw.polygon(self.screen, (34, 139, 34), points)  # Зеленый холм
+        pygame.draw.polygon(surface, (34, 139, 34), points)  # Зеленый холм
         
-        # Трава
+        # Трава (высоты выбираются один раз вместе со слоем, поэтому не мерцают).
+        # Отдельный генератор: перерисовка слоя не сдвигает игровую случайность
+        grass_rng = random.Random(self.seed)
         for x in range(0, 1201, 10):
-            height = random.randint(5, 15)
-            pygame.draw.line(self.screen, (0, 128, 0), 
+            height = grass_rng.randint(5, 15)
+            pygame.draw.line(surface, (0, 128, 0), 
                            (x, self.ground_level), 
                            (x, self.ground_level - height), 2)
     
     def draw_ui(self):
-        # Панель боеприпасов
-        cabbage_text = self.font.render(f"🥬: {self.cabbages}", True, (0, 100, 0))
-        carrot_text = self.font.render(f"🥕: {self.carrots}", True, (255, 140, 0))
-        score_text = self.font.render(f"Очки: {self.score}", True, (0, 0, 0))
-        time_text = self.font.render(f"Время: {int(self.game_time)}с", True, (0, 0, 0))
-        
-        self.screen.blit(cabbage_text, (10, 10))
-        self.screen.blit(carrot_text, (10, 50))
-        self.screen.blit(score_text, (1000, 10))
-        self.screen.blit(time_text, (1000, 50))
+        # Панель боеприпасов (кэш растеризует строку заново только при изменении значения)
+        cabbage_text = self.text.render(self.font, f"🥬: {self.cabbages}", (0, 100, 0))
+        carrot_text = self.text.render(self.font, f"🥕: {self.carrots}", (255, 140, 0))
+        score_text = self.text.render(self.font, f"Очки: {self.score}", (0, 0, 0))
+        time_text = self.text.render(self.font, f"Время: {int(self.timers.now)}с", (0, 0, 0))
         
         # Подсказки
-        hint_text = self.font.render("ЛКМ - капуста | ПКМ - морковь | R - перезарядка", True, (50, 50, 50))
-        self.screen.blit(hint_text, (400, 10))
+        hint_text = self.text.render(self.font, "ЛКМ - капуста | ПКМ - морковь | R - перезарядка | A - автоприцел", (50, 50, 50))
+        
+        return [
+            self.screen.blit(cabbage_text, (10, 10)),
+            self.screen.blit(carrot_text, (10, 50)),
+            self.screen.blit(score_text, (1000, 10)),
+            self.screen.blit(time_text, (1000, 50)),
+            self.screen.blit(hint_text, (400, 10)),
+        ]
     
     def run(self):
         running = True
+        profiler = self.profiler
         while running:
             dt = self.clock.tick(60) / 1000.0  # Delta time в секундах
+            profiler.begin()
             
             running = self.handle_events()
+            profiler.lap('events')
             self.update(dt)
-            self.render()
-            pygame.display.flip()
+            self.frame += 1
+            rects = self.render()
+            if self.dirty is not None:
+                self.dirty.present(rects)
+            else:
+                pygame.display.flip()
+            profiler.lap('render')
+            profiler.end()
 
 class AimingSystem:
-    def __init__(self):
+    def __init__(self, rng, clock, physics):
+        self.rng = rng
+        self.clock = clock
+        self.physics = physics
+        self.assist = False  # Автоприцел: стрелять так, чтобы снаряд упал в точку курсора
+        self.tables = {}  # Таблицы обратной баллистики по (тип снаряда, масса)
         self.mouse_pos = Vector2(0, 0)
         self.hold_time = 0
         self.shake_intensity = 0
@@ -234,11 +323,11 @@ class AimingSystem:
         self.shake_intensity = min(1.0, math.log(self.hold_time + 1) / 3.0)
         
         # Случайная дрожь
-        shake_x = random.uniform(-1, 1) * 50 * self.shake_intensity
-        shake_y = random.uniform(-1, 1) * 30 * self.shake_intensity
+        shake_x = self.rng.uniform(-1, 1) * 50 * self.shake_intensity
+        shake_y = self.rng.uniform(-1, 1) * 30 * self.shake_intensity
         
         # Периоды стабильности (мини-игра)
-        current_time = pygame.time.get_ticks() / 1000.0
+        current_time = self.clock.get_ticks() / 1000.0
         stability = math.sin(current_time * 5)  # 5 Hz колебание
         
         # Если в фазе стабильности, уменьшаем дрожь
@@ -251,6 +340,40 @@ class AimingSystem:
             self.mouse_pos.y + shake_y
         )
     
+    def aim_table(self, projectile_type, mass):
+        # Таблица строится при первом запросе; шаг физики - кадр 60 FPS
+        key = (projectile_type, mass)
+        table = self.tables.get(key)
+        if table is None:
+            physics = self.physics
+            drag = physics.get_drag_coefficient(projectile_type)
+            dt = 1 / 60
+            
+            def step(pos, vel):
+                pos, vel = pos.copy(), vel.copy()
+                physics.integrate(pos, vel, drag, mass, dt)
+                return pos, vel
+            
+            # Скорости 600·мощность при мощности 0.5..1, для моркови ещё ×0.8
+            table = BallisticTable(step, np.linspace(200, 650, 10), max_range=1200, floor=300)
+            self.tables[key] = table
+        return table
+    
+    def solve_angle(self, start, target, speed, projectile_type, mass):
+        # Угол выстрела из start в target или None, если цель вне досягаемости
+        return self.aim_table(projectile_type, mass).solve(
+            target[0] - start[0], target[1] - start[1], speed)
+    
+    def assisted_target(self, start, target, speed, projectile_type, mass):
+        # При включенном автоприцеле заменяет точку прицеливания так, чтобы
+        # направление на нее давало нужный угол; иначе возвращает target как есть
+        if not self.assist:
+            return target
+        angle = self.solve_angle(start, target, speed, projectile_type, mass)
+        if angle is None:
+            return target
+        return (start[0] + 100 * math.cos(angle), start[1] + 100 * math.sin(angle))
+    
     def get_shot_power(self):
         # Мощность выстрела зависит от стабильности прицела
         stability = 1.0 - self.shake_intensity
@@ -267,9 +390,9 @@ class AimingSystem:
         green = 255 - red
         color = (red, green, 0)
         
-        # Внешнее кольцо прицела
+        # Внешнее кольцо прицела (перекрестие помещается внутри него)
         radius = 20 + int(10 * self.shake_intensity)
-        pygame.draw.circle(screen, color, center, radius, 2)
+        rect = pygame.draw.circle(screen, color, center, radius, 2)
         
         # Перекрестие
         cross_size = 15 + int(5 * self.shake_intensity)
@@ -282,6 +405,7 @@ class AimingSystem:
         
         # Точка в центре
         pygame.draw.circle(screen, color, center, 3)
+        return rect
 
 class ProjectilePhysics:
     def __init__(self):
@@ -300,8 +424,7 @@ class ProjectilePhysics:
         # Сопротивление воздуха (квадратичная модель)
         speed = velocity.length()
         if speed > 0:
-            drag_coeff = (self.drag_coefficient_cabbage if projectile.type == 'cabbage' 
-                         else self.drag_coefficient_carrot)
+            drag_coeff = self.get_drag_coefficient(projectile.type)
             drag_force = 0.5 * self.air_density * speed**2 * drag_coeff
             drag_acceleration = drag_force / projectile.mass
             
@@ -311,21 +434,232 @@ class ProjectilePhysics:
         
         # Обновление позиции
         position += velocity * dt
+    
+    def get_drag_coefficient(self, projectile_type):
+        return (self.drag_coefficient_cabbage if projectile_type == 'cabbage'
+                else self.drag_coefficient_carrot)
+    
+    def update_batch(self, batch, dt):
+        # Тот же шаг, что и update_projectile, но сразу для всех снарядов пакета
+        n = batch.count
+        if n == 0:
+            return
+        self.integrate(batch.pos[:n], batch.vel[:n], batch.drag[:n], batch.mass[:n], dt)
+    
+    def integrate(self, position, velocity, drag, mass, dt):
+        # Шаг для массивов формы (N, 2), на месте; drag и mass - числа или массивы (N,)
+        # Сила тяжести
+        velocity[:, 1] += self.gravity * dt
+        
+        # Сопротивление воздуха: a = 0.5·ρ·Cd·v²/m против скорости,
+        # т.е. v -= v · (0.5·ρ·Cd/m · |v| · dt)
+        speed = np.hypot(velocity[:, 0], velocity[:, 1])
+        factor = 0.5 * self.air_density * drag / mass * speed * dt
+        velocity -= velocity * factor[:, None]
+        
+        # Обновление позиции
+        position += velocity * dt
+
+class ProjectileBatch:
+    # Летящие снаряды в виде структуры массивов: строка i описывает items[i]
+    def __init__(self, capacity=64):
+        self.count = 0
+        self.items = []
+        self.pos = np.zeros((capacity, 2))
+        self.vel = np.zeros((capacity, 2))
+        self.mass = np.zeros(capacity)
+        self.drag = np.zeros(capacity)
+        self.collision_radius = np.zeros(capacity)
+        self.damage_coeff = np.zeros(capacity)
+    
+    def __len__(self):
+        return self.count
+    
+    def grow(self):
+        capacity = len(self.mass) * 2
+        for name in ('pos', 'vel', 'mass', 'drag', 'collision_radius', 'damage_coeff'):
+            old = getattr(self, name)
+            new = np.zeros((capacity,) + old.shape[1:])
+            new[:self.count] = old[:self.count]
+            setattr(self, name, new)
+    
+    def add(self, projectile, physics):
+        if self.count == len(self.mass):
+            self.grow()
+        row = self.count
+        self.pos[row] = projectile.position
+        self.vel[row] = projectile.velocity
+        self.mass[row] = projectile.mass
+        self.drag[row] = physics.get_drag_coefficient(projectile.type)
+        self.collision_radius[row] = Projectile.COLLISION_RADIUS[projectile.type]
+        self.damage_coeff[row] = Projectile.DAMAGE_COEFF[projectile.type]
+        self.items.append(projectile)
+        self.count += 1
+    
+    def compact(self, keep, release=None):
+        # Удаляет все мертвые строки за один проход; release получает удаленные снаряды
+        if keep.all():
+            return
+        if release is not None:
+            for row in np.flatnonzero(~keep):
+                release(self.items[row])
+        rows = np.flatnonzero(keep)
+        n = len(rows)
+        for arr in (self.pos, self.vel, self.mass, self.drag,
+                    self.collision_radius, self.damage_coeff):
+            arr[:n] = arr[rows]
+        self.items = [self.items[i] for i in rows]
+        self.count = n
+    
+    def first_hits(self, zombies):
+        # Индекс первого задетого зомби орды для каждого снаряда или -1
+        n, m = self.count, zombies.count
+        if n == 0 or m == 0:
+            return np.full(n, -1)
+        delta = self.pos[:n, None, :] - zombies.pos[None, :m, :]
+        dist_sq = (delta ** 2).sum(axis=2)
+        reach = self.collision_radius[:n, None] + zombies.RADIUS
+        hit = dist_sq < reach ** 2
+        return np.where(hit.any(axis=1), hit.argmax(axis=1), -1)
+    
+    def calculate_damage(self, rows):
+        # Урон пропорционален импульсу (масса × скорость); rows - строка или массив строк
+        vel = self.vel[rows]
+        momentum = np.hypot(vel[..., 0], vel[..., 1]) * self.mass[rows]
+        return momentum * self.damage_coeff[rows]
+    
+    def draw(self, screen):
+        return [Projectile.draw_shape(screen, projectile.type, x, y)
+                for projectile, (x, y) in zip(self.items, self.pos[:self.count].tolist())]
+
+class ParticleSystem:
+    # Частицы эффектов в заранее выделенных массивах фиксированной емкости.
+    # Живые частицы занимают строки [0, count); когда емкость исчерпана,
+    # новые частицы отбрасываются, поэтому стоимость кадра ограничена сверху
+    SIZE = 3  # Сторона квадратика частицы в пикселях
+    
+    def __init__(self, capacity=2000, gravity=980, damping=1.5):
+        self.capacity = capacity
+        self.gravity = gravity
+        self.damping = damping  # Затухание скорости, доля в секунду
+        self.count = 0
+        self.pos = np.zeros((capacity, 2))
+        self.vel = np.zeros((capacity, 2))
+        self.life = np.zeros(capacity)
+        self.max_life = np.ones(capacity)
+        self.color = np.zeros((capacity, 3), dtype=np.float32)
+        
+        # Смещения пикселей квадратика относительно центра частицы
+        offsets = np.arange(self.SIZE) - self.SIZE // 2
+        offset_x, offset_y = np.meshgrid(offsets, offsets)
+        self.offset_x = offset_x.ravel()
+        self.offset_y = offset_y.ravel()
+    
+    def __len__(self):
+        return self.count
+    
+    def emit(self, position, velocities, lifetimes, color):
+        # Пачка частиц из одной точки; возвращает, сколько поместилось
+        n = min(len(lifetimes), self.capacity - self.count)
+        if n <= 0:
+            return 0
+        rows = slice(self.count, self.count + n)
+        self.pos[rows] = position
+        self.vel[rows] = velocities[:n]
+        self.life[rows] = lifetimes[:n]
+        self.max_life[rows] = lifetimes[:n]
+        self.color[rows] = color
+        self.count += n
+        return n
+    
+    def update(self, dt):
+        n = self.count
+        if n == 0:
+            return
+        velocity = self.vel[:n]
+        velocity[:, 1] += self.gravity * dt
+        velocity *= max(0.0, 1 - self.damping * dt)
+        self.pos[:n] += velocity * dt
+        
+        life = self.life[:n]
+        life -= dt
+        alive = life > 0
+        if alive.all():
+            return
+        # Живые строки сдвигаются в начало, освободившиеся переиспользуются
+        rows = np.flatnonzero(alive)
+        k = len(rows)
+        for arr in (self.pos, self.vel, self.life, self.max_life, self.color):
+            arr[:k] = arr[rows]
+        self.count = k
+    
+    def draw(self, screen):
+        # Все частицы за один проход по пикселям экрана: квадратик SIZE×SIZE
+        # смешивается с фоном пропорционально оставшейся жизни
+        n = self.count
+        if n == 0:
+            return None
+        if screen.get_bytesize() != 4:
+            # Редкий случай не 32-битного экрана: без затухания, по одному квадратику
+            rects = [screen.fill(color, (int(x) - self.SIZE // 2, int(y) - self.SIZE // 2, self.SIZE, self.SIZE))
+                     for (x, y), color in zip(self.pos[:n].tolist(), self.color[:n].tolist())]
+            return rects[0].unionall(rects[1:])
+        # Видимые частицы: квадратик целиком на экране
+        width, height = screen.get_size()
+        half = self.SIZE // 2
+        pos = self.pos[:n]
+        rows = np.flatnonzero((pos[:, 0] >= half) & (pos[:, 0] < width - half) &
+                              (pos[:, 1] >= half) & (pos[:, 1] < height - half))
+        if len(rows) == 0:
+            return None
+        
+        # Пиксели экрана как плоский массив uint32 (строка занимает pitch байт):
+        # индексы всех пикселей квадратика - строка матрицы (частица, пиксель)
+        row_length = screen.get_pitch() // 4
+        centers = pos[rows, 1].astype(np.intp) * row_length + pos[rows, 0].astype(np.intp)
+        index = centers[:, None] + (self.offset_y * row_length + self.offset_x)
+        alpha = (self.life[rows] / self.max_life[rows]).astype(np.float32)[:, None]
+        color = self.color[rows]
+        buffer = screen.get_buffer()
+        pixels = np.frombuffer(buffer, dtype=np.uint32)
+        try:
+            background = pixels[index]
+            blended = np.zeros(index.shape, dtype=np.uint32)
+            for shift, channel in zip(screen.get_shifts()[:3], color.T):
+                old = ((background >> shift) & 0xff).astype(np.float32)
+                old += (channel[:, None] - old) * alpha
+                blended |= old.astype(np.uint32) << shift
+            pixels[index] = blended
+        finally:
+            del pixels, buffer  # Снимает блокировку поверхности
+        # Общий прямоугольник всех нарисованных частиц
+        low = pos[rows].min(axis=0).astype(int) - half
+        high = pos[rows].max(axis=0).astype(int) - half + self.SIZE
+        return pygame.Rect(low[0], low[1], high[0] - low[0], high[1] - low[1])
 
 class Projectile:
-    def __init__(self, type, position, target, power, mass):
+    __slots__ = ('type', 'position', 'mass', 'velocity', 'creation_time')
+    
+    COLLISION_RADIUS = {'cabbage': 25, 'carrot': 20}
+    DAMAGE_COEFF = {
+        'cabbage': 0.15,  # Высокий урон по одной цели
+        'carrot': 0.08    # Меньший урон, но по площади
+    }
+    
+
+    def __init__(self, type, position, target, power, mass, rng, clock):
         self.type = type
         self.position = Vector2(position)
         self.mass = mass
-        self.velocity = self.calculate_initial_velocity(target, power)
-        self.creation_time = pygame.time.get_ticks()
+        self.velocity = self.calculate_initial_velocity(target, power, rng)
+        self.creation_time = clock.get_ticks()
         
-    def calculate_initial_velocity(self, target, power):
+    def calculate_initial_velocity(self, target, power, rng):
         direction = (target - self.position).normalize()
         base_speed = 600 * power  # Базовая скорость с учетом мощности
         
         # Добавляем небольшую случайность для реализма
-        angle_variation = random.uniform(-0.1, 0.1)
+        angle_variation = rng.uniform(-0.1, 0.1)
         direction = direction.rotate(angle_variation)
         
         return direction * base_speed
@@ -335,179 +669,289 @@ class Projectile:
     
     def check_collision(self, zombie):
         distance = (self.position - zombie.position).length()
-        collision_radius = 25 if self.type == 'cabbage' else 20
+        collision_radius = self.COLLISION_RADIUS[self.type]
         return distance < (collision_radius + zombie.radius)
     
     def calculate_damage(self):
         # Урон пропорционален импульсу (масса × скорость)
         momentum = self.velocity.length() * self.mass
-        
-        if self.type == 'cabbage':
-            return momentum * 0.15  # Высокий урон по одной цели
-        else:
-            return momentum * 0.08  # Меньший урон, но по площади
+        return momentum * self.DAMAGE_COEFF[self.type]
     
     def draw(self, screen):
-        if self.type == 'cabbage':
+        return self.draw_shape(screen, self.type, self.position.x, self.position.y)
+    
+    @staticmethod
+    def draw_shape(screen, type, x, y):
+        if type == 'cabbage':
             # Рисуем капусту
             color = (0, 180, 0)
             radius = 12
-            pygame.draw.circle(screen, color, (int(self.position.x), int(self.position.y)), radius)
+            rect = pygame.draw.circle(screen, color, (int(x), int(y)), radius)
             # Текстура капусты
             for i in range(4):
                 angle = i * math.pi / 2
-                leaf_x = self.position.x + math.cos(angle) * radius * 0.7
-                leaf_y = self.position.y + math.sin(angle) * radius * 0.7
-                pygame.draw.circle(screen, (0, 220, 0), (int(leaf_x), int(leaf_y)), radius//2)
+                leaf_x = x + math.cos(angle) * radius * 0.7
+                leaf_y = y + math.sin(angle) * radius * 0.7
+                rect.union_ip(pygame.draw.circle(screen, (0, 220, 0), (int(leaf_x), int(leaf_y)), radius//2))
+            return rect
         else:
             # Рисуем морковь
             color = (255, 140, 0)
             points = [
-                (self.position.x, self.position.y - 15),  # Верх
-                (self.position.x - 8, self.position.y + 10),  # Левый низ
-                (self.position.x + 8, self.position.y + 10)   # Правый низ
+                (x, y - 15),  # Верх
+                (x - 8, y + 10),  # Левый низ
+                (x + 8, y + 10)   # Правый низ
             ]
-            pygame.draw.polygon(screen, color, points)
+            rect = pygame.draw.polygon(screen, color, points)
             # Зелень моркови
-            pygame.draw.line(screen, (0, 180, 0), 
-                           (self.position.x, self.position.y - 15),
-                           (self.position.x - 5, self.position.y - 25), 2)
-            pygame.draw.line(screen, (0, 180, 0), 
-                           (self.position.x, self.position.y - 15),
-                           (self.position.x + 5, self.position.y - 25), 2)
+            rect.union_ip(pygame.draw.line(screen, (0, 180, 0), 
+                           (x, y - 15),
+                           (x - 5, y - 25), 2))
+            rect.union_ip(pygame.draw.line(screen, (0, 180, 0), 
+                           (x, y - 15),
+                           (x + 5, y - 25), 2))
+            return rect
 
 class Zombie:
-    def __init__(self, zombie_type="normal"):
-        self.type = zombie_type
-        self.setup_stats()
-        self.position = Vector2(1250, 530)  # Начальная позиция справа
-        self.velocity = Vector2(-self.speed, 0)
-        self.animation_time = 0
-        self.frame = 0
-        self.radius = 25
-        self.attack_cooldown = 0
-        
-    def setup_stats(self):
-        stats = {
-            "normal": {"health": 100, "speed": 25, "armor": 0.0, "points": 10},
-            "armored": {"health": 200, "speed": 18, "armor": 0.6, "points": 25},
-            "athlete": {"health": 80, "speed": 40, "armor": 0.2, "points": 15},
-            "giant": {"health": 400, "speed": 12, "armor": 0.8, "points": 50}
-        }
-        
-        self.health = stats[self.type]["health"]
-        self.max_health = self.health
-        self.speed = stats[self.type]["speed"]
-        self.armor = stats[self.type]["armor"]
-        self.points = stats[self.type]["points"]
+    # Справочник типов зомби: характеристики и отрисовка. Сами зомби на поле -
+    # строки ZombieHorde, экземпляров этого класса игра не создает
     
-    def take_damage(self, damage):
-        actual_damage = max(1, damage * (1 - self.armor))
-        self.health -= actual_damage
-        
-        # Эффект получения урона
-        self.velocity.x *= 0.5  # Замедление при ударе
+    # Характеристики по типам
+    STATS = {
+        "normal": {"health": 100, "speed": 25, "armor": 0.0, "points": 10},
+        "armored": {"health": 200, "speed": 18, "armor": 0.6, "points": 25},
+        "athlete": {"health": 80, "speed": 40, "armor": 0.2, "points": 15},
+        "giant": {"health": 400, "speed": 12, "armor": 0.8, "points": 50}
+    }
     
-    def update(self, dt):
-        self.position += self.velocity * dt
-        self.animation_time += dt
-        self.attack_cooldown = max(0, self.attack_cooldown - dt)
-        
-        # Анимация ходьбы
-        if self.animation_time > 0.15:
-            self.frame = (self.frame + 1) % 4
-            self.animation_time = 0
-        
-        # Если дошел до левого края - атакует базу
-        if self.position.x < 50:
-            self.attack_base()
+    # Цвет в зависимости от типа
+    COLORS = {
+        "normal": (150, 150, 150),
+        "armored": (100, 50, 0),
+        "athlete": (50, 150, 50),
+        "giant": (80, 0, 0)
+    }
+    FRAMES = 4
+    SPRITE_SIZE = (80, 150)  # Ячейка атласа: с запасом под гиганта с руками
+    SPRITE_ANCHOR = (40, 85)  # Где в ячейке находится position зомби
     
-    def attack_base(self):
-        if self.attack_cooldown <= 0:
-            # В реальной игре здесь бы отнимались жизни
-            self.attack_cooldown = 1.0  # Атака раз в секунду
+    @staticmethod
+    def body_size(zombie_type):
+        # (ширина, высота) тела
+        return (60, 90) if zombie_type == "giant" else (40, 60)
     
-    def draw(self, screen):
-        # Цвет в зависимости от типа
-        colors = {
-            "normal": (150, 150, 150),
-            "armored": (100, 50, 0),
-            "athlete": (50, 150, 50),
-            "giant": (80, 0, 0)
-        }
-        color = colors.get(self.type, (150, 150, 150))
-        
-        # Тело зомби
-        body_height = 60 if self.type != "giant" else 90
-        body_width = 40 if self.type != "giant" else 60
-        body_rect = pygame.Rect(
-            self.position.x - body_width//2, 
-            self.position.y - body_height//2, 
-            body_width, 
-            body_height
-        )
-        pygame.draw.rect(screen, color, body_rect)
+    @classmethod
+    def build_atlas(cls):
+        keys = [(zombie_type, frame) for zombie_type in cls.COLORS for frame in range(cls.FRAMES)]
+        return SpriteAtlas(keys, cls.SPRITE_SIZE, cls.SPRITE_ANCHOR, cls.paint, columns=cls.FRAMES)
+    
+    @classmethod
+    def paint(cls, surface, key, anchor):
+        # Тело зомби типа zombie_type в кадре frame с центром в anchor (для атласа)
+        zombie_type, frame = key
+        x, y = anchor
+        color = cls.COLORS.get(zombie_type, (150, 150, 150))
+        body_width, body_height = cls.body_size(zombie_type)
+        
+        # Тело
+        body_rect = pygame.Rect(x - body_width//2, y - body_height//2, body_width, body_height)
+        pygame.draw.rect(surface, color, body_rect)
         
         # Голова
-        head_radius = 15 if self.type != "giant" else 22
-        head_pos = (int(self.position.x), int(self.position.y - body_height//2 - head_radius//2))
-        pygame.draw.circle(screen, (200, 150, 150), head_pos, head_radius)
+        head_radius = 15 if zombie_type != "giant" else 22
+        head_pos = (x, y - body_height//2 - head_radius//2)
+        pygame.draw.circle(surface, (200, 150, 150), head_pos, head_radius)
         
         # Анимация ног
         leg_offsets = [10, 5, -5, -10]
-        leg_offset = leg_offsets[self.frame]
+        leg_offset = leg_offsets[frame]
         
         # Ноги
-        leg_start_y = self.position.y + body_height//2 - 10
-        pygame.draw.line(screen, (50, 50, 50), 
-                        (self.position.x - 10, leg_start_y),
-                        (self.position.x - 10 + leg_offset, leg_start_y + 20), 4)
-        pygame.draw.line(screen, (50, 50, 50), 
-                        (self.position.x + 10, leg_start_y),
-                        (self.position.x + 10 - leg_offset, leg_start_y + 20), 4)
+        leg_start_y = y + body_height//2 - 10
+        pygame.draw.line(surface, (50, 50, 50), 
+                        (x - 10, leg_start_y),
+                        (x - 10 + leg_offset, leg_start_y + 20), 4)
+        pygame.draw.line(surface, (50, 50, 50), 
+                        (x + 10, leg_start_y),
+                        (x + 10 - leg_offset, leg_start_y + 20), 4)
         
         # Руки (только для больших типов)
-        if self.type in ["giant", "armored"]:
+        if zombie_type in ["giant", "armored"]:
             arm_offset = leg_offset * 0.7
-            arm_start_y = self.position.y - body_height//4
-            pygame.draw.line(screen, (50, 50, 50), 
-                            (self.position.x - 15, arm_start_y),
-                            (self.position.x - 25 + arm_offset, arm_start_y - 10), 4)
-            pygame.draw.line(screen, (50, 50, 50), 
-                            (self.position.x + 15, arm_start_y),
-                            (self.position.x + 25 - arm_offset, arm_start_y - 10), 4)
+            arm_start_y = y - body_height//4
+            pygame.draw.line(surface, (50, 50, 50), 
+                            (x - 15, arm_start_y),
+                            (x - 25 + arm_offset, arm_start_y - 10), 4)
+            pygame.draw.line(surface, (50, 50, 50), 
+                            (x + 15, arm_start_y),
+                            (x + 25 - arm_offset, arm_start_y - 10), 4)
+    
+    @classmethod
+    def draw_shape(cls, screen, sprites, zombie_type, frame, x, y, health, max_health):
+        # Тело - один blit из атласа, поверх только полоска здоровья.
+        # Полоска лежит внутри ячейки атласа, поэтому ее прямоугольник покрывает всё
+        rect = sprites.blit(screen, (zombie_type, frame), (x, y))
         
         # Полоска здоровья
-        health_width = body_width * (self.health / self.max_health)
+        body_width, body_height = cls.body_size(zombie_type)
+        health_width = body_width * (health / max_health)
         health_rect = pygame.Rect(
-            self.position.x - body_width//2, 
-            self.position.y - body_height//2 - 10, 
+            x - body_width//2, 
+            y - body_height//2 - 10, 
             health_width, 5
         )
-        health_color = (0, 255, 0) if self.health > self.max_health * 0.6 else (
-            (255, 255, 0) if self.health > self.max_health * 0.3 else (255, 0, 0)
+        health_color = (0, 255, 0) if health > max_health * 0.6 else (
+            (255, 255, 0) if health > max_health * 0.3 else (255, 0, 0)
         )
         pygame.draw.rect(screen, health_color, health_rect)
+        return rect
+
+class ZombieHorde:
+    # Все зомби на поле в виде структуры массивов: строка i - i-й зомби в порядке
+    # появления. Шаг движения, урон и удаление погибших выполняются сразу для
+    # всей орды, поэтому тысячи зомби стоят как несколько операций numpy
+    RADIUS = 25  # Радиус столкновения, одинаковый для всех типов
+    # Массивы строк орды (переносятся вместе при росте и сжатии)
+    FIELDS = ('type', 'pos', 'vel', 'health', 'max_health', 'armor', 'points',
+              'animation_time', 'frame', 'next_attack')
+    
+    def __init__(self, capacity=64):
+        self.count = 0
+        self.types = list(Zombie.STATS)  # Номер типа -> имя типа
+        self.type_index = {zombie_type: i for i, zombie_type in enumerate(self.types)}
+        # Характеристики типов как массивы, индексируемые номером типа
+        self.type_health = np.array([Zombie.STATS[t]["health"] for t in self.types], dtype=float)
+        self.type_speed = np.array([Zombie.STATS[t]["speed"] for t in self.types], dtype=float)
+        self.type_armor = np.array([Zombie.STATS[t]["armor"] for t in self.types])
+        self.type_points = np.array([Zombie.STATS[t]["points"] for t in self.types])
+        
+        self.type = np.zeros(capacity, dtype=np.intp)
+        self.pos = np.zeros((capacity, 2))
+        self.vel = np.zeros((capacity, 2))
+        self.health = np.zeros(capacity)
+        self.max_health = np.zeros(capacity)
+        self.armor = np.zeros(capacity)
+        self.points = np.zeros(capacity, dtype=np.intp)
+        self.animation_time = np.zeros(capacity)
+        self.frame = np.zeros(capacity, dtype=np.intp)
+        # Игровое время, с которого зомби может снова атаковать базу: перезарядку
+        # не нужно уменьшать каждый кадр
+        self.next_attack = np.zeros(capacity)
+    
+    def __len__(self):
+        return self.count
+    
+    def grow(self, needed):
+        capacity = len(self.health)
+        while capacity < needed:
+            capacity *= 2
+        for name in self.FIELDS:
+            old = getattr(self, name)
+            new = np.zeros((capacity,) + old.shape[1:], dtype=old.dtype)
+            new[:self.count] = old[:self.count]
+            setattr(self, name, new)
+    
+    def add(self, zombie_type, x=1250, y=530):
+        self.add_many([zombie_type], [x], y)
+    
+    def add_many(self, zombie_types, xs, y=530):
+        # Новые зомби в конец орды; xs - начальные координаты по горизонтали
+        k = len(zombie_types)
+        if self.count + k > len(self.health):
+            self.grow(self.count + k)
+        rows = slice(self.count, self.count + k)
+        kinds = np.array([self.type_index[t] for t in zombie_types], dtype=np.intp)
+        self.type[rows] = kinds
+        self.pos[rows, 0] = xs
+        self.pos[rows, 1] = y
+        self.vel[rows, 0] = -self.type_speed[kinds]
+        self.vel[rows, 1] = 0
+        self.health[rows] = self.type_health[kinds]
+        self.max_health[rows] = self.type_health[kinds]
+        self.armor[rows] = self.type_armor[kinds]
+        self.points[rows] = self.type_points[kinds]
+        self.animation_time[rows] = 0
+        self.frame[rows] = 0
+        self.next_attack[rows] = 0
+        self.count += k
+    
+    def update(self, dt, now):
+        # Шаг всей орды сразу; now - игровое время
+        n = self.count
+        if n == 0:
+            return
+        pos, vel = self.pos[:n], self.vel[:n]
+        pos += vel * dt
+        animation_time = self.animation_time[:n]
+        animation_time += dt
+        
+        # Анимация ходьбы
+        step = animation_time > 0.15
+        frame = self.frame[:n]
+        frame[step] = (frame[step] + 1) % Zombie.FRAMES
+        animation_time[step] = 0
+        
+        # Дошедшие до левого края атакуют базу раз в секунду
+        next_attack = self.next_attack[:n]
+        next_attack[(pos[:, 0] < 50) & (next_attack <= now)] = now + 1.0
+    
+    def take_damage(self, rows, damage):
+        # Урон damage[i] зомби rows[i]; строки могут повторяться, тогда попадания
+        # складываются по порядку, одно за другим
+        rows = np.asarray(rows, dtype=np.intp)
+        actual_damage = np.maximum(1, damage * (1 - self.armor[rows]))
+        np.subtract.at(self.health, rows, actual_damage)
+        
+        # Эффект получения урона: каждое попадание вдвое замедляет
+        np.multiply.at(self.vel[:, 0], rows, 0.5)
+    
+    def compact(self, keep):
+        # Удаляет строки с keep=False за один проход, сохраняя порядок остальных
+        rows = np.flatnonzero(keep)
+        n = len(rows)
+        for name in self.FIELDS:
+            arr = getattr(self, name)
+            arr[:n] = arr[rows]
+        self.count = n
+    
+    def remove_dead(self):
+        # Убирает погибших и возвращает их очки в порядке орды
+        n = self.count
+        dead = self.health[:n] <= 0
+        if not dead.any():
+            return []
+        points = self.points[:n][dead].tolist()
+        self.compact(~dead)
+        return points
+    
+    def draw(self, screen, sprites):
+        n = self.count
+        types = self.types
+        return [Zombie.draw_shape(screen, sprites, types[kind], frame, x, y, health, max_health)
+                for kind, frame, (x, y), health, max_health in zip(
+                    self.type[:n].tolist(), self.frame[:n].tolist(), self.pos[:n].tolist(),
+                    self.health[:n].tolist(), self.max_health[:n].tolist())]
 
 class ZombieSpawner:
-    def __init__(self):
-        self.spawn_timer = 0
+    def __init__(self, rng, timers, zombies):
+        self.rng = rng
+        self.timers = timers
+        self.zombies = zombies
         self.spawn_interval = 4.0
         self.wave = 1
         self.zombies_spawned = 0
-        
-    def update(self, dt, zombies):
-        self.spawn_timer += dt
-        
-        if self.spawn_timer >= self.spawn_interval:
-            self.spawn_zombie(zombies)
-            self.spawn_timer = 0
-            self.zombies_spawned += 1
-            
-            # Увеличиваем сложность
-            if self.zombies_spawned % 5 == 0:
-                self.spawn_interval = max(1.0, self.spawn_interval * 0.9)
-                self.wave += 1
+        self.timers.after(self.spawn_interval, self.spawn)
+        
+    def spawn(self):
+        self.spawn_zombie(self.zombies)
+        self.zombies_spawned += 1
+        
+        # Увеличиваем сложность
+        if self.zombies_spawned % 5 == 0:
+            self.spawn_interval = max(1.0, self.spawn_interval * 0.9)
+            self.wave += 1
+        # Интервал меняется с волнами, поэтому таймер разовый и ставится заново
+        self.timers.after(self.spawn_interval, self.spawn)
     
     def spawn_zombie(self, zombies):
         # Вероятности появления в зависимости от волны
@@ -518,8 +962,8 @@ class ZombieSpawner:
         else:
             types = ["normal"] * 4 + ["athlete"] * 3 + ["armored"] * 2 + ["giant"] * 1
         
-        zombie_type = random.choice(types)
-        zombies.append(Zombie(zombie_type))
+        zombie_type = self.rng.choice(types)
+        zombies.add(zombie_type)
 
 class Rabbit:
     def __init__(self):
@@ -555,20 +999,18 @@ class Rabbit:
                          (int(self.position.x + 65), int(self.position.y - 2)), 8)
 
 class Garden:
-    def __init__(self):
+    def __init__(self, rng, timers):
+        self.rng = rng
         self.cabbages_ready = 0
         self.carrots_ready = 0
-        self.grow_timer = 0
         self.position = Vector2(200, 500)
         
-    def update(self, dt):
-        self.grow_timer += dt
-        
         # Овощи растут каждые 5 секунд
-        if self.grow_timer >= 5:
-            self.cabbages_ready += random.randint(1, 3)
-            self.carrots_ready += random.randint(1, 2)
-            self.grow_timer = 0
+        timers.every(5, self.grow)
+        
+    def grow(self):
+        self.cabbages_ready += self.rng.randint(1, 3)
+        self.carrots_ready += self.rng.randint(1, 2)
     
     def harvest(self):
         harvest = {
@@ -579,11 +1021,15 @@ class Garden:
         self.carrots_ready = 0
         return harvest
     
-    def draw(self, screen):
+    def bed_rect(self):
+        return pygame.Rect(self.position.x - 100, self.position.y - 20, 200, 40)
+    
+    def draw_bed(self, screen):
         # Грядка
-        garden_rect = pygame.Rect(self.position.x - 100, self.position.y - 20, 200, 40)
-        pygame.draw.rect(screen, (139, 69, 19), garden_rect)  # Коричневая земля
-        
+        pygame.draw.rect(screen, (139, 69, 19), self.bed_rect())  # Коричневая земля
+    
+    def draw(self, screen):
+        # Возвращает область грядки: урожай не выходит за нее дальше чем на пару пикселей
         # Капуста
         for i in range(min(self.cabbages_ready, 6)):
             x = self.position.x - 80 + i * 30
@@ -598,7 +1044,15 @@ class Garden:
                 (x + 6, self.position.y + 5)
             ]
             pygame.draw.polygon(screen, (255, 140, 0), points)
+        return self.bed_rect().inflate(0, 8)
 
 if __name__ == "__main__":
-    game = RabbitsVsZombies()
-    game.run()
\ No newline at end of file
+    session = Session.from_argv()
+    game = RabbitsVsZombies(seed=session.seed, clock=session.clock, events=session.input,
+                            dirty_rects='--dirty-rects' in sys.argv[1:],
+                            profile_csv=csv_path_from_argv())
+    try:
+        game.run()
+    finally:
+        game.profiler.close()
+        session.close()
\ No newline at end of file
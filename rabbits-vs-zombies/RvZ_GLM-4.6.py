@@ -1,6 +1,18 @@
+import heapq
+import os
+import sys
 import pygame
 import math
 import random
+import numpy as np
+
+from rvz.ballistics import BallisticTable
+from rvz.dirty import DirtyRenderer
+from rvz.pool import ObjectPool
+from rvz.profiler import FrameProfiler, csv_path_from_argv
+from rvz.replay import PygameInput, Session, SimClock, WallClock
+from rvz.sprites import SpriteAtlas
+from rvz.text import FontRegistry, TextCache
 
 # --- Константы ---
 SCREEN_WIDTH = 1200
@@ -24,6 +36,8 @@ DARK_GRAY = (64, 64, 64)
 GRAVITY = 9.8 * 50  # Масштабировано для пикселей
 AIR_RESISTANCE_COEFF = 0.002  # Коэффициент квадратичного сопротивления воздуха
 TIME_STEP = 1 / FPS
+MAX_SUBSTEPS = 5  # Предел шагов физики за кадр: защита от "спирали смерти"
+RENDER_FPS = FPS  # Предел частоты рендера; на ход игры не влияет
 
 # Пушка
 CANNON_LENGTH = 60
@@ -32,6 +46,7 @@ CANNON_COLOR = DARK_GRAY
 SHAKE_GROWTH_RATE = 0.5  # Скорость роста амплитуды колебаний
 MAX_SHAKE_AMPLITUDE = 15  # Максимальная амплитуда в градусах
 SHAKE_FREQUENCY = 0.01  # Частота колебаний
+PROJECTILE_SPEED = 800  # Начальная скорость снаряда
 
 # Снаряды
 CABBAGE_MASS = 1.0
@@ -44,6 +59,7 @@ CARROT_COLOR = ORANGE
 CARROT_DAMAGE_COEFF = 0.3
 CARROT_SPREAD_ANGLE = 15 # Угол разлета моркови в градусах
 CARROT_COUNT = 5
+TRAIL_LENGTH = 10  # Точек в следе снаряда
 
 # Зомби
 ZOMBIE_BASE_SPEED = 20
@@ -58,6 +74,56 @@ GARDEN_ROWS = 2
 GARDEN_COLS = 5
 PLOT_SIZE = 40
 GROWTH_TIME = 5000 # Время роста в миллисекундах
+GROWTH_STAGES = 20 # Ступеней цвета созревания: грядка перекрашивается только при смене ступени
+
+# Столкновения
+GRID_CELL_SIZE = 64 # Размер ячейки сетки броадфазы в пикселях
+
+
+class SpatialGrid:
+    """Равномерная сетка для поиска зомби рядом со снарядом (броадфаза)"""
+    def __init__(self, cell_size):
+        self.cell_size = cell_size
+        self.cells = {}
+        self.count = 0
+        self.max_size = 0
+
+    def clear(self):
+        """Очищает сетку перед заполнением в новом кадре"""
+        self.cells.clear()
+        self.count = 0
+        self.max_size = 0
+
+    def insert(self, zombie):
+        """Добавляет зомби; порядок вставки задает приоритет попадания"""
+        key = (int(zombie.x // self.cell_size), int(zombie.y // self.cell_size))
+        self.cells.setdefault(key, []).append((self.count, zombie))
+        self.count += 1
+        self.max_size = max(self.max_size, zombie.size)
+
+    def first_hit(self, proj):
+        """Возвращает первого по порядку вставки активного зомби, которого задевает снаряд"""
+        reach = proj.radius + self.max_size
+        cell_size = self.cell_size
+        min_cx = int((proj.x - reach) // cell_size)
+        max_cx = int((proj.x + reach) // cell_size)
+        min_cy = int((proj.y - reach) // cell_size)
+        max_cy = int((proj.y + reach) // cell_size)
+
+        hit, hit_order = None, self.count
+        for cx in range(min_cx, max_cx + 1):
+            for cy in range(min_cy, max_cy + 1):
+                for order, zombie in self.cells.get((cx, cy), ()):
+                    if order >= hit_order or not zombie.active:
+                        continue
+                    # Узкая фаза: сравнение квадратов расстояний без sqrt
+                    dx = proj.x - zombie.x
+                    dy = proj.y - zombie.y
+                    radius_sum = proj.radius + zombie.size
+                    if dx * dx + dy * dy < radius_sum * radius_sum:
+                        hit, hit_order = zombie, order
+        return hit
+
 
 class Terrain:
     """Класс для генерации и отрисовки холмистого ландшафта"""
@@ -65,17 +131,27 @@ class Terrain:
         self.width = width
         self.height = height
         self.base_height = base_height
+        self.spacing = 10 # Шаг между точками ландшафта по x
         self.points = []
         self.generate()
 
     def generate(self):
         """Генерирует точки ландшафта с помощью синусоиды"""
-        num_points = self.width // 10
+        num_points = self.width // self.spacing
         for i in range(num_points + 1):
-            x = i * 10
+            x = i * self.spacing
             y = self.base_height + math.sin(i * 0.02) * 80 + math.sin(i * 0.05) * 40
             self.points.append((x, y))
 
+        # Индекс для поиска за O(1): точки идут с постоянным шагом,
+        # поэтому номер сегмента вычисляется делением, а перепады высот - заранее
+        self.heights = [y for _, y in self.points]
+        self.deltas = [y2 - y1 for y1, y2 in zip(self.heights, self.heights[1:])]
+        self.max_x = self.points[-1][0]
+        # Те же точки массивами numpy для векторного запроса get_heights_at
+        self.point_xs = np.array([x for x, _ in self.points], dtype=float)
+        self.point_heights = np.array(self.heights, dtype=float)
+
     def draw(self, screen):
         """Рисует ландшафт"""
         # Рисуем небо
@@ -86,37 +162,74 @@ class Terrain:
 
     def get_height_at(self, x):
         """Возвращает высоту ландшафта в точке x"""
-        if x < 0 or x > self.width:
+        if x < 0 or x > self.max_x:
             return self.base_height
-        
-        # Находим два ближайших сегмента
-        for i in range(len(self.points) - 1):
-            p1, p2 = self.points[i], self.points[i+1]
-            if p1[0] <= x <= p2[0]:
-                # Линейная интерполяция
-                if p2[0] - p1[0] == 0: return p1[1]
-                t = (x - p1[0]) / (p2[0] - p1[0])
-                return p1[1] + t * (p2[1] - p1[1])
-        return self.base_height
+
+        # Сегмент находится сразу по индексу; правый край относится к последнему сегменту
+        i = min(int(x // self.spacing), len(self.deltas) - 1)
+        # Линейная интерполяция
+        t = (x - i * self.spacing) / self.spacing
+        return self.heights[i] + t * self.deltas[i]
+
+    def get_heights_at(self, xs):
+        """Возвращает массив высот ландшафта для массива x (как get_height_at, но разом)"""
+        return np.interp(xs, self.point_xs, self.point_heights,
+                         left=self.base_height, right=self.base_height)
+
+
+def ballistic_step(pos, vel, mass):
+    """Тот же шаг, что в Projectile.update, для массивов numpy формы (N, 2)"""
+    vx, vy = vel[:, 0], vel[:, 1]
+    v = (vx * vx + vy * vy) ** 0.5
+    ax = (-AIR_RESISTANCE_COEFF * v * vx) / mass
+    ay = GRAVITY + (-AIR_RESISTANCE_COEFF * v * vy) / mass
+    vel = vel.copy()
+    vel[:, 0] += ax * TIME_STEP
+    vel[:, 1] += ay * TIME_STEP
+    return pos + vel * TIME_STEP, vel
+
+
+AIM_TABLES = {}
+
+
+def aim_table(mass):
+    """Таблица обратной баллистики для снарядов массы mass; строится при первом запросе"""
+    table = AIM_TABLES.get(mass)
+    if table is None:
+        # Разброс скорости моркови - от 0.9 до 1.1 от базовой
+        speeds = [PROJECTILE_SPEED * k for k in (0.85, 0.9, 0.95, 1.0, 1.05, 1.1, 1.15)]
+        table = BallisticTable(lambda pos, vel: ballistic_step(pos, vel, mass), speeds,
+                               max_range=SCREEN_WIDTH, muzzle=CANNON_LENGTH, floor=SCREEN_HEIGHT)
+        AIM_TABLES[mass] = table
+    return table
 
 
 class Cannon:
     """Класс пушки с механикой колебаний"""
-    def __init__(self, x, y):
+    def __init__(self, x, y, clock):
         self.x = x
         self.y = y
+        self.clock = clock
         self.angle = -math.pi / 4  # Начальный угол
+        self.prev_angle = self.angle
         self.base_angle = self.angle
         self.shake_amplitude = 0
         self.last_mouse_pos = None
         self.shake_timer = 0
+        self.aim_assist = False  # Ствол наводится так, чтобы капуста упала в курсор
+
+    def solve_aim(self, target, mass=CABBAGE_MASS, speed=PROJECTILE_SPEED, high=False):
+        """Угол ствола, при котором снаряд попадает в точку target, или None"""
+        return aim_table(mass).solve(target[0] - self.x, target[1] - self.y, speed, high)
 
     def update(self, mouse_pos):
         """Обновляет угол пушки и амплитуду колебаний"""
+        self.prev_angle = self.angle
         if mouse_pos:
             dx = mouse_pos[0] - self.x
             dy = mouse_pos[1] - self.y
-            self.base_angle = math.atan2(dy, dx)
+            angle = self.solve_aim(mouse_pos) if self.aim_assist else None
+            self.base_angle = math.atan2(dy, dx) if angle is None else angle
 
             # Механика колебаний
             if self.last_mouse_pos and mouse_pos == self.last_mouse_pos:
@@ -129,16 +242,21 @@ class Cannon:
             self.last_mouse_pos = mouse_pos
 
             # Применяем колебания
-            shake_offset = math.radians(self.shake_amplitude) * math.sin(pygame.time.get_ticks() * SHAKE_FREQUENCY)
+            shake_offset = math.radians(self.shake_amplitude) * math.sin(self.clock.get_ticks() * SHAKE_FREQUENCY)
             self.angle = self.base_angle + shake_offset
 
-    def draw(self, screen):
-        """Рисует пушку"""
-        end_x = self.x + CANNON_LENGTH * math.cos(self.angle)
-        end_y = self.y + CANNON_LENGTH * math.sin(self.angle)
+    def draw(self, screen, alpha=1.0):
+        """Рисует пушку; alpha - доля пути от прошлого шага физики к текущему.
+        Возвращает затронутый прямоугольник.
+        """
+        # Разность углов приводится к (-pi, pi], чтобы ствол не крутился через полный оборот
+        turn = (self.angle - self.prev_angle + math.pi) % (2 * math.pi) - math.pi
+        angle = self.prev_angle + turn * alpha
+        end_x = self.x + CANNON_LENGTH * math.cos(angle)
+        end_y = self.y + CANNON_LENGTH * math.sin(angle)
         
-        pygame.draw.line(screen, CANNON_COLOR, (self.x, self.y), (end_x, end_y), CANNON_WIDTH)
-        pygame.draw.circle(screen, CANNON_COLOR, (int(self.x), int(self.y)), CANNON_WIDTH // 2)
+        rect = pygame.draw.line(screen, CANNON_COLOR, (self.x, self.y), (end_x, end_y), CANNON_WIDTH)
+        return rect.union(pygame.draw.circle(screen, CANNON_COLOR, (int(self.x), int(self.y)), CANNON_WIDTH // 2))
 
     def get_barrel_end(self):
         """Возвращает координаты конца ствола"""
@@ -147,11 +265,60 @@ class Cannon:
         return end_x, end_y
 
 
+class TrailRenderer:
+    """Следы всех снарядов за один проход.
+
+    Для каждой длины следа заранее готовы SRCALPHA-кружки с нарастающей
+    непрозрачностью; все точки всех следов накладываются на кадр одним
+    вызовом blits, и pygame смешивает их с фоном по альфе.
+    """
+    def __init__(self):
+        self.fades = {}  # (цвет, радиус, длина следа) -> кружки от старой точки к новой
+
+    def fade(self, color, radius, size):
+        """Кружки для точек 1..size-1 следа длины size (точка 0 полностью прозрачна)"""
+        key = (color, radius, size)
+        stamps = self.fades.get(key)
+        if stamps is None:
+            stamps = []
+            for i in range(1, size):
+                stamp = pygame.Surface((radius * 2, radius * 2), pygame.SRCALPHA)
+                pygame.draw.circle(stamp, (*color, int(255 * (i / size))), (radius, radius), radius)
+                stamps.append(stamp)
+            self.fades[key] = stamps
+        return stamps
+
+    def draw(self, screen, projectiles, rects=False):
+        """Рисует следы снарядов: старые точки прозрачнее новых.
+        С rects=True возвращает прямоугольники всех кружков (для вывода по
+        грязным прямоугольникам), иначе pygame их даже не собирает.
+        """
+        blits = []
+        for proj in projectiles:
+            if not proj.active or proj.trail_size < 2:
+                continue
+            radius = proj.radius // 2
+            stamps = self.fade(proj.color, radius, proj.trail_size)
+            points = proj.trail_points()[1:]
+            blits += [(stamp, (x - radius, y - radius)) for stamp, (x, y) in zip(stamps, points)]
+        if not blits:
+            return []
+        if rects:
+            return screen.blits(blits)
+        screen.blits(blits, doreturn=False)
+        return []
+
+
 class Projectile:
     """Класс снаряда с реалистичной физикой"""
+    __slots__ = ('x', 'y', 'prev_x', 'prev_y', 'vx', 'vy', 'mass', 'radius', 'color', 'damage_coeff',
+                 'active', 'trail', 'trail_head', 'trail_size')
+
     def __init__(self, x, y, angle, speed, mass, radius, color, damage_coeff):
         self.x = x
         self.y = y
+        self.prev_x = x  # Положение на прошлом шаге физики, для интерполяции
+        self.prev_y = y
         self.vx = speed * math.cos(angle)
         self.vy = speed * math.sin(angle)
         self.mass = mass
@@ -159,17 +326,23 @@ class Projectile:
         self.color = color
         self.damage_coeff = damage_coeff
         self.active = True
-        self.trail = [] # След за снарядом
+        # След за снарядом: кольцевой буфер, trail_head - ячейка для следующей точки
+        self.trail = [None] * TRAIL_LENGTH
+        self.trail_head = 0
+        self.trail_size = 0
 
     def update(self, terrain):
         """Обновляет позицию снаряда с учетом гравитации и сопротивления воздуха"""
         if not self.active:
             return
 
-        # Сохраняем след
-        self.trail.append((int(self.x), int(self.y)))
-        if len(self.trail) > 10:
-            self.trail.pop(0)
+        self.prev_x, self.prev_y = self.x, self.y
+
+        # Сохраняем след: самая старая точка перезаписывается за O(1)
+        self.trail[self.trail_head] = (int(self.x), int(self.y))
+        self.trail_head = (self.trail_head + 1) % TRAIL_LENGTH
+        if self.trail_size < TRAIL_LENGTH:
+            self.trail_size += 1
 
         # Скорость
         v = math.sqrt(self.vx**2 + self.vy**2)
@@ -197,17 +370,19 @@ class Projectile:
         if self.y > terrain.get_height_at(self.x):
             self.active = False
 
-    def draw(self, screen):
-        """Рисует снаряд и его след"""
+    def draw(self, screen, alpha=1.0):
+        """Рисует снаряд в положении между двумя шагами физики (след рисует TrailRenderer)"""
         if not self.active:
-            return
-        # Рисуем след
-        for i, pos in enumerate(self.trail):
-            alpha = int(255 * (i / len(self.trail)))
-            color = (*self.color, alpha)
-            pygame.draw.circle(screen, self.color, pos, self.radius // 2)
-        # Рисуем сам снаряд
-        pygame.draw.circle(screen, self.color, (int(self.x), int(self.y)), self.radius)
+            return None
+        x = self.prev_x + (self.x - self.prev_x) * alpha
+        y = self.prev_y + (self.y - self.prev_y) * alpha
+        return pygame.draw.circle(screen, self.color, (int(x), int(y)), self.radius)
+
+    def trail_points(self):
+        """Точки следа от самой старой к самой новой"""
+        if self.trail_size < TRAIL_LENGTH:
+            return self.trail[:self.trail_size]
+        return self.trail[self.trail_head:] + self.trail[:self.trail_head]
 
     def get_momentum(self):
         """Возвращает импульс снаряда"""
@@ -221,10 +396,16 @@ class Projectile:
 
 class Zombie:
     """Класс зомби"""
-    def __init__(self, x, y, terrain, zombie_type="normal"):
+    __slots__ = ('x', 'y', 'prev_x', 'prev_y', 'terrain', 'clock', 'type', 'speed', 'max_health',
+                 'color', 'size', 'health', 'animation_offset', 'active')
+
+    def __init__(self, x, y, terrain, clock, rng, zombie_type="normal"):
         self.x = x
         self.y = y
+        self.prev_x = x
+        self.prev_y = y
         self.terrain = terrain
+        self.clock = clock
         self.type = zombie_type
         
         if self.type == "normal":
@@ -239,7 +420,7 @@ class Zombie:
             self.size = 25
         
         self.health = self.max_health
-        self.animation_offset = random.uniform(0, math.pi * 2)
+        self.animation_offset = rng.uniform(0, math.pi * 2)
         self.active = True
 
     def update(self, cannon_x):
@@ -247,6 +428,8 @@ class Zombie:
         if not self.active:
             return
         
+        self.prev_x, self.prev_y = self.x, self.y
+
         # Движение по горизонтали
         if self.x > cannon_x:
             self.x -= self.speed * TIME_STEP
@@ -256,31 +439,45 @@ class Zombie:
         # Следование за рельефом
         self.y = self.terrain.get_height_at(self.x) - self.size
 
-    def draw(self, screen):
-        """Рисует зомби с анимацией ходьбы"""
+    @staticmethod
+    def build_atlas():
+        """Атлас тел зомби: ключ - (цвет, размер), опорная точка - центр тела"""
+        looks = [(ZOMBIE_COLOR, 20), (ARMORED_ZOMBIE_COLOR, 25)]
+        cell = 2 * max(size for _, size in looks) + 2
+        return SpriteAtlas(looks, (cell, cell), (cell // 2, cell // 2), Zombie.paint)
+
+    @staticmethod
+    def paint(surface, look, anchor):
+        """Рисует тело с глазами для атласа"""
+        color, size = look
+        x, y = anchor
+        pygame.draw.circle(surface, color, (x, y), size)
+        pygame.draw.circle(surface, RED, (x - 7, y - 5), 3)
+        pygame.draw.circle(surface, RED, (x + 7, y - 5), 3)
+
+    def draw(self, screen, sprites, alpha=1.0):
+        """Рисует зомби с анимацией ходьбы в положении между двумя шагами физики"""
         if not self.active:
-            return
-        
-        # Анимация "покачивания"
-        wobble = math.sin(pygame.time.get_ticks() * 0.005 + self.animation_offset) * 3
-        draw_y = self.y + wobble
+            return None
         
-        # Тело
-        pygame.draw.circle(screen, self.color, (int(self.x), int(draw_y)), self.size)
-        # Глаза
-        eye_y = draw_y - 5
-        pygame.draw.circle(screen, RED, (int(self.x - 7), int(eye_y)), 3)
-        pygame.draw.circle(screen, RED, (int(self.x + 7), int(eye_y)), 3)
+        x = self.prev_x + (self.x - self.prev_x) * alpha
+        y = self.prev_y + (self.y - self.prev_y) * alpha
+
+        # Анимация "покачивания": тело из атласа просто сдвигается
+        wobble = math.sin(self.clock.get_ticks() * 0.005 + self.animation_offset) * 3
+        draw_y = y + wobble
+        rect = sprites.blit(screen, (self.color, self.size), (x, draw_y))
         
         # Полоска здоровья
         bar_width = 40
         bar_height = 5
-        bar_x = self.x - bar_width // 2
+        bar_x = x - bar_width // 2
         bar_y = draw_y - self.size - 10
         health_percentage = self.health / self.max_health
         
-        pygame.draw.rect(screen, RED, (bar_x, bar_y, bar_width, bar_height))
+        rect.union_ip(pygame.draw.rect(screen, RED, (bar_x, bar_y, bar_width, bar_height)))
         pygame.draw.rect(screen, GREEN, (bar_x, bar_y, bar_width * health_percentage, bar_height))
+        return rect
 
     def take_damage(self, damage):
         """Наносит урон зомби"""
@@ -290,112 +487,213 @@ class Zombie:
 
 
 class Garden:
-    """Класс для огорода"""
-    def __init__(self, start_x, start_y):
+    """Класс для огорода.
+
+    Созревание идет по событиям: мин-куча хранит ближайшую смену ступени
+    для каждой группы грядок, посаженных одним вызовом plant() (они растут
+    одновременно). update() достает только наступившие события - O(log n)
+    на событие, а в кадр без событий это одна проверка вершины кучи.
+    Грядки нарисованы в отдельный слой, и перерисовываются только те, что
+    сменили ступень.
+    """
+    KEY = (255, 0, 255)  # Прозрачный цвет слоя (промежутки между грядками)
+
+    def __init__(self, start_x, start_y, clock, rng, rows=GARDEN_ROWS, cols=GARDEN_COLS):
         self.plots = []
         self.start_x = start_x
         self.start_y = start_y
-        self.init_plots()
-
-    def init_plots(self):
-        for row in range(GARDEN_ROWS):
-            for col in range(GARDEN_COLS):
+        self.clock = clock
+        self.rng = rng
+        self.init_plots(rows, cols)
+        self.events = []  # Мин-куча (время, ступень, номер посадки, номера грядок)
+        self.sowings = 0  # Счетчик посадок: различает события с одинаковым временем
+        self.empty = list(range(len(self.plots)))  # Номера пустых грядок
+        self.ready = []  # Номера созревших грядок
+        self.rect = self.plots[0]['rect'].unionall([plot['rect'] for plot in self.plots])
+        self.surface = None  # Слой с грядками, строится при первой отрисовке
+        self.changed = set()  # Грядки, которые нужно перерисовать в слое
+
+    def init_plots(self, rows, cols):
+        for row in range(rows):
+            for col in range(cols):
                 x = self.start_x + col * (PLOT_SIZE + 10)
                 y = self.start_y + row * (PLOT_SIZE + 10)
                 self.plots.append({
                     'rect': pygame.Rect(x, y, PLOT_SIZE, PLOT_SIZE),
                     'growth_time': 0,
+                    'stage': 0,
                     'is_growing': False,
                     'is_ready': False,
-                    'type': random.choice(['cabbage', 'carrot'])
+                    'type': self.rng.choice(['cabbage', 'carrot'])
                 })
 
     def plant(self):
         """Начинает выращивать на пустых грядках"""
-        for plot in self.plots:
-            if not plot['is_growing'] and not plot['is_ready']:
-                plot['is_growing'] = True
-                plot['growth_time'] = pygame.time.get_ticks()
+        if not self.empty:
+            return
+        now = self.clock.get_ticks()
+        for i in self.empty:
+            plot = self.plots[i]
+            plot['is_growing'] = True
+            plot['growth_time'] = now
+            plot['stage'] = 0
+        self.sowings += 1
+        heapq.heappush(self.events, (now + GROWTH_TIME // GROWTH_STAGES, 1, self.sowings, self.empty))
+        self.changed.update(self.empty)
+        self.empty = []
 
     def update(self):
-        """Обновляет состояние грядок"""
-        current_time = pygame.time.get_ticks()
-        for plot in self.plots:
-            if plot['is_growing'] and not plot['is_ready']:
-                if current_time - plot['growth_time'] > GROWTH_TIME:
+        """Применяет наступившие события созревания"""
+        events = self.events
+        if not events:
+            return
+        current_time = self.clock.get_ticks()
+        # Грядка созревает, когда прошло строго больше GROWTH_TIME
+        while events and events[0][0] < current_time:
+            _, stage, sowing, plots = heapq.heappop(events)
+            ripe = stage == GROWTH_STAGES
+            for i in plots:
+                plot = self.plots[i]
+                plot['stage'] = stage
+                if ripe:
                     plot['is_ready'] = True
                     plot['is_growing'] = False
+            self.changed.update(plots)
+            if ripe:
+                self.ready += plots
+            else:
+                due = self.plots[plots[0]]['growth_time'] + GROWTH_TIME * (stage + 1) // GROWTH_STAGES
+                heapq.heappush(events, (due, stage + 1, sowing, plots))
 
     def harvest(self):
         """Собирает готовый урожай"""
         harvested = {'cabbage': 0, 'carrot': 0}
-        for plot in self.plots:
-            if plot['is_ready']:
-                harvested[plot['type']] += 1
-                plot['is_ready'] = False
+        for i in self.ready:
+            plot = self.plots[i]
+            harvested[plot['type']] += 1
+            plot['is_ready'] = False
+            plot['stage'] = 0
+            self.changed.add(i)
+        self.empty.extend(self.ready)
+        self.ready.clear()
         return harvested
 
-    def draw(self, screen):
-        """Рисует огород"""
-        font = pygame.font.Font(None, 20)
-        for plot in self.plots:
-            # Рисуем грядку
-            color = BROWN
-            if plot['is_growing']:
-                progress = (pygame.time.get_ticks() - plot['growth_time']) / GROWTH_TIME
-                color = (int(139 * (1 - progress)), int(69 + 50 * progress), int(19 * (1 - progress)))
-            elif plot['is_ready']:
-                color = YELLOW if plot['type'] == 'cabbage' else ORANGE
-            
-            pygame.draw.rect(screen, color, plot['rect'])
-            pygame.draw.rect(screen, BLACK, plot['rect'], 2)
-            
-            # Подпись
-            label = "C" if plot['type'] == 'cabbage' else "M"
-            text = font.render(label, True, WHITE)
-            text_rect = text.get_rect(center=plot['rect'].center)
-            screen.blit(text, text_rect)
+    def plot_color(self, plot):
+        if plot['is_growing']:
+            progress = plot['stage'] / GROWTH_STAGES
+            return (int(139 * (1 - progress)), int(69 + 50 * progress), int(19 * (1 - progress)))
+        if plot['is_ready']:
+            return YELLOW if plot['type'] == 'cabbage' else ORANGE
+        return BROWN
+
+    def draw_plot(self, plot, text_cache, font):
+        """Рисует грядку в слой"""
+        rect = plot['rect'].move(-self.rect.x, -self.rect.y)
+        pygame.draw.rect(self.surface, self.plot_color(plot), rect)
+        pygame.draw.rect(self.surface, BLACK, rect, 2)
+        
+        # Подпись
+        label = "C" if plot['type'] == 'cabbage' else "M"
+        text = text_cache.render(font, label, WHITE)
+        self.surface.blit(text, text.get_rect(center=rect.center))
+
+    def draw(self, screen, text_cache, font):
+        """Рисует огород и возвращает занятый им прямоугольник"""
+        if self.surface is None:
+            self.surface = pygame.Surface(self.rect.size)
+            if pygame.display.get_surface() is not None:
+                self.surface = self.surface.convert()
+            self.surface.fill(self.KEY)
+            self.surface.set_colorkey(self.KEY)
+            self.changed = set(range(len(self.plots)))
+        for i in self.changed:
+            self.draw_plot(self.plots[i], text_cache, font)
+        self.changed.clear()
+        return screen.blit(self.surface, self.rect)
 
 
 class Game:
     """Основной класс игры"""
-    def __init__(self):
-        pygame.init()
-        self.screen = pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT))
-        pygame.display.set_caption("Кролики против Зомби")
-        self.clock = pygame.time.Clock()
-        self.font = pygame.font.Font(None, 36)
-        self.small_font = pygame.font.Font(None, 24)
+    def __init__(self, headless=False, seed=None, clock=None, events=None, dirty_rects=False,
+                 profile_csv=None):
+        """seed задает генератор случайных чисел партии, clock - часы для темпа
+        кадров (по умолчанию реальное время), events - источник ввода
+        (по умолчанию очередь событий pygame). dirty_rects включает вывод
+        кадра по грязным прямоугольникам вместо полного flip, profile_csv -
+        запись времени фаз каждого кадра в CSV.
+        """
+        self.headless = headless
+        if headless:
+            # Без окна и без звука: нужен только шрифт для необязательного рендера
+            os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+            pygame.font.init()
+            self.screen = pygame.Surface((SCREEN_WIDTH, SCREEN_HEIGHT))
+        else:
+            pygame.init()
+            self.screen = pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT))
+            pygame.display.set_caption("Кролики против Зомби")
+        self.rng = random.Random(seed)
+        self.clock = clock or WallClock()
+        self.input = events or PygameInput()
+        self.sim_clock = SimClock()
+        self.frame = 0
+        self.mouse_pos = (0, 0)
+        self.fonts = FontRegistry()
+        self.text = TextCache()
+        self.font = self.fonts.get(None, 36)
+        self.small_font = self.fonts.get(None, 24)
+        self.label_font = self.fonts.get(None, 20)
+        self.projectile_pool = ObjectPool(Projectile)
+        self.zombie_pool = ObjectPool(Zombie)
+        self.trails = TrailRenderer()
+        self.zombie_sprites = Zombie.build_atlas()
+        self.dirty = DirtyRenderer() if dirty_rects else None
+        self.profiler = FrameProfiler(csv_path=profile_csv)
         self.running = True
         self.reset_game()
 
     def reset_game(self):
         """Сбрасывает игру в начальное состояние"""
         self.terrain = Terrain(SCREEN_WIDTH, SCREEN_HEIGHT, SCREEN_HEIGHT - 150)
+        self.invalidate_background()
         cannon_y = self.terrain.get_height_at(100) - 30
-        self.cannon = Cannon(100, cannon_y)
+        self.cannon = Cannon(100, cannon_y, self.sim_clock)
         self.projectiles = []
         self.zombies = []
+        self.zombie_grid = SpatialGrid(GRID_CELL_SIZE)
         self.zombie_spawn_timer = 0
         self.zombie_spawn_delay = 3000  # Спавн зомби каждые 3 секунды
 
         self.inventory = {'cabbage': 10, 'carrot': 5}
-        self.garden = Garden(SCREEN_WIDTH - 250, 50)
+        self.garden = Garden(SCREEN_WIDTH - 250, 50, self.sim_clock, self.rng)
         
         self.game_over = False
 
+    def invalidate_background(self):
+        """Небо и земля будут перерисованы в фоновый слой при следующем кадре"""
+        self.background = None
+        if self.dirty is not None:
+            self.dirty.invalidate()
+
+    def build_background(self):
+        """Рисует неподвижный фон (небо и землю) один раз в отдельный слой"""
+        self.background = pygame.Surface(self.screen.get_size(), 0, self.screen)
+        self.terrain.draw(self.background)
+
     def spawn_zombie(self):
         """Создает нового зомби"""
         x = SCREEN_WIDTH - 50
         y = self.terrain.get_height_at(x)
-        zombie_type = "armored" if random.random() < 0.3 else "normal"
-        self.zombies.append(Zombie(x, y, self.terrain, zombie_type))
+        zombie_type = "armored" if self.rng.random() < 0.3 else "normal"
+        self.zombies.append(self.zombie_pool.acquire(x, y, self.terrain, self.sim_clock, self.rng, zombie_type))
 
-    def handle_events(self):
-        """Обрабатывает события"""
-        for event in pygame.event.get():
+    def handle_events(self, events):
+        """Обрабатывает события (из очереди pygame или из сценария)"""
+        for event in events:
             if event.type == pygame.QUIT:
                 self.running = False
+            if event.type == pygame.MOUSEMOTION:
+                self.mouse_pos = event.pos
             if event.type == pygame.KEYDOWN:
                 if event.key == pygame.K_SPACE:
                     harvested = self.garden.harvest()
@@ -404,19 +702,21 @@ class Game:
                     self.garden.plant() # Сразу сажаем новое
                 if event.key == pygame.K_r:
                     self.reset_game()
+                if event.key == pygame.K_a:
+                    self.cannon.aim_assist = not self.cannon.aim_assist
+                if event.key == pygame.K_F3:
+                    self.profiler.toggle()
 
             if event.type == pygame.MOUSEBUTTONDOWN and not self.game_over:
-                mouse_pos = pygame.mouse.get_pos()
+                self.mouse_pos = event.pos
                 barrel_end_x, barrel_end_y = self.cannon.get_barrel_end()
-                
-                # Начальная скорость снаряда
-                initial_speed = 800
+                initial_speed = PROJECTILE_SPEED
                 
                 if event.button == 1:  # Левая кнопка - капуста
                     if self.inventory['cabbage'] > 0:
                         self.projectiles.append(
-                            Projectile(barrel_end_x, barrel_end_y, self.cannon.angle, initial_speed,
-                                       CABBAGE_MASS, CABBAGE_RADIUS, CABBAGE_COLOR, CABBAGE_DAMAGE_COEFF)
+                            self.projectile_pool.acquire(barrel_end_x, barrel_end_y, self.cannon.angle, initial_speed,
+                                                         CABBAGE_MASS, CABBAGE_RADIUS, CABBAGE_COLOR, CABBAGE_DAMAGE_COEFF)
                         )
                         self.inventory['cabbage'] -= 1
                         self.garden.plant()
@@ -424,11 +724,11 @@ class Game:
                 elif event.button == 3:  # Правая кнопка - морковь
                     if self.inventory['carrot'] > 0:
                         for i in range(CARROT_COUNT):
-                            spread_angle_rad = math.radians(random.uniform(-CARROT_SPREAD_ANGLE, CARROT_SPREAD_ANGLE))
+                            spread_angle_rad = math.radians(self.rng.uniform(-CARROT_SPREAD_ANGLE, CARROT_SPREAD_ANGLE))
                             angle = self.cannon.angle + spread_angle_rad
                             self.projectiles.append(
-                                Projectile(barrel_end_x, barrel_end_y, angle, initial_speed * random.uniform(0.9, 1.1),
-                                           CARROT_MASS, CARROT_RADIUS, CARROT_COLOR, CARROT_DAMAGE_COEFF)
+                                self.projectile_pool.acquire(barrel_end_x, barrel_end_y, angle, initial_speed * self.rng.uniform(0.9, 1.1),
+                                                             CARROT_MASS, CARROT_RADIUS, CARROT_COLOR, CARROT_DAMAGE_COEFF)
                             )
                         self.inventory['carrot'] -= 1
                         self.garden.plant()
@@ -437,90 +737,156 @@ class Game:
         """Обновляет состояние всех объектов игры"""
         if self.game_over:
             return
+        profiler = self.profiler
 
-        mouse_pos = pygame.mouse.get_pos()
-        self.cannon.update(mouse_pos)
+        self.cannon.update(self.mouse_pos)
+        profiler.lap('aim')
 
         # Обновление снарядов
         for proj in self.projectiles[:]:
             proj.update(self.terrain)
             if not proj.active:
                 self.projectiles.remove(proj)
+                self.projectile_pool.release(proj)
+        profiler.lap('projectiles')
 
-        # Обновление зомби
+        # Обновление зомби (заодно заполняем сетку броадфазы)
+        self.zombie_grid.clear()
         for zombie in self.zombies[:]:
             zombie.update(self.cannon.x)
             if not zombie.active:
                 self.zombies.remove(zombie)
+                self.zombie_pool.release(zombie)
+                continue
             elif abs(zombie.x - self.cannon.x) < 30: # Зомби добрался до пушки
                 self.game_over = True
+            self.zombie_grid.insert(zombie)
+        profiler.lap('zombies')
 
-        # Проверка столкновений
-        for proj in self.projectiles[:]:
+        # Проверка столкновений: только зомби из соседних ячеек сетки
+        for proj in self.projectiles:
             if not proj.active:
                 continue
-            for zombie in self.zombies:
-                if not zombie.active:
-                    continue
-                dist = math.sqrt((proj.x - zombie.x)**2 + (proj.y - zombie.y)**2)
-                if dist < proj.radius + zombie.size:
-                    damage = proj.get_damage()
-                    zombie.take_damage(damage)
-                    proj.active = False # Снаряд исчезает при попадании
-                    break
+            zombie = self.zombie_grid.first_hit(proj)
+            if zombie is not None:
+                damage = proj.get_damage()
+                zombie.take_damage(damage)
+                proj.active = False # Снаряд исчезает при попадании
+        profiler.lap('collisions')
 
         # Спавн зомби
-        current_time = pygame.time.get_ticks()
+        current_time = self.sim_clock.get_ticks()
         if current_time - self.zombie_spawn_timer > self.zombie_spawn_delay:
             self.spawn_zombie()
             self.zombie_spawn_timer = current_time
             # Увеличиваем сложность
             self.zombie_spawn_delay = max(1000, self.zombie_spawn_delay - 10)
+        profiler.lap('zombies')
 
         # Обновление огорода
         self.garden.update()
-
-    def draw(self):
-        """Отрисовывает все объекты на экране"""
-        self.terrain.draw(self.screen)
-        self.cannon.draw(self.screen)
+        profiler.lap('garden')
+
+    def draw(self, alpha=1.0):
+        """Отрисовывает все объекты на экране.
+
+        alpha - доля шага физики, накопленная после последнего update():
+        движущиеся объекты рисуются между прошлым и текущим состоянием.
+        Возвращает прямоугольники, задетые всем, что нарисовано поверх фона.
+        """
+        if self.background is None:
+            self.build_background()
+        if self.dirty is not None:
+            self.dirty.restore(self.screen, self.background)
+        else:
+            self.screen.blit(self.background, (0, 0))
+        rects = [self.cannon.draw(self.screen, alpha)]
         
+        rects += self.trails.draw(self.screen, self.projectiles, rects=self.dirty is not None)
         for proj in self.projectiles:
-            proj.draw(self.screen)
+            rects.append(proj.draw(self.screen, alpha))
             
         for zombie in self.zombies:
-            zombie.draw(self.screen)
+            rects.append(zombie.draw(self.screen, self.zombie_sprites, alpha))
 
         # UI
-        self.garden.draw(self.screen)
+        rects.append(self.garden.draw(self.screen, self.text, self.label_font))
         
         # Инвентарь
-        inv_text = self.font.render(f"Капуста: {self.inventory['cabbage']}  Морковь: {self.inventory['carrot']}", True, BLACK)
-        self.screen.blit(inv_text, (10, 10))
+        inv_text = self.text.render(self.font, f"Капуста: {self.inventory['cabbage']}  Морковь: {self.inventory['carrot']}", BLACK)
+        rects.append(self.screen.blit(inv_text, (10, 10)))
         
         # Подсказка
-        hint_text = self.small_font.render("ЛКМ - Капуста | ПКМ - Морковь | Пробел - Собрать урожай | R - Рестарт", True, BLACK)
-        self.screen.blit(hint_text, (10, 50))
+        hint_text = self.text.render(self.small_font, "ЛКМ - Капуста | ПКМ - Морковь | Пробел - Собрать урожай | A - Автоприцел | R - Рестарт", BLACK)
+        rects.append(self.screen.blit(hint_text, (10, 50)))
 
         if self.game_over:
-            game_over_text = self.font.render("ЗОМБИ СЪЕЛИ КРОЛИКА! Нажмите R для перезапуска.", True, RED)
+            game_over_text = self.text.render(self.font, "ЗОМБИ СЪЕЛИ КРОЛИКА! Нажмите R для перезапуска.", RED)
             text_rect = game_over_text.get_rect(center=(SCREEN_WIDTH/2, SCREEN_HEIGHT/2))
-            pygame.draw.rect(self.screen, WHITE, text_rect.inflate(20, 10))
+            rects.append(pygame.draw.rect(self.screen, WHITE, text_rect.inflate(20, 10)))
             self.screen.blit(game_over_text, text_rect)
 
-
-        pygame.display.flip()
+        # Профилировщик кадра (F3)
+        rects.append(self.profiler.draw(self.screen, self.label_font))
+        return rects
+
+    def step(self, n=1, script=None):
+        """Продвигает симуляцию на n шагов физики без окна и реального времени.
+
+        script - необязательный источник ввода с методом events_for(frame),
+        например InputLog из rvz.replay.
+        Возвращает False, если игра была закрыта событием QUIT.
+        """
+        for _ in range(n):
+            if not self.running:
+                break
+            if script is not None:
+                self.handle_events(script.events_for(self.frame))
+            self.update()
+            self.sim_clock.advance(TIME_STEP)
+            self.frame += 1
+        return self.running
 
     def run(self):
-        """Главный игровой цикл"""
+        """Главный игровой цикл с фиксированным шагом физики.
+
+        Реальное время кадров копится в аккумуляторе и расходуется целыми
+        шагами TIME_STEP, поэтому скорость игры не зависит от частоты кадров.
+        Остаток аккумулятора задает интерполяцию при рендере. За кадр
+        выполняется не больше MAX_SUBSTEPS шагов: если машина не успевает
+        и за ними, игра замедляется, а не копит отставание бесконечно.
+        Время фаз всех шагов кадра складывается в профилировщике.
+        """
+        profiler = self.profiler
+        accumulator = 0.0
         while self.running:
-            self.handle_events()
-            self.update()
-            self.draw()
-            self.clock.tick(FPS)
+            frame_time = self.clock.tick(RENDER_FPS) / 1000
+            profiler.begin()
+            accumulator = min(accumulator + frame_time, MAX_SUBSTEPS * TIME_STEP)
+            while accumulator >= TIME_STEP and self.running:
+                # Ввод читается перед каждым шагом: номер кадра в журнале - номер шага физики
+                self.handle_events(self.input.events_for(self.frame))
+                profiler.lap('events')
+                self.update()
+                self.sim_clock.advance(TIME_STEP)
+                self.frame += 1
+                accumulator -= TIME_STEP
+            rects = self.draw(accumulator / TIME_STEP)
+            if self.dirty is not None:
+                self.dirty.present(rects)
+            else:
+                pygame.display.flip()
+            profiler.lap('render')
+            profiler.end()
         
         pygame.quit()
 
 if __name__ == '__main__':
-    game = Game()
-    game.run()
\ No newline at end of file
+    session = Session.from_argv()
+    game = Game(seed=session.seed, clock=session.clock, events=session.input,
+                dirty_rects='--dirty-rects' in sys.argv[1:], profile_csv=csv_path_from_argv())
+    try:
+        game.run()
+    finally:
+        game.profiler.close()
+        session.close()
\ No newline at end of file
@@ -1,6 +1,12 @@
-import time
+import argparse
+import asyncio
+import heapq
 import random
 import math
+import sys
+import threading
+
+from rvz.pool import ObjectPool
 
 # Константы
 GRAVITY = 9.8  # м/с²
@@ -9,6 +15,16 @@ TIME_STEP = 0.1  # Шаг симуляции времени
 FIELD_WIDTH = 100  # Ширина поля (м)
 HILL_HEIGHT = 10  # Максимальная высота холма
 
+# Темп игры (секунды реального или, в быстром режиме, виртуального времени)
+TURN_TIME = 2.0  # Ход: рост огорода, погода, зомби
+FLIGHT_FRAME_TIME = 0.1  # Кадр анимации полёта
+FLIGHT_FRAME_STEPS = 5  # Шагов симуляции на кадр анимации
+SCRIPT_COMMAND_TIME = 2.0  # Команды из сценария подаются раз в ход
+
+# Таблица точек падения
+IMPACT_ANGLE_STEP = 0.1  # Шаг сетки углов, градусы
+IMPACT_MAX_GAP = 0.1  # Соседние углы падают дальше друг от друга (м) - считаем точно
+
 class Rabbit:
     def __init__(self, type):
         self.type = type
@@ -54,6 +70,8 @@ class Garden:
         return False
 
 class Zombie:
+    __slots__ = ('type', 'hp', 'speed', 'armor', 'position')
+
     def __init__(self, type, position):
         self.type = type
         if type == "normal":
@@ -102,7 +120,14 @@ class Cannon:
         self.angle += oscillation
         print(f"Пушка колеблется: текущий угол {self.angle:.1f}°")
 
-    def shoot(self, proj_type, landscape):
+    def shoot(self, proj_type, landscape, animate=False):
+        """Считает полёт снаряда целиком; анимацию проигрывает Game.flight.
+
+        Точка падения и число кадров полёта берутся из таблицы. Только если
+        полёт будет показан (animate), траектория интегрируется заново: её
+        точки нужны для кадров, а падение берется из неё же, чтобы
+        совпадало с показанным.
+        """
         if proj_type == "cabbage":
             mass = 2  # кг
             aoe = False
@@ -112,116 +137,391 @@ class Cannon:
         else:
             return None
 
-        vx = self.speed * math.cos(math.radians(self.angle))
-        vy = self.speed * math.sin(math.radians(self.angle))
-        x, y = 0, landscape[0]  # Старт с позиции кролика (на холме)
-        trajectory = []
+        if animate:
+            trajectory = []
+            impact_x, impact_speed, frames = fly(self.angle, self.speed, landscape, trajectory)
+            points = trajectory[::FLIGHT_FRAME_STEPS]
+        else:
+            # Без анимации хватает таблицы для скорости пушки, интегрировать не нужно
+            impact_x, impact_speed, frames = impact_table(self.speed, landscape).impact(self.angle)
+            points = None
+        return {"type": proj_type, "impact_x": impact_x, "impact_speed": impact_speed, "mass": mass, "aoe": aoe,
+                "frames": frames, "points": points}
+
+def fly(angle, speed, landscape, trajectory=None):
+    """Интегрирует полёт снаряда с сопротивлением воздуха до падения.
+
+    Возвращает (x падения, скорость при падении, число кадров анимации);
+    если передан список trajectory, в него добавляются точки траектории.
+    """
+    vx = speed * math.cos(math.radians(angle))
+    vy = speed * math.sin(math.radians(angle))
+    x, y = 0, landscape[0]  # Старт с позиции кролика (на холме)
+    steps = 0
 
-        while y >= 0 and x < FIELD_WIDTH:
+    while y >= 0 and x < FIELD_WIDTH:
+        steps += 1
+        if trajectory is not None:
             trajectory.append((x, y))
-            # Симуляция с drag
-            drag_x = -DRAG_COEFF * vx**2 if vx > 0 else DRAG_COEFF * vx**2
-            drag_y = -DRAG_COEFF * vy**2 if vy > 0 else DRAG_COEFF * vy**2
-            vx += drag_x * TIME_STEP
-            vy += (drag_y - GRAVITY) * TIME_STEP
-            x += vx * TIME_STEP
-            y += vy * TIME_STEP
-            # Учёт ландшафта
-            hill_y = landscape[int(x) % len(landscape)]
-            if y <= hill_y:
-                y = hill_y
-                break
+        # Симуляция с drag
+        drag_x = -DRAG_COEFF * vx**2 if vx > 0 else DRAG_COEFF * vx**2
+        drag_y = -DRAG_COEFF * vy**2 if vy > 0 else DRAG_COEFF * vy**2
+        vx += drag_x * TIME_STEP
+        vy += (drag_y - GRAVITY) * TIME_STEP
+        x += vx * TIME_STEP
+        y += vy * TIME_STEP
+        # Учёт ландшафта
+        hill_y = landscape[int(x) % len(landscape)]
+        if y <= hill_y:
+            y = hill_y
+            break
 
-        # Анимация полёта
-        for tx, ty in trajectory[::5]:  # Каждый 5-й шаг для скорости
-            print(f"Снаряд летит: x={tx:.1f}, y={ty:.1f} {'↑' if vy > 0 else '↓'}")
-            time.sleep(0.1)
+    return x, math.sqrt(vx**2 + vy**2), math.ceil(steps / FLIGHT_FRAME_STEPS)
 
-        print(f"Попадание на x={x:.1f}m!")
-        return {"type": proj_type, "impact_x": x, "impact_speed": math.sqrt(vx**2 + vy**2), "mass": mass, "aoe": aoe}
+class ImpactTable:
+    """Точки падения для всех углов сетки при одной скорости пушки.
 
-# Главная функция игры
-def main():
-    print("Добро пожаловать в 'Кролики против зомби'!")
-    rabbit_type = input("Выберите кролика (speedy, strong, farmer): ").lower()
-    rabbit = Rabbit(rabbit_type)
-    garden = Garden(rabbit.garden_growth_rate)
-    cannon = Cannon(rabbit.cannon_speed, rabbit.cannon_reload_time)
-    zombies = []
-    wave = 1
-    score = 0
-    landscape = [math.sin(i / 10) * HILL_HEIGHT for i in range(FIELD_WIDTH)]  # Холмистый ландшафт
-
-    while True:
-        # Обновление состояния
-        garden.update()
-        cannon.update_aim()
-        garden.weather = random.choice(["normal", "rain", "drought"]) if random.random() < 0.1 else garden.weather
-        print(f"\nХод {wave}. Погода: {garden.weather}. Счёт: {score}")
+    Полёт зависит только от угла, скорости и ландшафта (тип снаряда влияет
+    лишь на урон), поэтому траектории считаются один раз для углов
+    0..360° с шагом IMPACT_ANGLE_STEP, а выстрел интерполирует двух соседей.
+    Где точка падения скачком меняется между соседними углами (снаряд
+    задевает вершину холма) или у соседей разное число кадров полёта,
+    интерполяция неверна, и такой выстрел считается точно через fly().
+    """
+    def __init__(self, speed, landscape):
+        self.speed = speed
+        self.landscape = list(landscape)
+        self.size = round(360 / IMPACT_ANGLE_STEP)
+        self.impacts = [fly(i * IMPACT_ANGLE_STEP, speed, self.landscape) for i in range(self.size)]
+
+    def matches(self, landscape):
+        """Построена ли таблица для этого ландшафта"""
+        return self.landscape == landscape
+
+    def impact(self, angle):
+        """(x падения, скорость при падении, число кадров) для выстрела под углом angle"""
+        k = (angle % 360) / IMPACT_ANGLE_STEP
+        i = int(k)
+        x0, speed0, frames0 = self.impacts[i % self.size]
+        x1, speed1, frames1 = self.impacts[(i + 1) % self.size]
+        if abs(x1 - x0) > IMPACT_MAX_GAP or frames0 != frames1:
+            return fly(angle, self.speed, self.landscape)
+        t = k - i
+        return x0 + (x1 - x0) * t, speed0 + (speed1 - speed0) * t, frames0
+
+    def sweep(self):
+        """Все углы сетки разом: список (угол, x падения, скорость при падении)"""
+        return [(i * IMPACT_ANGLE_STEP, x, speed) for i, (x, speed, _) in enumerate(self.impacts)]
+
+IMPACT_TABLES = {}  # Скорость пушки -> ImpactTable
+
+def impact_table(speed, landscape):
+    """Таблица для скорости пушки; перестраивается, если ландшафт изменился"""
+    table = IMPACT_TABLES.get(speed)
+    if table is None or not table.matches(landscape):
+        table = IMPACT_TABLES[speed] = ImpactTable(speed, landscape)
+    return table
+
+class RealClock:
+    """Реальное время: задачи ждут через asyncio.sleep"""
+    animated = True  # Полёт снарядов показывается по кадрам
+    async def sleep(self, seconds):
+        await asyncio.sleep(seconds)
+
+    def track(self, task):
+        return task
+
+class VirtualClock:
+    """Виртуальное время для быстрого режима без пауз.
+
+    sleep() не ждёт, а ставит задачу в очередь по времени пробуждения;
+    run() будит задачи строго по этому времени (при равенстве - в порядке
+    вызова), поэтому партия по сценарию идёт так же, как в реальном
+    времени, только мгновенно и всегда одинаково при одном seed.
+
+    Время двигается, только когда все задачи игры, отданные в track(),
+    спят на этих часах или завершились: сколько бы переходов (новых задач,
+    очередей) ни было у разбуженной задачи до следующего sleep, время ее
+    дождется.
+    """
+    animated = False  # Кадры полёта мгновенны - траектория не печатается
+
+    def __init__(self):
+        self.now = 0.0
+        self.queue = []  # (время пробуждения, номер вызова, future, задача)
+        self.calls = 0
+        self.tasks = set()  # Задачи игры, которых ждут часы
+        self.asleep = set()  # Задачи, спящие на часах
+        self.idle = asyncio.Event()  # Все задачи игры спят или завершились
+
+    def track(self, task):
+        """Задача игры: время не двинется, пока она не уснет на часах или не завершится"""
+        self.tasks.add(task)
+        self.idle.clear()
+        task.add_done_callback(self.finished)
+        return task
+
+    def finished(self, task):
+        self.tasks.discard(task)
+        self.asleep.discard(task)
+        self.check()
+
+    def check(self):
+        if self.tasks <= self.asleep:
+            self.idle.set()
+
+    async def sleep(self, seconds):
+        future = asyncio.get_running_loop().create_future()
+        task = asyncio.current_task()
+        if task not in self.tasks:
+            self.track(task)
+        heapq.heappush(self.queue, (self.now + seconds, self.calls, future, task))
+        self.calls += 1
+        self.asleep.add(task)
+        self.check()
+        await future
+
+    async def run(self, done):
+        """Продвигает время, пока не установлено событие done.
+
+        Если будить больше некого, сам устанавливает done: иначе партия
+        ждала бы его вечно.
+        """
+        while True:
+            await self.idle.wait()
+            if done.is_set():
+                return
+            # Снятые задачи в очереди остаются - их пропускаем
+            while self.queue and self.queue[0][2].cancelled():
+                heapq.heappop(self.queue)
+            if not self.queue:
+                done.set()
+                return
+            self.now, _, future, task = heapq.heappop(self.queue)
+            # Разбуженная задача снова работает: ждем, пока она (и всё, что
+            # она запустит) не уснет или не завершится
+            self.asleep.discard(task)
+            self.idle.clear()
+            future.set_result(None)
+
+def read_console(loop, queue):
+    """Читает строки stdin в фоновом потоке и передаёт их в очередь asyncio.
+
+    Поток демонический: незаконченный ввод не мешает выйти из игры.
+    """
+    def reader():
+        try:
+            for line in sys.stdin:
+                loop.call_soon_threadsafe(queue.put_nowait, line)
+            loop.call_soon_threadsafe(queue.put_nowait, None)  # Конец ввода
+        except RuntimeError:
+            pass  # Цикл событий уже закрыт
+    threading.Thread(target=reader, daemon=True).start()
+
+class Game:
+    """Партия, в которой ходы (огород и зомби), ввод и полёты снарядов -
+    отдельные задачи asyncio: выстрел не останавливает зомби, а ввод команды
+    не останавливает игру.
+    """
+    def __init__(self, rabbit_type, clock=None):
+        self.rabbit = Rabbit(rabbit_type)
+        self.garden = Garden(self.rabbit.garden_growth_rate)
+        self.cannon = Cannon(self.rabbit.cannon_speed, self.rabbit.cannon_reload_time)
+        self.clock = clock or RealClock()
+        self.zombies = []
+        self.zombie_pool = ObjectPool(Zombie)
+        self.wave = 1
+        self.turn = 0
+        self.score = 0
+        self.landscape = [math.sin(i / 10) * HILL_HEIGHT for i in range(FIELD_WIDTH)]  # Холмистый ландшафт
+        self.flights = set()
+        self.done = asyncio.Event()
+
+    def stop(self, message=None):
+        if message:
+            print(message)
+        self.done.set()
+
+    def print_status(self):
+        print(f"\nХод {self.wave}. Погода: {self.garden.weather}. Счёт: {self.score}")
         print("Огород:")
-        for i, bed in enumerate(garden.beds):
+        for i, bed in enumerate(self.garden.beds):
             status = "готов" if bed["ready"] else f"{bed['growth']:.1f}%"
             print(f"Грядка {i}: {bed['type']} - {status}")
         print("Зомби:")
-        for z in zombies:
+        for z in self.zombies:
             print(f"{z.type} на {z.position:.1f}m, HP: {z.hp + z.armor}")
-        
-        # Спавн зомби в новой волне
-        if not zombies:
-            print(f"Волна {wave}!")
-            num_zombies = wave + 2
-            for _ in range(num_zombies):
-                z_type = random.choice(["normal", "conehead", "fast", "farmer"])
-                zombies.append(Zombie(z_type, FIELD_WIDTH))
-            wave += 1
-
-        # Движение зомби
+
+    async def turns(self):
+        """Ходы в прежнем порядке: огород и погода, состояние, новая волна, движение зомби"""
+        while True:
+            self.turn += 1
+            self.garden.update()
+            self.cannon.update_aim()
+            self.garden.weather = random.choice(["normal", "rain", "drought"]) if random.random() < 0.1 else self.garden.weather
+            self.print_status()
+
+            # Спавн зомби в новой волне
+            if not self.zombies:
+                print(f"Волна {self.wave}!")
+                num_zombies = self.wave + 2
+                for _ in range(num_zombies):
+                    z_type = random.choice(["normal", "conehead", "fast", "farmer"])
+                    self.zombies.append(self.zombie_pool.acquire(z_type, FIELD_WIDTH))
+                self.wave += 1
+
+            # Движение зомби
+            for z in self.zombies:
+                z.animate_move()
+                if z.move():
+                    self.stop("Зомби добрался до дома! Игра окончена.")
+                    return
+                if random.random() < 0.05 and z.type == "farmer" and z.position < 20:
+                    print(f"{z.type} зомби крадёт овощ!")
+                    self.garden.beds[random.randint(0, len(self.garden.beds)-1)]["growth"] = 0
+            await self.clock.sleep(TURN_TIME)
+
+    async def flight(self, shot):
+        """Полёт снаряда; урон наносится зомби там, где они окажутся к падению.
+
+        Без точек траектории (полёт не показывается) снаряд летит столько
+        же кадров, только молча.
+        """
+        points = shot["points"]
+        if points is None:
+            for _ in range(shot["frames"]):
+                await self.clock.sleep(FLIGHT_FRAME_TIME)
+        else:
+            for i, (tx, ty) in enumerate(points):
+                rising = i + 1 < len(points) and points[i + 1][1] > ty
+                print(f"Снаряд летит: x={tx:.1f}, y={ty:.1f} {'↑' if rising else '↓'}")
+                await self.clock.sleep(FLIGHT_FRAME_TIME)
+        print(f"Попадание на x={shot['impact_x']:.1f}m!")
+        self.hit(shot)
+
+    def hit(self, shot):
+        impact_x = shot["impact_x"]
         to_remove = []
-        for z in zombies:
-            z.animate_move()
-            if z.move():
-                print("Зомби добрался до дома! Игра окончена.")
-                return
-            if random.random() < 0.05 and z.type == "farmer" and z.position < 20:
-                print(f"{z.type} зомби крадёт овощ!")
-                garden.beds[random.randint(0, len(garden.beds)-1)]["growth"] = 0
+        for z in self.zombies:
+            dist = abs(z.position - impact_x)
+            if (shot["aoe"] and dist < 10) or (not shot["aoe"] and dist < 2):
+                damage = shot["mass"] * shot["impact_speed"]  # Урон = импульс
+                z.armor = max(0, z.armor - damage)
+                if z.armor <= 0:
+                    z.hp -= damage
+                print(f"Урон {damage:.1f} зомби {z.type}! HP: {z.hp + z.armor}")
+                if z.hp <= 0:
+                    to_remove.append(z)
+                    self.score += 10
+
+        # Удаление мёртвых зомби
+        for z in to_remove:
+            self.zombies.remove(z)
+            print(f"{z.type} зомби уничтожен!")
+            self.zombie_pool.release(z)
 
-        # Ввод команды
-        cmd = input("\nКоманда (aim <угол>, shoot <cabbage/carrot>, water <грядка>, harvest <cabbage/carrot>, quit): ").split()
+    def execute(self, line):
+        """Выполняет одну команду; возвращает False для quit.
+
+        Неверный аргумент (aim abc, water x) не роняет задачу ввода:
+        команда пропускается с сообщением, и можно вводить следующую.
+        """
+        try:
+            return self.dispatch(line.split())
+        except ValueError:
+            print(f"Неверная команда: {line.strip()}")
+            return True
+
+    def dispatch(self, cmd):
         if not cmd:
-            continue
+            return True
         action = cmd[0]
         if action == "aim" and len(cmd) > 1:
-            cannon.aim(float(cmd[1]))
+            self.cannon.aim(float(cmd[1]))
         elif action == "shoot" and len(cmd) > 1:
             proj_type = cmd[1]
-            if garden.harvest(proj_type):
-                shot = cannon.shoot(proj_type, landscape)
+            if self.garden.harvest(proj_type):
+                shot = self.cannon.shoot(proj_type, self.landscape, self.clock.animated)
                 if shot:
-                    impact_x = shot["impact_x"]
-                    for z in zombies:
-                        dist = abs(z.position - impact_x)
-                        if (shot["aoe"] and dist < 10) or (not shot["aoe"] and dist < 2):
-                            damage = shot["mass"] * shot["impact_speed"]  # Урон = импульс
-                            z.armor = max(0, z.armor - damage)
-                            if z.armor <= 0:
-                                z.hp -= damage
-                            print(f"Урон {damage:.1f} зомби {z.type}! HP: {z.hp + z.armor}")
-                            if z.hp <= 0:
-                                to_remove.append(z)
-                                score += 10
+                    # Полёт идёт отдельной задачей, игра тем временем продолжается
+                    task = self.clock.track(asyncio.create_task(self.flight(shot)))
+                    self.flights.add(task)
+                    task.add_done_callback(self.flights.discard)
         elif action == "water" and len(cmd) > 1:
-            garden.water(int(cmd[1]))
+            self.garden.water(int(cmd[1]))
         elif action == "harvest" and len(cmd) > 1:
-            if garden.harvest(cmd[1]):
+            if self.garden.harvest(cmd[1]):
                 print(f"Собран {cmd[1]} для пушки!")
         elif action == "quit":
-            return
+            return False
+        return True
 
-        # Удаление мёртвых зомби
-        for z in to_remove:
-            zombies.remove(z)
-            print(f"{z.type} зомби уничтожен!")
+    async def console_commands(self):
+        """Команды с консоли, читаемые без блокировки игры"""
+        queue = asyncio.Queue()
+        read_console(asyncio.get_running_loop(), queue)
+        while True:
+            line = await queue.get()
+            if line is None or not self.execute(line):
+                self.stop()
+                return
+
+    async def script_commands(self, lines):
+        """Команды из сценария, по одной за ход; пустая строка пропускает ход.
+
+        Вместо строки может быть функция без аргументов: она вызывается в
+        момент выполнения и возвращает команду по текущему состоянию игры
+        (так играет бот турнира).
+        """
+        for line in lines:
+            await self.clock.sleep(SCRIPT_COMMAND_TIME)
+            if callable(line):
+                line = line()
+            if not self.execute(line):
+                break
+        self.stop()
+
+    async def run(self, commands=None):
+        """Играет до конца партии; commands - строки команд вместо консоли.
+        Возвращает счёт.
+        """
+        # Часы ждут ходы, сценарий и полёты; ввод с консоли от часов не зависит
+        tasks = [self.clock.track(asyncio.create_task(self.turns()))]
+        if commands is None:
+            tasks.append(asyncio.create_task(self.console_commands()))
+        else:
+            tasks.append(self.clock.track(asyncio.create_task(self.script_commands(commands))))
+        if isinstance(self.clock, VirtualClock):
+            tasks.append(asyncio.create_task(self.clock.run(self.done)))
+        await self.done.wait()
+        tasks += self.flights
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        return self.score
+
+# Главная функция игры
+def main(argv=None):
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--script', metavar='PATH', help='команды из файла (первая строка - тип кролика)')
+    parser.add_argument('--fast', action='store_true', help='без пауз, в виртуальном времени')
+    parser.add_argument('--seed', type=int, help='seed генератора случайных чисел')
+    args = parser.parse_args(argv)
+    if args.seed is not None:
+        random.seed(args.seed)
+
+    print("Добро пожаловать в 'Кролики против зомби'!")
+    if args.script:
+        with open(args.script, encoding='utf-8') as f:
+            lines = f.read().splitlines()
+        rabbit_type, commands = lines[0].strip().lower(), lines[1:]
+    else:
+        rabbit_type = input("Выберите кролика (speedy, strong, farmer): ").lower()
+        commands = None
+        print("Команды: aim <угол>, shoot <cabbage/carrot>, water <грядка>, harvest <cabbage/carrot>, quit")
+    game = Game(rabbit_type, VirtualClock() if args.fast else RealClock())
+    score = asyncio.run(game.run(commands))
+    print(f"Итоговый счёт: {score}")
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
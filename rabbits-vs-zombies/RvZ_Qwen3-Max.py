@@ -1,15 +1,14 @@
+import argparse
 import pygame
 import sys
 import math
 import random
 
-# Инициализация
-pygame.init()
+from rvz.pool import ObjectPool
+from rvz.replay import ReplayClock, Session, SimClock
+from rvz.splash import SplashIndex
+
 WIDTH, HEIGHT = 1000, 600
-screen = pygame.display.set_mode((WIDTH, HEIGHT))
-pygame.display.set_caption("Кролики против зомби!")
-clock = pygame.time.Clock()
-font = pygame.font.SysFont(None, 28)
 
 # Цвета
 GREEN = (34, 139, 34)
@@ -25,37 +24,20 @@ BLUE = (70, 130, 180)
 CANNON_X, CANNON_Y = 100, HEIGHT - 100
 CANNON_LENGTH = 60
 
-# Огород
-garden_plots = [
+# Огород: грядки в начале партии
+GARDEN_PLOTS = [
     {"x": 50, "y": HEIGHT - 50, "crop": None, "growth": 0, "max_growth": 300},
     {"x": 120, "y": HEIGHT - 70, "crop": None, "growth": 0, "max_growth": 250},
 ]
-planting_mode = None  # 'cabbage' or 'carrot'
-
-# Ресурсы кролика
-cabbage_count = 0
-carrot_count = 0
-
-# Снаряды
-projectiles = []
-current_ammo = "cabbage"  # or "carrot"
 
 # Зомби
-zombies = []
-zombie_spawn_timer = 0
 zombie_types = [
     {"name": "basic", "hp": 50, "speed": 0.8, "color": RED, "size": 30},
     {"name": "armored", "hp": 100, "speed": 0.5, "color": (100, 100, 120), "size": 35},
 ]
 
-# Игровое состояние
-aiming = False
-aim_start_time = 0
-last_shot_time = 0
-game_time = 0
-
 # Функция для рисования пушки
-def draw_cannon(angle):
+def draw_cannon(screen, angle):
     end_x = CANNON_X + CANNON_LENGTH * math.cos(angle)
     end_y = CANNON_Y - CANNON_LENGTH * math.sin(angle)
     pygame.draw.line(screen, BROWN, (CANNON_X, CANNON_Y), (end_x, end_y), 12)
@@ -63,6 +45,8 @@ def draw_cannon(angle):
 
 # Класс снаряда
 class Projectile:
+    __slots__ = ('x', 'y', 'type', 'vx', 'vy', 'mass', 'radius', 'alive', 'exploded')
+
     def __init__(self, x, y, angle, proj_type):
         self.x = x
         self.y = y
@@ -89,12 +73,14 @@ class Projectile:
         if self.x > WIDTH or self.y > HEIGHT or self.y < 0:
             self.alive = False
 
-    def draw(self):
+    def draw(self, screen):
         color = GREEN if self.type == "cabbage" else ORANGE
         pygame.draw.circle(screen, color, (int(self.x), int(self.y)), self.radius)
 
 # Класс зомби
 class Zombie:
+    __slots__ = ('x', 'y', 'hp', 'max_hp', 'speed', 'color', 'size', 'alive')
+
     def __init__(self, ztype):
         self.x = WIDTH + 50
         self.y = HEIGHT - 100
@@ -111,7 +97,7 @@ class Zombie:
             if self.x < 0:
                 self.alive = False
 
-    def draw(self):
+    def draw(self, screen):
         if self.alive:
             pygame.draw.rect(screen, self.color, (self.x - self.size//2, self.y - self.size//2, self.size, self.size))
             # Полоска здоровья
@@ -126,152 +112,251 @@ def check_collision(proj, zombie):
     distance = math.hypot(dx, dy)
     return distance < (proj.radius + zombie.size // 2)
 
-# Основной цикл
-running = True
-while running:
-    dt = clock.tick(60) / 1000.0
-    game_time += dt
-    mouse_x, mouse_y = pygame.mouse.get_pos()
-
-    # Обработка событий
-    for event in pygame.event.get():
+class Simulation:
+    """Партия без окна: состояние игры, шаг логики и отрисовка на любую поверхность.
+
+    step(dt, inputs) продвигает игру на dt секунд, обработав события pygame
+    из inputs (очередь окна, журнал повтора или сценарий бенчмарка);
+    render(surface) рисует текущее состояние. Ни то ни другое не требует
+    окна и не ждет реального времени.
+    """
+    def __init__(self, seed=None):
+        self.rng = random.Random(seed)
+        self.font = None  # Создается при первом рендере: без него шаг не трогает pygame.font
+
+        # Огород
+        self.garden_plots = [dict(plot) for plot in GARDEN_PLOTS]
+
+        # Ресурсы кролика
+        self.cabbage_count = 0
+        self.carrot_count = 0
+
+        # Снаряды
+        self.projectiles = []
+        self.current_ammo = "cabbage"  # or "carrot"
+
+        # Зомби
+        self.zombies = []
+        self.zombie_spawn_timer = 0
+        self.splash = SplashIndex()  # Зомби по x для взрывов морковки
+
+        # Пулы: снаряды и зомби переиспользуются, а не собираются GC
+        self.projectile_pool = ObjectPool(Projectile)
+        self.zombie_pool = ObjectPool(Zombie)
+
+        # Игровое состояние
+        self.running = True
+        self.aiming = False
+        self.mouse_x, self.mouse_y = 0, 0
+        self.aim_start_time = 0
+        self.game_time = 0
+        self.cannon_angle = 0  # Выстрел в кадре идет под углом, рассчитанным в прошлом кадре
+
+    def handle_event(self, event):
         if event.type == pygame.QUIT:
-            running = False
+            self.running = False
+        elif event.type == pygame.MOUSEMOTION:
+            self.mouse_x, self.mouse_y = event.pos
         elif event.type == pygame.MOUSEBUTTONDOWN:
+            self.mouse_x, self.mouse_y = event.pos
             if event.button == 1:  # ЛКМ — начало прицеливания
-                aiming = True
-                aim_start_time = game_time
+                self.aiming = True
+                self.aim_start_time = self.game_time
             elif event.button == 3:  # ПКМ — выстрел
-                if current_ammo == "cabbage" and cabbage_count > 0:
-                    cabbage_count -= 1
-                    projectiles.append(Projectile(CANNON_X, CANNON_Y, cannon_angle, "cabbage"))
-                elif current_ammo == "carrot" and carrot_count > 0:
-                    carrot_count -= 1
-                    projectiles.append(Projectile(CANNON_X, CANNON_Y, cannon_angle, "carrot"))
+                if self.current_ammo == "cabbage" and self.cabbage_count > 0:
+                    self.cabbage_count -= 1
+                    self.projectiles.append(self.projectile_pool.acquire(CANNON_X, CANNON_Y, self.cannon_angle, "cabbage"))
+                elif self.current_ammo == "carrot" and self.carrot_count > 0:
+                    self.carrot_count -= 1
+                    self.projectiles.append(self.projectile_pool.acquire(CANNON_X, CANNON_Y, self.cannon_angle, "carrot"))
             elif event.button == 4:  # Колесо вверх
-                current_ammo = "cabbage"
+                self.current_ammo = "cabbage"
             elif event.button == 5:  # Колесо вниз
-                current_ammo = "carrot"
+                self.current_ammo = "carrot"
         elif event.type == pygame.MOUSEBUTTONUP:
             if event.button == 1:
-                aiming = False
-
-    # Расчёт угла пушки
-    dx = mouse_x - CANNON_X
-    dy = CANNON_Y - mouse_y
-    base_angle = math.atan2(dy, dx)
-    cannon_angle = base_angle
-
-    # Дрожание при удержании
-    if aiming:
-        hold_time = game_time - aim_start_time
-        jitter = random.uniform(-0.3, 0.3) * min(hold_time * 2, 1.0)
-        cannon_angle += jitter
-
-    # Спавн зомби
-    zombie_spawn_timer += dt
-    if zombie_spawn_timer > 2.0:  # каждые 2 секунды
-        zombie_spawn_timer = 0
-        ztype = random.choice(zombie_types)
-        zombies.append(Zombie(ztype))
-
-    # Обновление огорода
-    for plot in garden_plots:
-        if plot["crop"]:
-            plot["growth"] += dt * 20
-            if plot["growth"] >= plot["max_growth"]:
-                if plot["crop"] == "cabbage":
-                    cabbage_count += 1
-                else:
-                    carrot_count += 1
-                plot["crop"] = None
-                plot["growth"] = 0
-        else:
-            # Автоматическая посадка, если есть семена (для упрощения)
-            if cabbage_count > 3 and plot["crop"] is None:
-                plot["crop"] = "cabbage"
-            elif carrot_count > 3 and plot["crop"] is None:
-                plot["crop"] = "carrot"
-
-    # Обновление снарядов
-    for proj in projectiles[:]:
-        proj.update(dt)
-        if not proj.alive:
-            projectiles.remove(proj)
-            continue
-        # Проверка попаданий
-        for zombie in zombies:
-            if zombie.alive and check_collision(proj, zombie):
-                proj.alive = False
-                speed = math.hypot(proj.vx, proj.vy)
-                impulse = proj.mass * speed
-                damage = impulse * 0.3
-                zombie.hp -= damage
-                if zombie.hp <= 0:
-                    zombie.alive = False
-                # Взрыв морковки
-                if proj.type == "carrot" and not proj.exploded:
-                    proj.exploded = True
-                    for z in zombies:
-                        if z.alive:
-                            dx = z.x - proj.x
-                            dy = z.y - proj.y
-                            dist = math.hypot(dx, dy)
-                            if dist < 60:
-                                z.hp -= 15
+                self.aiming = False
+
+    def step(self, dt, inputs=()):
+        """Один кадр логики длиной dt секунд; возвращает False после события QUIT"""
+        self.game_time += dt
+
+        # Обработка событий (позиция мыши тоже берется из событий)
+        for event in inputs:
+            self.handle_event(event)
+
+        # Расчёт угла пушки
+        dx = self.mouse_x - CANNON_X
+        dy = CANNON_Y - self.mouse_y
+        base_angle = math.atan2(dy, dx)
+        self.cannon_angle = base_angle
+
+        # Дрожание при удержании
+        if self.aiming:
+            hold_time = self.game_time - self.aim_start_time
+            jitter = self.rng.uniform(-0.3, 0.3) * min(hold_time * 2, 1.0)
+            self.cannon_angle += jitter
+
+        # Спавн зомби
+        self.zombie_spawn_timer += dt
+        if self.zombie_spawn_timer > 2.0:  # каждые 2 секунды
+            self.zombie_spawn_timer = 0
+            ztype = self.rng.choice(zombie_types)
+            self.zombies.append(self.zombie_pool.acquire(ztype))
+
+        self.update_garden(dt)
+        self.update_projectiles(dt)
+
+        # Обновление зомби
+        for zombie in self.zombies[:]:
+            zombie.update(dt)
+            if not zombie.alive:
+                self.zombies.remove(zombie)
+                self.zombie_pool.release(zombie)
+
+        # Очистка мёртвых снарядов
+        for proj in self.projectiles:
+            if not proj.alive:
+                self.projectile_pool.release(proj)
+        self.projectiles = [p for p in self.projectiles if p.alive]
+        return self.running
+
+    def update_garden(self, dt):
+        for plot in self.garden_plots:
+            if plot["crop"]:
+                plot["growth"] += dt * 20
+                if plot["growth"] >= plot["max_growth"]:
+                    if plot["crop"] == "cabbage":
+                        self.cabbage_count += 1
+                    else:
+                        self.carrot_count += 1
+                    plot["crop"] = None
+                    plot["growth"] = 0
+            else:
+                # Автоматическая посадка, если есть семена (для упрощения)
+                if self.cabbage_count > 3 and plot["crop"] is None:
+                    plot["crop"] = "cabbage"
+                elif self.carrot_count > 3 and plot["crop"] is None:
+                    plot["crop"] = "carrot"
+
+    def update_projectiles(self, dt):
+        zombies = self.zombies
+        self.splash.reset(zombies)  # Зомби не двигаются, пока летят снаряды
+        for proj in self.projectiles[:]:
+            proj.update(dt)
+            if not proj.alive:
+                self.projectiles.remove(proj)
+                self.projectile_pool.release(proj)
+                continue
+            # Проверка попаданий
+            for zombie in zombies:
+                if zombie.alive and check_collision(proj, zombie):
+                    proj.alive = False
+                    speed = math.hypot(proj.vx, proj.vy)
+                    impulse = proj.mass * speed
+                    damage = impulse * 0.3
+                    zombie.hp -= damage
+                    if zombie.hp <= 0:
+                        zombie.alive = False
+                    # Взрыв морковки
+                    if proj.type == "carrot" and not proj.exploded:
+                        proj.exploded = True
+                        hit, damages = self.splash.blast(proj.x, proj.y, 60, 15)
+                        for i, splash_damage in zip(hit.tolist(), damages.tolist()):
+                            z = zombies[i]
+                            if z.alive:
+                                z.hp -= splash_damage
                                 if z.hp <= 0:
                                     z.alive = False
-                break
-
-    # Обновление зомби
-    for zombie in zombies[:]:
-        zombie.update(dt)
-        if not zombie.alive:
-            zombies.remove(zombie)
-
-    # Очистка мёртвых снарядов
-    projectiles = [p for p in projectiles if p.alive]
-
-    # --- Рендеринг ---
-    screen.fill((135, 206, 235))  # голубое небо
-
-    # Земля
-    pygame.draw.rect(screen, (34, 100, 34), (0, HEIGHT - 50, WIDTH, 50))
-
-    # Огород
-    for plot in garden_plots:
-        color = (50, 120, 50)
-        if plot["crop"] == "cabbage":
-            color = GREEN
-        elif plot["crop"] == "carrot":
-            color = ORANGE
-        pygame.draw.rect(screen, color, (plot["x"] - 15, plot["y"] - 15, 30, 30))
-        # Индикатор роста
-        if plot["crop"]:
-            progress = min(1.0, plot["growth"] / plot["max_growth"])
-            pygame.draw.rect(screen, WHITE, (plot["x"] - 15, plot["y"] + 20, 30, 5))
-            pygame.draw.rect(screen, BLUE, (plot["x"] - 15, plot["y"] + 20, int(30 * progress), 5))
-
-    # Пушка
-    draw_cannon(cannon_angle)
-
-    # Снаряды
-    for proj in projectiles:
-        proj.draw()
-
-    # Зомби
-    for zombie in zombies:
-        zombie.draw()
-
-    # Интерфейс
-    ammo_text = font.render(f"Патроны: {current_ammo} (ПКМ — выстрел, колесо — смена)", True, WHITE)
-    screen.blit(ammo_text, (10, 10))
-    count_text = font.render(f"Капуста: {cabbage_count}   Морковка: {carrot_count}", True, WHITE)
-    screen.blit(count_text, (10, 40))
-    hint = font.render("ЛКМ — удерживай для прицеливания (дрожание!)", True, WHITE)
-    screen.blit(hint, (10, 70))
-
-    pygame.display.flip()
-
-pygame.quit()
-sys.exit()
\ No newline at end of file
+                    break
+
+    def render(self, screen):
+        if self.font is None:
+            pygame.font.init()
+            self.font = pygame.font.SysFont(None, 28)
+        font = self.font
+
+        screen.fill((135, 206, 235))  # голубое небо
+
+        # Земля
+        pygame.draw.rect(screen, (34, 100, 34), (0, HEIGHT - 50, WIDTH, 50))
+
+        # Огород
+        for plot in self.garden_plots:
+            color = (50, 120, 50)
+            if plot["crop"] == "cabbage":
+                color = GREEN
+            elif plot["crop"] == "carrot":
+                color = ORANGE
+            pygame.draw.rect(screen, color, (plot["x"] - 15, plot["y"] - 15, 30, 30))
+            # Индикатор роста
+            if plot["crop"]:
+                progress = min(1.0, plot["growth"] / plot["max_growth"])
+                pygame.draw.rect(screen, WHITE, (plot["x"] - 15, plot["y"] + 20, 30, 5))
+                pygame.draw.rect(screen, BLUE, (plot["x"] - 15, plot["y"] + 20, int(30 * progress), 5))
+
+        # Пушка
+        draw_cannon(screen, self.cannon_angle)
+
+        # Снаряды
+        for proj in self.projectiles:
+            proj.draw(screen)
+
+        # Зомби
+        for zombie in self.zombies:
+            zombie.draw(screen)
+
+        # Интерфейс
+        ammo_text = font.render(f"Патроны: {self.current_ammo} (ПКМ — выстрел, колесо — смена)", True, WHITE)
+        screen.blit(ammo_text, (10, 10))
+        count_text = font.render(f"Капуста: {self.cabbage_count}   Морковка: {self.carrot_count}", True, WHITE)
+        screen.blit(count_text, (10, 40))
+        hint = font.render("ЛКМ — удерживай для прицеливания (дрожание!)", True, WHITE)
+        screen.blit(hint, (10, 70))
+
+def run_window(sim, session):
+    """Обычная игра в окне: кадр раз в 1/60 секунды по часам сессии"""
+    pygame.init()
+    screen = pygame.display.set_mode((WIDTH, HEIGHT))
+    pygame.display.set_caption("Кролики против зомби!")
+    frame = 0
+    while sim.running:
+        dt = session.clock.tick(60) / 1000.0
+        sim.step(dt, session.input.events_for(frame))
+        sim.render(screen)
+        pygame.display.flip()
+        frame += 1
+
+def run_headless(sim, session, frames):
+    """Без окна и без ожидания: ввод только из журнала повтора (--replay),
+    время - по длительностям кадров из журнала или ровно 60 FPS
+    """
+    replaying = isinstance(session.clock, ReplayClock)
+    clock = session.clock if replaying else SimClock()
+    for frame in range(frames):
+        inputs = session.input.events_for(frame) if replaying else ()
+        if not sim.step(clock.tick(60) / 1000.0, inputs):
+            break
+    print(f"Кадров: {frame + 1}, время игры: {sim.game_time:.1f} с, зомби: {len(sim.zombies)}, "
+          f"капуста: {sim.cabbage_count}, морковка: {sim.carrot_count}")
+
+def main(argv=None):
+    # Детерминизм: seed, часы и ввод из командной строки (--seed/--record/--replay)
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--headless', action='store_true', help='считать партию без окна и без ожидания кадров')
+    parser.add_argument('--frames', type=int, default=3600, help='число кадров в режиме --headless')
+    args, _ = parser.parse_known_args(argv)
+    session = Session.from_argv(argv)
+    sim = Simulation(seed=session.seed)
+    try:
+        if args.headless:
+            run_headless(sim, session, args.frames)
+        else:
+            run_window(sim, session)
+    finally:
+        session.close()
+        pygame.quit()
+
+if __name__ == "__main__":
+    main()
+    sys.exit()
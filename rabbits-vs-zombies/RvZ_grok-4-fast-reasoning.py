@@ -3,12 +3,20 @@ import math
 import random
 import sys
 
+from rvz.pool import ObjectPool
+from rvz.profiler import FrameProfiler, csv_path_from_argv
+from rvz.replay import PygameInput, Session, WallClock
+from rvz.splash import SplashIndex
+from rvz.text import FontRegistry, TextCache
+
 # Константы
 SCREEN_WIDTH = 800
 SCREEN_HEIGHT = 600
 GRAVITY = 0.5  # Масштабированная g
 DRAG = 0.005   # Коэффициент сопротивления
 FPS = 60
+CRATER_RADIUS = 20  # Радиус воронки от упавшей капусты
+BEDROCK = SCREEN_HEIGHT - 10  # Глубже воронки не копают
 
 # Цвета
 WHITE = (255, 255, 255)
@@ -21,21 +29,71 @@ YELLOW = (255, 255, 0)
 class Terrain:
     def __init__(self):
         self.height_map = [SCREEN_HEIGHT // 2] * SCREEN_WIDTH
+        self.surface = None  # Кэшированный слой: фон и земля
+        self.dirty = None  # Столбцы [x0, x1) слоя, устаревшие после воронок
         self.generate_hills()
     
     def generate_hills(self):
         # Procedural холмы (синусоида)
         for x in range(SCREEN_WIDTH):
             self.height_map[x] = SCREEN_HEIGHT // 2 + 100 * math.sin(x * 0.01) + 50 * math.sin(x * 0.03)
+        self.surface = None  # Рельеф изменился — слой нужно перерисовать
+        self.dirty = None
+    
+    def carve(self, cx, radius=CRATER_RADIUS):
+        # Воронка: круг радиуса radius с центром на поверхности в точке падения.
+        # Меняются только столбцы под кругом; перерисуются они и по столбцу с
+        # каждой стороны - ребра к соседним вершинам задевают и эти столбцы
+        if not 0 <= cx < SCREEN_WIDTH:
+            return
+        cy = self.get_height(cx)
+        x0 = max(0, math.ceil(cx - radius))
+        x1 = min(SCREEN_WIDTH, math.floor(cx + radius) + 1)
+        for x in range(x0, x1):
+            bottom = cy + math.sqrt(max(0, radius * radius - (x - cx) ** 2))
+            if bottom > self.height_map[x]:
+                self.height_map[x] = min(bottom, BEDROCK)
+        if self.surface is not None:
+            x0, x1 = max(0, x0 - 1), min(SCREEN_WIDTH, x1 + 1)
+            if self.dirty is not None:
+                x0, x1 = min(x0, self.dirty[0]), max(x1, self.dirty[1])
+            self.dirty = (x0, x1)
     
     def get_height(self, x):
         if 0 <= x < SCREEN_WIDTH:
             return self.height_map[int(x)]
         return SCREEN_HEIGHT // 2
     
-    def draw(self, screen):
+    def render(self):
+        # Полигон из 800 вершин строится один раз, а не каждый кадр
+        self.surface = pygame.Surface((SCREEN_WIDTH, SCREEN_HEIGHT))
+        self.surface.fill(WHITE)
         points = [(x, self.height_map[x]) for x in range(SCREEN_WIDTH)]
-        pygame.draw.polygon(screen, GREEN, points + [(SCREEN_WIDTH, SCREEN_HEIGHT), (0, SCREEN_HEIGHT)])
+        pygame.draw.polygon(self.surface, GREEN, points + [(SCREEN_WIDTH, SCREEN_HEIGHT), (0, SCREEN_HEIGHT)])
+        self.dirty = None
+    
+    def render_columns(self, x0, x1):
+        # Перерисовывает в слое только столбцы [x0, x1). Многоугольник берет по
+        # соседней вершине с каждой стороны, а его боковые стороны остаются за
+        # клипом, поэтому пиксели внутри клипа те же, что у полного render()
+        area = pygame.Rect(x0, 0, x1 - x0, SCREEN_HEIGHT)
+        self.surface.set_clip(area)
+        self.surface.fill(WHITE, area)
+        lo = max(0, x0 - 1)
+        hi = min(SCREEN_WIDTH, x1 + 1)
+        points = [(x, self.height_map[x]) for x in range(lo, hi)]
+        right = SCREEN_WIDTH if hi == SCREEN_WIDTH else hi - 1
+        pygame.draw.polygon(self.surface, GREEN, points + [(right, SCREEN_HEIGHT), (lo, SCREEN_HEIGHT)])
+        self.surface.set_clip(None)
+    
+    def draw(self, screen):
+        # Слой закрывает весь экран, поэтому заменяет и заливку фона
+        if self.surface is None:
+            self.render()
+        elif self.dirty is not None:
+            self.render_columns(*self.dirty)
+            self.dirty = None
+        screen.blit(self.surface, (0, 0))
 
 class Garden:
     def __init__(self, x, y):
@@ -75,9 +133,11 @@ class Garden:
             pygame.draw.circle(screen, YELLOW, (self.x + 10, self.y), 8)  # Морковь
 
 class Cannon:
-    def __init__(self, x, y):
+    def __init__(self, x, y, clock, rng):
         self.x = x
         self.y = y
+        self.clock = clock
+        self.rng = rng
         self.angle = 0
         self.shake_amplitude = 0
         self.shake_timer = 0
@@ -106,26 +166,26 @@ class Cannon:
             self.angle += 0.1 * math.sin(self.recoil_timer / 100)
         
         # Применяем shake
-        shake_x = self.shake_amplitude * math.sin(pygame.time.get_ticks() * 0.01)
-        shake_y = self.shake_amplitude * math.cos(pygame.time.get_ticks() * 0.01)
+        shake_x = self.shake_amplitude * math.sin(self.clock.get_ticks() * 0.01)
+        shake_y = self.shake_amplitude * math.cos(self.clock.get_ticks() * 0.01)
         self.x += shake_x * dt / 1000
         self.y += shake_y * dt / 1000
     
-    def shoot(self, type_, terrain):
+    def shoot(self, type_, terrain, pool):
         if self.recoil_timer > 0:
             return None
         self.recoil_timer = 500  # 0.5 сек перезарядка
         vx = 10 * math.cos(self.angle)
         vy = 10 * math.sin(self.angle)
         if type_ == 'cabbage':
-            return Projectile(self.x, self.y, vx, vy, 5, BLUE, terrain, is_aoe=False)  # Масса 5
+            return pool.acquire(self.x, self.y, vx, vy, 5, BLUE, terrain, is_aoe=False)  # Масса 5
         elif type_ == 'carrot':
             projectiles = []
             for i in range(3):  # Кластер
-                offset_angle = self.angle + random.uniform(-0.2, 0.2)
+                offset_angle = self.angle + self.rng.uniform(-0.2, 0.2)
                 pvx = 8 * math.cos(offset_angle)
                 pvy = 8 * math.sin(offset_angle)
-                proj = Projectile(self.x, self.y, pvx, pvy, 3, YELLOW, terrain, is_aoe=True)
+                proj = pool.acquire(self.x, self.y, pvx, pvy, 3, YELLOW, terrain, is_aoe=True)
                 projectiles.append(proj)
             return projectiles  # Возвращаем список
         return None
@@ -139,6 +199,8 @@ class Cannon:
         pygame.draw.circle(screen, BROWN, (int(self.x), int(self.y)), 10)
 
 class Projectile:
+    __slots__ = ('x', 'y', 'vx', 'vy', 'mass', 'color', 'terrain', 'is_aoe', 'alive', 'hit')
+    
     def __init__(self, x, y, vx, vy, mass, color, terrain, is_aoe=False):
         self.x = x
         self.y = y
@@ -151,7 +213,7 @@ class Projectile:
         self.alive = True
         self.hit = False
     
-    def update(self, dt, zombies):
+    def move(self, dt):
         if not self.alive:
             return
         
@@ -163,26 +225,35 @@ class Projectile:
         self.x += self.vx * dt
         self.y += self.vy * dt
         
-        # Проверка земли
+        # Проверка земли: капуста выбивает воронку
         if self.y > self.terrain.get_height(self.x):
             self.alive = False
+            if not self.is_aoe:
+                self.terrain.carve(self.x)
+    
+    def collide(self, zombies, splash):
+        # splash - индекс зомби кадра (SplashIndex по списку zombies)
+        if not self.alive:
             return
         
-        # Проверка зомби (неупругое столкновение)
-        for zombie in zombies[:]:
-            dist = math.hypot(self.x - zombie.x, self.y - zombie.y)
-            if dist < 20:  # Радиус попадания
-                impulse = self.mass * math.sqrt(self.vx**2 + self.vy**2)
-                damage = impulse * 0.5  # Пропорционально импульсу
-                zombie.take_damage(damage, self.vx, self.vy)  # Замедление от vx
-                self.alive = False
-                self.hit = True
-                if self.is_aoe:
-                    # AoE: поражает соседей
-                    for other_z in zombies:
-                        if other_z != zombie and math.hypot(self.x - other_z.x, self.y - other_z.y) < 50:
-                            other_z.take_damage(damage * 0.7, 0, 0)
-                break
+        # Проверка зомби (неупругое столкновение): первый по списку в радиусе попадания
+        hits, _ = splash.query(self.x, self.y, 20)
+        if not len(hits):
+            return
+        i = int(hits[0])
+        zombie = zombies[i]
+        impulse = self.mass * math.sqrt(self.vx**2 + self.vy**2)
+        damage = impulse * 0.5  # Пропорционально импульсу
+        zombie.take_damage(damage, self.vx, self.vy)  # Замедление от vx
+        splash.moved(i)  # Попадание отбрасывает зомби
+        self.alive = False
+        self.hit = True
+        if self.is_aoe:
+            # AoE: поражает соседей в радиусе 50
+            others, damages = splash.blast(self.x, self.y, 50, damage * 0.7)
+            for j, splash_damage in zip(others.tolist(), damages.tolist()):
+                if j != i:
+                    zombies[j].take_damage(splash_damage, 0, 0)
     
     def draw(self, screen):
         if self.alive or self.hit:
@@ -191,6 +262,8 @@ class Projectile:
                 pygame.draw.circle(screen, YELLOW, (int(self.x), int(self.y)), 15, 2)  # Вспышка
 
 class Zombie:
+    __slots__ = ('x', 'y', 'speed', 'health', 'max_health', 'terrain', 'anim_frame')
+    
     def __init__(self, x, y, speed, health, terrain):
         self.x = x
         self.y = y
@@ -231,19 +304,32 @@ class Zombie:
         pygame.draw.rect(screen, GREEN, (self.x - 15, self.y - 25, fill, bar_height))
 
 class Game:
-    def __init__(self):
+    def __init__(self, seed=None, clock=None, events=None, profile_csv=None):
         pygame.init()
         self.screen = pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT))
         pygame.display.set_caption("Кролики против зомби")
-        self.clock = pygame.time.Clock()
+        # Детерминизм: свой генератор случайных чисел, внедряемые часы и ввод
+        self.rng = random.Random(seed)
+        self.clock = clock or WallClock()
+        self.input = events or PygameInput()
+        self.frame = 0
+        self.mouse_pos = (0, 0)
+        self.mouse_down = False
+        self.fonts = FontRegistry()
+        self.text = TextCache()
+        self.font = self.fonts.get(None, 36)
+        self.projectile_pool = ObjectPool(Projectile)
+        self.zombie_pool = ObjectPool(Zombie)
         self.terrain = Terrain()
-        self.cannon = Cannon(100, self.terrain.get_height(100) - 20)  # Пушка на холме
+        self.cannon = Cannon(100, self.terrain.get_height(100) - 20, self.clock, self.rng)  # Пушка на холме
         self.garden = Garden(80, self.terrain.get_height(80) - 30)
         self.zombies = []
+        self.splash = SplashIndex()  # Зомби по x: попадания и урон по площади
         self.projectiles = []
         self.rabbit_type = "farmer"  # Базовый кролик
         self.spawn_timer = 0
         self.shoot_type = 'cabbage'  # По умолчанию
+        self.profiler = FrameProfiler(csv_path=profile_csv)  # F3 — оверлей времени фаз
         self.running = True
     
     def spawn_zombie(self):
@@ -252,18 +338,32 @@ class Game:
             {"speed": 1.5, "health": 30},  # Быстрый
             {"speed": 0.5, "health": 100}  # Бронированный
         ]
-        t = random.choice(types)
+        t = self.rng.choice(types)
         x = -20
         y = self.terrain.get_height(x)
-        zombie = Zombie(x, y, t["speed"], t["health"], self.terrain)
+        zombie = self.zombie_pool.acquire(x, y, t["speed"], t["health"], self.terrain)
         self.zombies.append(zombie)
     
+    def flying(self):
+        # Все снаряды: одиночные и из залпов морковью
+        for proj in self.projectiles:
+            if isinstance(proj, list):
+                yield from proj
+            else:
+                yield proj
+    
     def update(self):
         dt = self.clock.get_time()
-        mouse_pos = pygame.mouse.get_pos()
+        mouse_pos = self.mouse_pos
+        profiler = self.profiler
         
         self.cannon.update(mouse_pos, dt)
+        profiler.lap('aim')
         self.garden.update()
+        # Проверка клика на огород
+        if self.mouse_down and math.hypot(mouse_pos[0] - self.garden.x, mouse_pos[1] - self.garden.y) < 20:
+            self.garden.care()
+        profiler.lap('garden')
         
         # Спавн зомби
         self.spawn_timer += dt
@@ -276,39 +376,54 @@ class Game:
             zombie.update(dt, self.cannon.x)
             if zombie.health <= 0:
                 self.zombies.remove(zombie)
+                self.zombie_pool.release(zombie)
+        profiler.lap('zombies')
         
-        # Обновление снарядов
+        # Обновление снарядов: сначала полет всех, затем попадания в том же
+        # порядке (полет от зомби не зависит, поэтому результат тот же)
+        for p in self.flying():
+            p.move(dt)
+        profiler.lap('projectiles')
+        self.splash.reset(self.zombies)
+        for p in self.flying():
+            p.collide(self.zombies, self.splash)
         for proj in self.projectiles[:]:
             if isinstance(proj, list):
                 for p in proj[:]:
-                    p.update(dt, self.zombies)
                     if not p.alive:
                         proj.remove(p)
+                        self.projectile_pool.release(p)
                 if not proj:
                     self.projectiles.remove(proj)
-            else:
-                proj.update(dt, self.zombies)
-                if not proj.alive:
-                    self.projectiles.remove(proj)
-        
-        # Проверка клика на огород
-        if pygame.mouse.get_pressed()[0] and math.hypot(mouse_pos[0] - self.garden.x, mouse_pos[1] - self.garden.y) < 20:
-            self.garden.care()
+            elif not proj.alive:
+                self.projectiles.remove(proj)
+                self.projectile_pool.release(proj)
+        profiler.lap('collisions')
     
     def handle_events(self):
-        for event in pygame.event.get():
+        # Состояние мыши берется из событий, чтобы ввод можно было записать и повторить
+        for event in self.input.events_for(self.frame):
             if event.type == pygame.QUIT:
                 self.running = False
+            elif event.type == pygame.MOUSEMOTION:
+                self.mouse_pos = event.pos
+            elif event.type == pygame.KEYDOWN and event.key == pygame.K_F3:
+                self.profiler.toggle()
+            elif event.type == pygame.MOUSEBUTTONUP:
+                if event.button == 1:
+                    self.mouse_down = False
             elif event.type == pygame.MOUSEBUTTONDOWN:
+                self.mouse_pos = event.pos
                 if event.button == 1:  # Левый клик — стрельба
+                    self.mouse_down = True
                     harvested = False
                     if self.shoot_type == 'cabbage' and self.garden.harvest('cabbage'):
-                        proj = self.cannon.shoot('cabbage', self.terrain)
+                        proj = self.cannon.shoot('cabbage', self.terrain, self.projectile_pool)
                         if proj:
                             self.projectiles.append(proj)
                         harvested = True
                     elif self.shoot_type == 'carrot' and self.garden.harvest('carrot'):
-                        projs = self.cannon.shoot('carrot', self.terrain)
+                        projs = self.cannon.shoot('carrot', self.terrain, self.projectile_pool)
                         if projs:
                             self.projectiles.append(projs)
                         harvested = True
@@ -318,7 +433,6 @@ class Game:
                     self.shoot_type = 'carrot' if self.shoot_type == 'cabbage' else 'cabbage'
     
     def draw(self):
-        self.screen.fill(WHITE)
         self.terrain.draw(self.screen)
         self.garden.draw(self.screen)
         self.cannon.draw(self.screen)
@@ -338,20 +452,33 @@ class Game:
         pygame.draw.rect(self.screen, (150, 100, 50), (self.cannon.x - 15, self.cannon.y - 20, 30, 20))  # Тело
         
         # Инфо
-        font = pygame.font.Font(None, 36)
-        text = font.render(f"Тип: {self.shoot_type} (Правый клик - смена)", True, (0, 0, 0))
+        text = self.text.render(self.font, f"Тип: {self.shoot_type} (Правый клик - смена)", (0, 0, 0))
         self.screen.blit(text, (10, 10))
         
+        self.profiler.draw(self.screen, self.fonts.get(None, 22))
+        
         pygame.display.flip()
     
     def run(self):
+        profiler = self.profiler
         while self.running:
+            profiler.begin()
             self.handle_events()
+            profiler.lap('events')
             self.update()
+            self.frame += 1
             self.draw()
+            profiler.lap('render')
+            profiler.end()
             self.clock.tick(FPS)
         pygame.quit()
 
 if __name__ == "__main__":
-    game = Game()
-    game.run()
\ No newline at end of file
+    session = Session.from_argv()
+    game = Game(seed=session.seed, clock=session.clock, events=session.input,
+                profile_csv=csv_path_from_argv())
+    try:
+        game.run()
+    finally:
+        game.profiler.close()
+        session.close()
\ No newline at end of file
@@ -0,0 +1,5 @@
+"""Общая инфраструктура для реализаций «Кролики против зомби».
+
+Модули пакета не зависят от конкретной модели: игры импортируют их,
+когда запускаются из каталога rabbits-vs-zombies.
+"""
@@ -0,0 +1,140 @@
+"""Обратная баллистика: под каким углом стрелять, чтобы попасть в точку.
+
+С квадратичным сопротивлением воздуха у траектории нет формулы, поэтому
+таблица заранее прогоняет интегратор игры для сетки (угол, скорость) и
+запоминает высоту траектории над каждой точкой сетки по горизонтали.
+Запрос интерполирует таблицу по скорости и дальности, находит смену знака
+«траектория выше/ниже цели» по углам и уточняет угол линейной
+интерполяцией между соседними строками. Нужна точнее - refine() делает
+несколько шагов секущих по настоящей симуляции.
+
+Координаты экранные (y вниз) и отсчитываются от оси пушки; угол 0 -
+горизонтально вправо, отрицательные углы - вверх. Цели левее пушки
+решаются зеркально.
+"""
+import math
+
+import numpy as np
+
+
+class BallisticTable:
+    """Таблица траекторий одного класса снаряда (масса и сопротивление).
+
+    step(pos, vel) - шаг интегратора игры для массивов формы (N, 2),
+    возвращает новые (pos, vel). muzzle - длина ствола: снаряд стартует с
+    конца ствола, а не из оси. floor - высота (вниз от оси), после которой
+    траектория больше не нужна.
+    """
+    def __init__(self, step, speeds, angles=None, max_range=1400, x_step=4,
+                 muzzle=0, floor=800, max_steps=2000):
+        if angles is None:
+            angles = np.radians(np.arange(-89, 81, 1.0))
+        self.step = step
+        self.speeds = np.asarray(speeds, dtype=float)
+        self.angles = np.asarray(angles, dtype=float)
+        self.muzzle = muzzle
+        self.floor = floor
+        self.max_steps = max_steps
+        self.x_step = x_step
+        self.xs = np.arange(0, max_range + x_step, x_step, dtype=float)
+        self.heights = self.build()
+
+    def launch(self, angles, speeds):
+        """Начальные положения и скорости для массивов углов и скоростей"""
+        direction = np.stack([np.cos(angles), np.sin(angles)], axis=1)
+        return direction * self.muzzle, direction * np.asarray(speeds)[:, None]
+
+    def build(self):
+        """Высоты траекторий: массив (скорость, угол, x), NaN - траектория туда не долетает"""
+        angle_grid, speed_grid = np.meshgrid(self.angles, self.speeds)
+        pos, vel = self.launch(angle_grid.ravel(), speed_grid.ravel())
+        path_x, path_y = [pos[:, 0].copy()], [pos[:, 1].copy()]
+        max_x = self.xs[-1]
+        for _ in range(self.max_steps):
+            pos, vel = self.step(pos, vel)
+            path_x.append(pos[:, 0].copy())
+            path_y.append(pos[:, 1].copy())
+            if ((pos[:, 1] > self.floor) | (pos[:, 0] > max_x)).all():
+                break
+        path_x = np.array(path_x)
+        path_y = np.array(path_y)
+
+        heights = np.full((len(angle_grid.ravel()), len(self.xs)), np.nan)
+        for ray in range(heights.shape[0]):
+            x, y = path_x[:, ray], path_y[:, ray]
+            # Участок полета до пересечения пола; по x траектория монотонна
+            below = np.flatnonzero(y > self.floor)
+            end = below[0] + 1 if len(below) else len(x)
+            heights[ray] = np.interp(self.xs, x[:end], y[:end], left=np.nan, right=np.nan)
+        return heights.reshape(len(self.speeds), len(self.angles), len(self.xs))
+
+    def heights_at(self, dx, speed):
+        """Высоты всех траекторий с данной скоростью над точкой dx.
+
+        None, если dx дальше таблицы или скорость вне ее диапазона: за
+        краями таблицы интерполяция превратилась бы в экстраполяцию.
+        """
+        k = dx / self.x_step
+        i = int(k)
+        if i >= len(self.xs) - 1:
+            return None
+        if not self.speeds[0] <= speed <= self.speeds[-1]:
+            return None
+        fk = k - i
+        j = int(np.searchsorted(self.speeds, speed)) - 1
+        j = min(max(j, 0), len(self.speeds) - 2)
+        fs = (speed - self.speeds[j]) / (self.speeds[j + 1] - self.speeds[j])
+        block = self.heights[j:j + 2, :, i:i + 2]
+        column = block[:, :, 0] + (block[:, :, 1] - block[:, :, 0]) * fk
+        return column[0] + (column[1] - column[0]) * fs
+
+    def solve(self, dx, dy, speed, high=False):
+        """Угол выстрела в точку (dx, dy) от оси пушки или None, если она недостижима.
+
+        Обычно таких углов два: настильный и навесной; high выбирает навесной.
+        """
+        mirrored = dx < 0
+        heights = self.heights_at(abs(dx), speed)
+        if heights is None:
+            return None
+        miss = heights - dy
+        valid = ~np.isnan(miss)
+        above = miss < 0
+        crossings = np.flatnonzero(valid[:-1] & valid[1:] & (above[:-1] != above[1:]))
+        if len(crossings) == 0:
+            return None
+        i = crossings[0] if high else crossings[-1]
+        t = miss[i] / (miss[i] - miss[i + 1])
+        angle = float(self.angles[i] + (self.angles[i + 1] - self.angles[i]) * t)
+        return math.pi - angle if mirrored else angle
+
+    def height_at(self, angle, dx, speed):
+        """Высота точной траектории над dx (одна симуляция интегратором игры)"""
+        pos, vel = self.launch(np.array([angle]), np.array([speed]))
+        for _ in range(self.max_steps):
+            new_pos, vel = self.step(pos, vel)
+            if new_pos[0, 0] >= dx:
+                x0, y0 = pos[0]
+                x1, y1 = new_pos[0]
+                return y0 + (y1 - y0) * (dx - x0) / (x1 - x0)
+            if new_pos[0, 1] > self.floor:
+                return None
+            pos = new_pos
+        return None
+
+    def refine(self, angle, dx, dy, speed, steps=2):
+        """Уточняет угол из solve() шагами секущих по точной симуляции"""
+        if angle is None:
+            return None
+        mirrored = dx < 0
+        if mirrored:
+            angle, dx = math.pi - angle, -dx
+        delta = math.radians(0.25)
+        a0, a1 = angle - delta, angle
+        h0 = self.height_at(a0, dx, speed)
+        for _ in range(steps):
+            h1 = self.height_at(a1, dx, speed)
+            if h0 is None or h1 is None or h1 == h0:
+                break
+            a0, a1, h0 = a1, a1 - (h1 - dy) * (a1 - a0) / (h1 - h0), h1
+        return math.pi - a1 if mirrored else a1
@@ -0,0 +1,726 @@
+"""Бенчмарки арены «Кролики против зомби».
+
+Запуск из каталога rabbits-vs-zombies:
+
+    python -m rvz.bench arena      # сравнение реализаций: время кадра, память, масштабирование
+    python -m rvz.bench entities   # память и аллокации сущностей: до и после пулов
+    python -m rvz.bench particles  # система частиц DeepSeek при 10k живых частиц
+    python -m rvz.bench splash     # урон по площади: 5000 зомби, 100 взрывов
+"""
+import abc
+import argparse
+import contextlib
+import gc
+import io
+import math
+import os
+import random
+import statistics
+import time
+import tracemalloc
+
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+os.environ.setdefault('SDL_AUDIODRIVER', 'dummy')
+
+import numpy as np
+import pygame
+
+from rvz.pool import ObjectPool
+from rvz.replay import InputLog, SimClock
+from rvz.splash import SplashIndex
+from rvz.variants import load_variant
+
+
+def format_table(headers, rows):
+    """Форматирует таблицу с выравниванием по колонкам"""
+    rows = [[str(cell) for cell in row] for row in rows]
+    widths = [max(len(row[i]) for row in [headers] + rows) for i in range(len(headers))]
+    lines = ['  '.join(h.ljust(w) for h, w in zip(headers, widths)),
+             '  '.join('-' * w for w in widths)]
+    for row in rows:
+        lines.append('  '.join(cell.ljust(w) for cell, w in zip(row, widths)))
+    return '\n'.join(lines)
+
+
+# --- Арена: единый сценарий для всех реализаций ---
+
+def scenario(width, height, frames, seed=0):
+    """Сценарий ввода, общий для всех реализаций.
+
+    Мышь плавно водит прицелом по правой половине экрана, левый клик - каждые
+    30 кадров, правый - каждые 45, пробел (сбор урожая) - каждые 120.
+    Координаты задаются в долях экрана, поэтому сценарий подходит к любому
+    разрешению.
+    """
+    rng = random.Random(seed)
+    log = InputLog(seed)
+    for frame in range(frames):
+        pos = (int(width * (0.6 + 0.3 * math.sin(frame / 40))),
+               int(height * (0.4 + 0.2 * math.cos(frame / 25))))
+        log.add(frame, pygame.event.Event(pygame.MOUSEMOTION, pos=pos))
+        if frame % 30 == 0:
+            log.add(frame, pygame.event.Event(pygame.MOUSEBUTTONDOWN, pos=pos, button=1))
+            log.add(frame, pygame.event.Event(pygame.MOUSEBUTTONUP, pos=pos, button=1))
+        if frame % 45 == 15:
+            target = (int(width * rng.uniform(0.4, 0.9)), int(height * rng.uniform(0.3, 0.6)))
+            log.add(frame, pygame.event.Event(pygame.MOUSEBUTTONDOWN, pos=target, button=3))
+        if frame % 120 == 60:
+            log.add(frame, pygame.event.Event(pygame.KEYDOWN, key=pygame.K_SPACE))
+    return log
+
+
+class ArenaRunner(abc.ABC):
+    """Обертка над реализацией: один шаг логики, один кадр рендера и
+    добавление сущностей для кривых масштабирования.
+
+    Время в игре идет по SimClock, ввод берется из сценария, построенного
+    под размер экрана реализации (width, height). Рендер и снаряды есть не
+    у всех реализаций: флаги renders и supports_projectiles говорят, можно
+    ли вызывать render() и add_projectiles().
+    """
+    name = None
+    width = None
+    height = None
+    renders = True
+    supports_projectiles = True
+
+    def __init__(self, script, seed=0):
+        self.script = script
+        self.rng = random.Random(seed)
+        self.clock = SimClock()
+
+    @abc.abstractmethod
+    def update(self):
+        """Один шаг логики"""
+
+    @abc.abstractmethod
+    def add_zombies(self, count):
+        """Добавляет count зомби в игру"""
+
+    def render(self):
+        """Один кадр рендера; есть, если renders"""
+        raise TypeError(f'{self.name}: рендера нет (renders = False)')
+
+    def add_projectiles(self, count):
+        """Добавляет count снарядов в полете; есть, если supports_projectiles"""
+        raise TypeError(f'{self.name}: снаряды не добавляются (supports_projectiles = False)')
+
+
+class GLMRunner(ArenaRunner):
+    name = 'GLM-4.6'
+    width = load_variant('glm').SCREEN_WIDTH
+    height = load_variant('glm').SCREEN_HEIGHT
+
+    def __init__(self, script, seed=0):
+        super().__init__(script, seed)
+        self.module = load_variant('glm')
+        self.game = self.module.Game(headless=True, seed=seed, clock=self.clock, events=script)
+
+    def update(self):
+        self.game.step(1, self.script)
+
+    def render(self):
+        self.game.draw()
+
+    def add_zombies(self, count):
+        game, m = self.game, self.module
+        for _ in range(count):
+            x = self.rng.uniform(300, m.SCREEN_WIDTH - 50)
+            game.zombies.append(game.zombie_pool.acquire(
+                x, game.terrain.get_height_at(x), game.terrain, game.sim_clock, game.rng,
+                self.rng.choice(['normal', 'armored'])))
+
+    def add_projectiles(self, count):
+        game, m = self.game, self.module
+        for _ in range(count):
+            game.projectiles.append(game.projectile_pool.acquire(
+                self.rng.uniform(100, m.SCREEN_WIDTH * 0.6), self.rng.uniform(50, 300),
+                self.rng.uniform(-1.5, 0), 800, m.CARROT_MASS, m.CARROT_RADIUS,
+                m.CARROT_COLOR, m.CARROT_DAMAGE_COEFF))
+
+
+class DeepSeekRunner(ArenaRunner):
+    name = 'DeepSeek-V3.2'
+    width, height = 1200, 700  # Констант размера в модуле нет: окно задано в set_mode
+
+    def __init__(self, script, seed=0):
+        super().__init__(script, seed)
+        self.module = load_variant('deepseek')
+        self.game = self.module.RabbitsVsZombies(seed=seed, clock=self.clock, events=script)
+
+    def update(self):
+        game = self.game
+        dt = self.clock.tick(60) / 1000.0
+        game.handle_events()
+        game.update(dt)
+        game.frame += 1
+
+    def render(self):
+        self.game.render()
+
+    def add_zombies(self, count):
+        zombies = self.game.zombies
+        for _ in range(count):
+            zombies.add(self.rng.choice(['normal', 'armored', 'athlete', 'giant']), x=self.rng.uniform(300, 1250))
+
+    def add_projectiles(self, count):
+        game, vector = self.game, self.module.Vector2
+        for _ in range(count):
+            projectile = game.projectile_pool.acquire(
+                type=self.rng.choice(['cabbage', 'carrot']), position=vector(100, 530),
+                target=vector(self.rng.uniform(300, 1100), self.rng.uniform(200, 500)),
+                power=0.8, mass=0.3, rng=game.rng, clock=self.clock)
+            game.projectiles.add(projectile, game.projectile_physics)
+
+
+class GrokFastRunner(ArenaRunner):
+    name = 'grok-4-fast-reasoning'
+    width = load_variant('grok-fast').SCREEN_WIDTH
+    height = load_variant('grok-fast').SCREEN_HEIGHT
+
+    def __init__(self, script, seed=0):
+        super().__init__(script, seed)
+        self.module = load_variant('grok-fast')
+        self.game = self.module.Game(seed=seed, clock=self.clock, events=script)
+
+    def update(self):
+        game = self.game
+        self.clock.tick(self.module.FPS)
+        game.handle_events()
+        game.update()
+        game.frame += 1
+
+    def render(self):
+        # Game.draw сам вызывает pygame.display.flip()
+        self.game.draw()
+
+    def add_zombies(self, count):
+        game = self.game
+        for _ in range(count):
+            # Левее экрана: зомби идут вправо и не успевают дойти до кролика
+            x = self.rng.uniform(-400, 0)
+            game.zombies.append(game.zombie_pool.acquire(
+                x, game.terrain.get_height(x), self.rng.choice([0.5, 1, 1.5]), 50, game.terrain))
+
+    def add_projectiles(self, count):
+        game, m = self.game, self.module
+        for _ in range(count):
+            # Скорости тут в пикселях за миллисекунду: снаряды стартуют высоко
+            # над экраном, чтобы не упасть раньше конца замера
+            game.projectiles.append(game.projectile_pool.acquire(
+                self.rng.uniform(150, m.SCREEN_WIDTH - 50), self.rng.uniform(-3000, -1500),
+                self.rng.uniform(-1, 1), 0, 3, m.YELLOW, game.terrain, True))
+
+
+class GrokRunner(ArenaRunner):
+    """Grok-4-0709 - текстовая игра без pygame и без цикла кадров.
+
+    Шаг логики - один ход без ввода с консоли: рост огорода и движение
+    зомби. Рендера нет, снаряды не живут между ходами (траектория
+    считается целиком в Cannon.shoot), поэтому меряются только зомби.
+    """
+    name = 'Grok-4-0709'
+    renders = False
+    supports_projectiles = False
+    width, height = 0, 0  # Экрана нет, сценарий ввода игра не читает
+
+    def __init__(self, script, seed=0):
+        super().__init__(script, seed)
+        self.module = load_variant('grok')
+        self.garden = self.module.Garden(0.5)
+        self.zombies = []
+        self.zombie_pool = ObjectPool(self.module.Zombie)
+
+    def update(self):
+        self.garden.update()
+        for zombie in self.zombies:
+            zombie.move()
+
+    def add_zombies(self, count):
+        for _ in range(count):
+            self.zombies.append(self.zombie_pool.acquire(
+                self.rng.choice(['normal', 'conehead', 'fast', 'farmer']), self.module.FIELD_WIDTH))
+
+
+class QwenRunner(ArenaRunner):
+    """Qwen3-Max: Simulation без окна, кадр рисуется на отдельную поверхность"""
+    name = 'Qwen3-Max'
+    width = load_variant('qwen').WIDTH
+    height = load_variant('qwen').HEIGHT
+
+    def __init__(self, script, seed=0):
+        super().__init__(script, seed)
+        self.module = load_variant('qwen')
+        self.sim = self.module.Simulation(seed=seed)
+        self.surface = pygame.Surface((self.module.WIDTH, self.module.HEIGHT))
+        self.frame = 0
+
+    def update(self):
+        self.sim.step(self.clock.tick(60) / 1000.0, self.script.events_for(self.frame))
+        self.frame += 1
+
+    def render(self):
+        self.sim.render(self.surface)
+
+    def add_zombies(self, count):
+        sim, m = self.sim, self.module
+        for _ in range(count):
+            zombie = sim.zombie_pool.acquire(self.rng.choice(m.zombie_types))
+            zombie.x = self.rng.uniform(300, m.WIDTH + 50)
+            sim.zombies.append(zombie)
+
+    def add_projectiles(self, count):
+        sim, m = self.sim, self.module
+        for _ in range(count):
+            # Снаряды летят от пушки вверх-вправо и успевают прожить весь замер
+            sim.projectiles.append(sim.projectile_pool.acquire(
+                m.CANNON_X, m.CANNON_Y, self.rng.uniform(0.3, 1.2), self.rng.choice(['cabbage', 'carrot'])))
+
+
+ARENA_RUNNERS = [GLMRunner, DeepSeekRunner, GrokFastRunner, GrokRunner, QwenRunner]
+
+
+def percentiles(samples, points=(50, 95, 99)):
+    """Перцентили выборки (в тех же единицах)"""
+    cuts = statistics.quantiles(samples, n=100, method='inclusive')
+    return [cuts[p - 1] for p in points]
+
+
+def time_frames(runner, frames):
+    """Прогоняет frames кадров; возвращает списки времени логики и рендера в мс"""
+    update_ms, render_ms = [], []
+    clock = time.perf_counter
+    for _ in range(frames):
+        start = clock()
+        runner.update()
+        middle = clock()
+        if runner.renders:
+            runner.render()
+        end = clock()
+        update_ms.append((middle - start) * 1000)
+        render_ms.append((end - middle) * 1000)
+    return update_ms, render_ms
+
+
+def peak_memory(runner_cls, script, frames):
+    """Пик памяти Python (tracemalloc) за создание игры и прогон сценария.
+
+    Поверхности SDL выделяются вне интерпретатора и сюда не попадают.
+    """
+    gc.collect()
+    tracemalloc.start()
+    try:
+        runner = runner_cls(script)
+        for _ in range(frames):
+            runner.update()
+            if runner.renders:
+                runner.render()
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def scaling(runner_cls, script, kind, counts, frames):
+    """Медиана времени логики и рендера при count добавленных сущностях"""
+    results = []
+    for count in counts:
+        runner = runner_cls(script)
+        if kind == 'zombies':
+            runner.add_zombies(count)
+        else:
+            runner.add_projectiles(count)
+        update_ms, render_ms = time_frames(runner, frames)
+        results.append((statistics.median(update_ms),
+                        statistics.median(render_ms) if runner.renders else None))
+    return results
+
+
+def format_ms(value):
+    return '—' if value is None else f'{value:.2f}'
+
+
+def run_arena(args):
+    counts = [int(c) for c in args.counts.split(',')]
+    rows = []
+    curves = {'zombies': [], 'projectiles': []}
+    # Игры печатают в консоль (попадания, «Нет урожая!»); в отчет это не идет
+    with contextlib.redirect_stdout(io.StringIO()):
+        for runner_cls in ARENA_RUNNERS:
+            script = scenario(runner_cls.width, runner_cls.height, args.frames)
+            update_ms, render_ms = time_frames(runner_cls(script), args.frames)
+            peak = peak_memory(runner_cls, script, args.frames)
+            render = '/'.join(format_ms(v) for v in percentiles(render_ms)) if runner_cls.renders else '—'
+            rows.append([
+                runner_cls.name,
+                '/'.join(format_ms(v) for v in percentiles(update_ms)),
+                render,
+                f'{peak / 1024:.0f}',
+            ])
+            for kind in curves:
+                if kind == 'projectiles' and not runner_cls.supports_projectiles:
+                    continue
+                results = scaling(runner_cls, script, kind, counts, args.scale_frames)
+                curves[kind].append([runner_cls.name] + [
+                    f'{format_ms(update)} / {format_ms(render)}' for update, render in results])
+
+    print(f'Сценарий: {args.frames} кадров, SimClock 60 FPS, SDL_VIDEODRIVER={os.environ["SDL_VIDEODRIVER"]}')
+    print(format_table(
+        ['реализация', 'логика p50/p95/p99, мс', 'рендер p50/p95/p99, мс', 'пик памяти, КБ'], rows))
+    titles = {'zombies': 'зомби', 'projectiles': 'снарядов'}
+    for kind, table in curves.items():
+        print()
+        print(f'Масштабирование: +N {titles[kind]}, медиана за {args.scale_frames} кадров, '
+              f'логика / рендер, мс')
+        print(format_table(['реализация'] + [f'N={count}' for count in counts], table))
+
+
+# --- Сущности: __slots__ и пулы ---
+
+def entity_factories():
+    """Список (реализация, класс, функция аргументов конструктора)"""
+    glm = load_variant('glm')
+    deepseek = load_variant('deepseek')
+    grok_fast = load_variant('grok-fast')
+    grok = load_variant('grok')
+    qwen = load_variant('qwen')
+
+    glm_terrain = glm.Terrain(glm.SCREEN_WIDTH, glm.SCREEN_HEIGHT, glm.SCREEN_HEIGHT - 150)
+    glm_clock = glm.SimClock()
+    rng = random.Random(0)
+    grok_fast_terrain = grok_fast.Terrain()
+    vector = deepseek.Vector2
+    deepseek_clock = deepseek.WallClock()
+
+    return [
+        ('GLM-4.6', glm.Projectile,
+         lambda: (100, 400, random.uniform(-1.5, 0), 800, glm.CARROT_MASS, glm.CARROT_RADIUS,
+                  glm.CARROT_COLOR, glm.CARROT_DAMAGE_COEFF)),
+        ('GLM-4.6', glm.Zombie,
+         lambda: (glm.SCREEN_WIDTH - 50, 500, glm_terrain, glm_clock, rng, random.choice(['normal', 'armored']))),
+        ('DeepSeek-V3.2', deepseek.Projectile,
+         lambda: ('carrot', vector(100, 530), vector(random.uniform(300, 1100), 400), 0.8, 0.3,
+                  rng, deepseek_clock)),
+        ('grok-4-fast-reasoning', grok_fast.Projectile,
+         lambda: (100, 300, random.uniform(5, 8), random.uniform(-8, -5), 3, grok_fast.YELLOW,
+                  grok_fast_terrain, True)),
+        ('grok-4-fast-reasoning', grok_fast.Zombie,
+         lambda: (-20, 300, random.choice([0.5, 1, 1.5]), 50, grok_fast_terrain)),
+        ('Grok-4-0709', grok.Zombie,
+         lambda: (random.choice(['normal', 'conehead', 'fast', 'farmer']), grok.FIELD_WIDTH)),
+        ('Qwen3-Max', qwen.Projectile,
+         lambda: (qwen.CANNON_X, qwen.CANNON_Y, random.uniform(0.3, 1.2), random.choice(['cabbage', 'carrot']))),
+        ('Qwen3-Max', qwen.Zombie,
+         lambda: (random.choice(qwen.zombie_types),)),
+    ]
+
+
+def without_slots(cls):
+    """Копия класса без __slots__: атрибуты хранятся в __dict__, как до пулов"""
+    skip = {'__slots__', '__dict__', '__weakref__', *cls.__slots__}
+    namespace = {name: value for name, value in vars(cls).items() if name not in skip}
+    return type(cls.__name__, cls.__bases__, namespace)
+
+
+def bytes_per_entity(cls, make_args, count=2000):
+    """Средний объем памяти одного объекта вместе с его вложенными объектами"""
+    args = [make_args() for _ in range(count)]
+    items = [None] * count
+    gc.collect()
+    tracemalloc.start()
+    try:
+        before = tracemalloc.get_traced_memory()[0]
+        for i in range(count):
+            items[i] = cls(*args[i])
+        used = tracemalloc.get_traced_memory()[0] - before
+    finally:
+        tracemalloc.stop()
+    return used / count
+
+
+def churn(cls, make_args, pooled, frames=600, burst=20, lifetime=30):
+    """Залпы: каждый кадр создается burst объектов, каждый живет lifetime кадров.
+
+    Возвращает (созданных объектов на кадр после прогрева, секунд).
+    """
+    pool = ObjectPool(cls) if pooled else None
+    buckets = [[] for _ in range(lifetime)]
+    created = 0
+    gc.collect()
+    start = time.perf_counter()
+    for frame in range(frames):
+        if frame == lifetime:
+            # Прогрев закончен: пул заполнен объектами первых lifetime кадров
+            created = pool.created if pool is not None else 0
+        bucket = buckets[frame % lifetime]
+        if pool is not None:
+            for obj in bucket:
+                pool.release(obj)
+        bucket.clear()
+        for _ in range(burst):
+            if pool is not None:
+                bucket.append(pool.acquire(*make_args()))
+            else:
+                bucket.append(cls(*make_args()))
+                created += 1
+    elapsed = time.perf_counter() - start
+
+    if pool is not None:
+        created = pool.created - created
+    return created / (frames - lifetime), elapsed
+
+
+def horde_bytes(horde_cls, zombie_types, count=2000):
+    """Средний объем памяти одной строки орды (все массивы FIELDS вместе)"""
+    kinds = [random.choice(zombie_types) for _ in range(count)]
+    xs = [random.uniform(300, 1250) for _ in range(count)]
+    gc.collect()
+    tracemalloc.start()
+    try:
+        before = tracemalloc.get_traced_memory()[0]
+        horde = horde_cls(capacity=count)
+        horde.add_many(kinds, xs)
+        used = tracemalloc.get_traced_memory()[0] - before
+    finally:
+        tracemalloc.stop()
+    return used / count
+
+
+def horde_churn(horde_cls, zombie_types, frames=600, burst=20, lifetime=30):
+    """Те же залпы, что в churn(), для орды: burst строк в конец, самые старые - compact().
+
+    Возвращает (перевыделений массивов на кадр после прогрева, секунд).
+    """
+    horde = horde_cls()
+    alive = burst * lifetime
+    regrown = 0
+    gc.collect()
+    start = time.perf_counter()
+    for frame in range(frames):
+        if frame == lifetime:
+            regrown = 0  # Прогрев закончен: емкость орды установилась
+        if horde.count >= alive:
+            # Орда хранит строки в порядке появления: старейший залп - первые burst строк
+            keep = np.ones(horde.count, dtype=bool)
+            keep[:burst] = False
+            horde.compact(keep)
+        capacity = len(horde.health)
+        horde.add_many([random.choice(zombie_types) for _ in range(burst)],
+                       [random.uniform(300, 1250) for _ in range(burst)])
+        if len(horde.health) != capacity:
+            regrown += len(horde.FIELDS)
+    elapsed = time.perf_counter() - start
+    return regrown / (frames - lifetime), elapsed
+
+
+def run_entities(args):
+    rows = []
+    for variant, cls, make_args in entity_factories():
+        legacy = without_slots(cls)
+        bytes_before = bytes_per_entity(legacy, make_args)
+        bytes_after = bytes_per_entity(cls, make_args)
+        allocs_before, time_before = churn(legacy, make_args, False, args.frames, args.burst)
+        allocs_after, time_after = churn(cls, make_args, True, args.frames, args.burst)
+        rows.append([
+            variant, cls.__name__,
+            f'{bytes_before:.0f} -> {bytes_after:.0f}',
+            f'{allocs_before:.1f} -> {allocs_after:.1f}',
+            f'{time_before * 1000:.1f} -> {time_after * 1000:.1f}',
+        ])
+    # Зомби DeepSeek - строки ZombieHorde, а не объекты: пул и __slots__ им не нужны,
+    # поэтому в столбце «до» ничего нет
+    deepseek = load_variant('deepseek')
+    zombie_types = list(deepseek.Zombie.STATS)
+    allocs, elapsed = horde_churn(deepseek.ZombieHorde, zombie_types, args.frames, args.burst)
+    rows.append([
+        'DeepSeek-V3.2', 'ZombieHorde',
+        f'— -> {horde_bytes(deepseek.ZombieHorde, zombie_types):.0f}',
+        f'— -> {allocs:.1f}',
+        f'— -> {elapsed * 1000:.1f}',
+    ])
+    print(f'Залпы: {args.burst} объектов за кадр, {args.frames} кадров (до -> после)')
+    print(format_table(
+        ['реализация', 'класс', 'байт/объект', 'аллокаций/кадр', 'время, мс'], rows))
+
+
+# --- Частицы DeepSeek ---
+
+class DictParticles:
+    """Частицы словарями, как их создавал create_explosion_effect до системы частиц"""
+    def __init__(self, capacity, gravity=980, damping=1.5):
+        self.capacity = capacity
+        self.gravity = gravity
+        self.damping = damping
+        self.items = []
+
+    def __len__(self):
+        return len(self.items)
+
+    def emit(self, position, velocities, lifetimes, color):
+        n = min(len(lifetimes), self.capacity - len(self.items))
+        for velocity, lifetime in zip(velocities[:n], lifetimes[:n]):
+            self.items.append({'position': pygame.Vector2(position), 'velocity': pygame.Vector2(velocity),
+                               'lifetime': lifetime, 'max_lifetime': lifetime, 'color': color})
+        return max(n, 0)
+
+    def update(self, dt):
+        damping = max(0.0, 1 - self.damping * dt)
+        alive = []
+        for particle in self.items:
+            particle['velocity'].y += self.gravity * dt
+            particle['velocity'] *= damping
+            particle['position'] += particle['velocity'] * dt
+            particle['lifetime'] -= dt
+            if particle['lifetime'] > 0:
+                alive.append(particle)
+        self.items = alive
+
+    def draw(self, screen):
+        for particle in self.items:
+            pygame.draw.circle(screen, particle['color'], particle['position'], 1)
+
+
+def run_particles(args):
+    deepseek = load_variant('deepseek')
+    pygame.display.init()
+    screen = pygame.display.set_mode((1200, 700))
+    background = screen.copy()
+    background.fill((135, 206, 235))
+    dt = 1 / 60
+    rows = []
+    for name, cls in (('словари', DictParticles), ('ParticleSystem', deepseek.ParticleSystem)):
+        rng = random.Random(0)
+        # Без гравитации и с долгой жизнью: все частицы остаются на экране до конца замера
+        particles = cls(args.count, gravity=0, damping=0)
+        while len(particles) < args.count:
+            position = (rng.uniform(100, 1100), rng.uniform(100, 600))
+            velocities = [(rng.uniform(-20, 20), rng.uniform(-20, 20)) for _ in range(8)]
+            lifetimes = [rng.uniform(1000, 2000) for _ in range(8)]
+            particles.emit(position, velocities, lifetimes, (255, 165, 0))
+        # Сверх емкости ничего не добавляется
+        dropped = 8 - particles.emit((600, 350), [(0, 0)] * 8, [1.0] * 8, (255, 0, 0))
+        update_ms, render_ms = [], []
+        for _ in range(args.frames):
+            start = time.perf_counter()
+            particles.update(dt)
+            middle = time.perf_counter()
+            screen.blit(background, (0, 0))
+            particles.draw(screen)
+            end = time.perf_counter()
+            update_ms.append((middle - start) * 1000)
+            render_ms.append((end - middle) * 1000)
+        rows.append([name, len(particles), dropped,
+                     '/'.join(format_ms(v) for v in percentiles(update_ms)),
+                     '/'.join(format_ms(v) for v in percentiles(render_ms))])
+    print(f'Живых частиц: {args.count}, {args.frames} кадров (рендер включает заливку фона)')
+    print(format_table(['хранение', 'частиц', 'отброшено сверх емкости',
+                        'обновление p50/p95/p99, мс', 'рендер p50/p95/p99, мс'], rows))
+
+
+class SplashTarget:
+    """Зомби для замера урона по площади: только координаты"""
+    __slots__ = ('x', 'y')
+
+    def __init__(self, x, y):
+        self.x = x
+        self.y = y
+
+
+def splash_by_scan(zombies, points, radius, damage, falloff):
+    """Урон по площади до индекса: каждый взрыв перебирает всех зомби"""
+    total = [0.0] * len(zombies)
+    for px, py in points:
+        for i, zombie in enumerate(zombies):
+            dist = math.hypot(zombie.x - px, zombie.y - py)
+            if dist < radius:
+                total[i] += damage * (1 - falloff * dist / radius)
+    return total
+
+
+def splash_one_by_one(zombies, points, radius, damage, falloff):
+    """Индекс строится заново (как в каждом кадре игры), взрывы - по одному"""
+    index = SplashIndex()
+    index.reset(zombies)
+    total = [0.0] * len(zombies)
+    for px, py in points:
+        hit, damages = index.blast(px, py, radius, damage, falloff)
+        for i, value in zip(hit.tolist(), damages.tolist()):
+            total[i] += value
+    return total
+
+
+def splash_batched(zombies, points, radius, damage, falloff):
+    """Индекс строится заново, все взрывы - одним проходом blast_many"""
+    index = SplashIndex()
+    index.reset(zombies)
+    hit, damages = index.blast_many(points, radius, damage, falloff)
+    total = [0.0] * len(zombies)
+    for i, value in zip(hit.tolist(), damages.tolist()):
+        total[i] = value
+    return total
+
+
+def run_splash(args):
+    rng = random.Random(0)
+    # Зомби идут по полосе земли 1200x150, взрывы - среди них
+    zombies = [SplashTarget(rng.uniform(0, 1200), rng.uniform(450, 600)) for _ in range(args.zombies)]
+    points = [(rng.uniform(0, 1200), rng.uniform(450, 600)) for _ in range(args.explosions)]
+    methods = [
+        ('перебор всех зомби', splash_by_scan),
+        ('SplashIndex.blast по одному', splash_one_by_one),
+        ('SplashIndex.blast_many', splash_batched),
+    ]
+    reference = None
+    rows = []
+    for name, method in methods:
+        samples = []
+        for _ in range(args.repeats):
+            start = time.perf_counter()
+            total = method(zombies, points, args.radius, args.damage, args.falloff)
+            samples.append((time.perf_counter() - start) * 1000)
+        if reference is None:
+            reference = total
+        same = all(math.isclose(a, b, abs_tol=1e-9) for a, b in zip(total, reference))
+        rows.append([name, sum(1 for value in total if value), 'да' if same else 'НЕТ',
+                     '/'.join(format_ms(v) for v in percentiles(samples))])
+    print(f'Зомби: {args.zombies}, взрывов: {args.explosions}, радиус {args.radius:g}, '
+          f'урон {args.damage:g}, спад к краю {args.falloff:g}; время включает построение индекса')
+    print(format_table(['способ', 'задето зомби', 'урон как у перебора', 'p50/p95/p99, мс'], rows))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    arena = commands.add_parser('arena', help='сравнение реализаций на общем сценарии')
+    arena.add_argument('--frames', type=int, default=600, help='длина сценария в кадрах')
+    arena.add_argument('--counts', default='10,100,1000,10000',
+                       help='числа сущностей для кривых масштабирования')
+    arena.add_argument('--scale-frames', type=int, default=10,
+                       help='кадров на каждую точку кривой')
+    arena.set_defaults(func=run_arena)
+
+    entities = commands.add_parser('entities', help='память и аллокации сущностей до и после пулов')
+    entities.add_argument('--frames', type=int, default=600)
+    entities.add_argument('--burst', type=int, default=20)
+    entities.set_defaults(func=run_entities)
+
+    particles = commands.add_parser('particles', help='система частиц DeepSeek под нагрузкой')
+    particles.add_argument('--count', type=int, default=10000, help='живых частиц (и емкость)')
+    particles.add_argument('--frames', type=int, default=300)
+    particles.set_defaults(func=run_particles)
+
+    splash = commands.add_parser('splash', help='урон по площади: перебор против индекса SplashIndex')
+    splash.add_argument('--zombies', type=int, default=5000)
+    splash.add_argument('--explosions', type=int, default=100, help='одновременных взрывов')
+    splash.add_argument('--radius', type=float, default=60)
+    splash.add_argument('--damage', type=float, default=15)
+    splash.add_argument('--falloff', type=float, default=0.5, help='доля урона, теряемая к краю радиуса')
+    splash.add_argument('--repeats', type=int, default=20)
+    splash.set_defaults(func=run_splash)
+
+    args = parser.parse_args(argv)
+    args.func(args)
+
+
+if __name__ == '__main__':
+    main()
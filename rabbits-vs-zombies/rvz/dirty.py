@@ -0,0 +1,41 @@
+"""Вывод кадра по «грязным» прямоугольникам вместо полного flip.
+
+Игра рисует подвижные объекты поверх статического фона как обычно и
+сообщает, какие прямоугольники при этом задела. В следующем кадре фон
+восстанавливается только в этих прямоугольниках, а на экран уходят
+области прошлого и текущего кадра через pygame.display.update(rects).
+При программном рендере это дешевле, чем гонять весь кадр 1200x700.
+"""
+import pygame
+
+# Если прямоугольников больше, они объединяются в один: так дешевле
+MAX_RECTS = 128
+
+
+class DirtyRenderer:
+    """Учет прямоугольников, измененных в прошлом кадре"""
+    def __init__(self):
+        self.previous = None  # None - следующий кадр выводится целиком
+
+    def invalidate(self):
+        """Фон изменился: следующий кадр перерисовывается и выводится целиком"""
+        self.previous = None
+
+    def restore(self, screen, background):
+        """Стирает подвижные объекты прошлого кадра, копируя фон только под ними"""
+        if self.previous is None:
+            screen.blit(background, (0, 0))
+            return
+        for rect in self.previous:
+            screen.blit(background, rect, rect)
+
+    def present(self, rects):
+        """Выводит на экран области прошлого и текущего кадра"""
+        rects = [rect for rect in rects if rect]
+        if len(rects) > MAX_RECTS:
+            rects = [rects[0].unionall(rects[1:])]
+        if self.previous is None:
+            pygame.display.flip()
+        else:
+            pygame.display.update(self.previous + rects)
+        self.previous = rects
@@ -0,0 +1,30 @@
+"""Пул объектов со свободным списком для часто создаваемых сущностей"""
+
+
+class ObjectPool:
+    """Свободный список объектов одного класса.
+
+    Вместо создания нового объекта acquire() повторно вызывает __init__ у
+    ранее освобожденного, поэтому снаряды и зомби переиспользуются, а не
+    попадают к сборщику мусора. Класс должен полностью переинициализировать
+    себя в __init__ (обычно это класс с __slots__).
+    """
+    def __init__(self, cls):
+        self.cls = cls
+        self.free = []
+        self.created = 0
+        self.reused = 0
+
+    def acquire(self, *args, **kwargs):
+        """Возвращает инициализированный объект, по возможности из свободного списка"""
+        if self.free:
+            obj = self.free.pop()
+            obj.__init__(*args, **kwargs)
+            self.reused += 1
+            return obj
+        self.created += 1
+        return self.cls(*args, **kwargs)
+
+    def release(self, obj):
+        """Возвращает объект в пул; после этого его нельзя использовать"""
+        self.free.append(obj)
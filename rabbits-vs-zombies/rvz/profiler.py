@@ -0,0 +1,148 @@
+"""Профилировщик кадра по фазам: оверлей по F3 и запись в CSV.
+
+Игра отмечает границы фаз прямо в своем цикле:
+
+    profiler.begin()            # начало кадра (после ожидания clock.tick)
+    handle_events()
+    profiler.lap('events')      # время с прошлой отметки уходит в фазу events
+    ...
+    profiler.end()              # кадр записывается в кольцевой буфер и в CSV
+
+Отметки одной фазы внутри кадра складываются, поэтому несколько шагов
+физики за кадр (фиксированный шаг GLM) дают суммарное время фазы. Вне
+begin()/end() (бенчмарк, повтор без окна) отметки ничего не записывают.
+
+Буфер хранит последние capacity кадров; по нему оверлей показывает
+скользящие p50/p99 каждой фазы и кадра целиком (в мс). CSV пишется
+построчно по мере игры: номер кадра, время фаз и кадра в мс.
+"""
+import argparse
+import csv
+import time
+
+import numpy as np
+import pygame
+
+# Фазы кадра, общие для всех реализаций
+PHASES = ('events', 'aim', 'projectiles', 'collisions', 'zombies', 'garden', 'render')
+
+# Оверлей пересчитывается раз в столько кадров: цифры успевают прочитать,
+# а перцентили по буферу не считаются каждый кадр
+OVERLAY_REFRESH = 15
+
+
+class FrameProfiler:
+    """Время фаз последних capacity кадров в кольцевом буфере numpy"""
+    def __init__(self, phases=PHASES, capacity=600, csv_path=None):
+        self.phases = tuple(phases)
+        self.index = {phase: i for i, phase in enumerate(self.phases)}
+        # Последний столбец - кадр целиком, включая время вне фаз
+        self.samples = np.zeros((capacity, len(self.phases) + 1))
+        self.head = 0
+        self.count = 0
+        self.frames = 0
+        self.current = [0.0] * len(self.phases)
+        self.frame_start = self.mark = time.perf_counter()
+        self.in_frame = False  # Между begin() и end()
+        self.visible = False
+        self.overlay = None
+        self.csv_file = None
+        self.csv = None
+        if csv_path is not None:
+            self.csv_file = open(csv_path, 'w', newline='', encoding='utf-8')
+            self.csv = csv.writer(self.csv_file)
+            self.csv.writerow(['frame', *(f'{phase}_ms' for phase in self.phases), 'frame_ms'])
+
+    def toggle(self):
+        """Показывает или прячет оверлей (клавиша F3)"""
+        self.visible = not self.visible
+        self.overlay = None
+
+    def begin(self):
+        """Начало кадра: счетчики фаз обнуляются"""
+        self.current = [0.0] * len(self.phases)
+        self.frame_start = self.mark = time.perf_counter()
+        self.in_frame = True
+
+    def lap(self, phase):
+        """Время с прошлой отметки добавляется к фазе phase; вне кадра ничего не делает"""
+        if not self.in_frame:
+            return
+        now = time.perf_counter()
+        self.current[self.index[phase]] += now - self.mark
+        self.mark = now
+
+    def end(self):
+        """Конец кадра: строка уходит в буфер и в CSV"""
+        if not self.in_frame:
+            return
+        self.in_frame = False
+        total = time.perf_counter() - self.frame_start
+        row = self.samples[self.head]
+        row[:-1] = self.current
+        row[-1] = total
+        row *= 1000
+        self.head = (self.head + 1) % len(self.samples)
+        self.count = min(self.count + 1, len(self.samples))
+        if self.csv is not None:
+            self.csv.writerow([self.frames, *(f'{value:.4f}' for value in row)])
+        self.frames += 1
+
+    def percentiles(self):
+        """Скользящие p50 и p99 по буферу: массив (2, фазы + кадр) в мс"""
+        if self.count == 0:
+            return np.zeros((2, self.samples.shape[1]))
+        return np.percentile(self.samples[:self.count], (50, 99), axis=0)
+
+    def draw(self, screen, font):
+        """Рисует оверлей в правом нижнем углу, если он включен.
+
+        Возвращает затронутый прямоугольник или None.
+        """
+        if not self.visible:
+            return None
+        if self.overlay is None or self.frames % OVERLAY_REFRESH == 0:
+            self.overlay = self.render_overlay(font)
+        width, height = screen.get_size()
+        return screen.blit(self.overlay, (width - self.overlay.get_width() - 10,
+                                          height - self.overlay.get_height() - 10))
+
+    def render_overlay(self, font, color=(255, 255, 255)):
+        """Таблица «фаза, p50, p99» на полупрозрачной подложке"""
+        p50, p99 = self.percentiles()
+        rows = [('фаза', 'p50', 'p99')]
+        rows += [(phase, f'{median:.2f}', f'{tail:.2f}')
+                 for phase, median, tail in zip(self.phases + ('кадр',), p50, p99)]
+        # Шрифт пропорциональный: столбцы выравниваются по ширине, а не пробелами
+        cells = [[font.render(text, True, color) for text in row] for row in rows]
+        footer = font.render(f'мс, последние {self.count} кадров', True, color)
+        widths = [max(row[i].get_width() for row in cells) + 12 for i in range(3)]
+        line = font.get_linesize()
+        overlay = pygame.Surface((max(sum(widths), footer.get_width()) + 12,
+                                  line * (len(cells) + 1) + 12))
+        overlay.fill((20, 20, 20))
+        overlay.set_alpha(210)
+        y = 6
+        for row in cells:
+            name, median, tail = row
+            overlay.blit(name, (6, y))
+            overlay.blit(median, (6 + widths[0] + widths[1] - 12 - median.get_width(), y))
+            overlay.blit(tail, (6 + sum(widths) - 12 - tail.get_width(), y))
+            y += line
+        overlay.blit(footer, (6, y))
+        return overlay
+
+    def close(self):
+        """Дописывает и закрывает CSV"""
+        if self.csv_file is not None:
+            self.csv_file.close()
+            self.csv_file = None
+            self.csv = None
+
+
+def csv_path_from_argv(argv=None):
+    """Путь из аргумента командной строки --profile-csv или None"""
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--profile-csv', metavar='PATH', help='писать время фаз каждого кадра в CSV')
+    args, _ = parser.parse_known_args(argv)
+    return args.profile_csv
@@ -0,0 +1,205 @@
+"""Детерминированный запуск игр: часы, источники ввода и журнал ввода.
+
+Игра получает seed для своего random.Random, часы и источник ввода. При
+записи журнал сохраняет seed, длительность каждого кадра и события мыши и
+клавиатуры с номерами кадров; при воспроизведении те же данные подаются
+обратно, и партия повторяется бит в бит.
+"""
+import argparse
+import json
+import random
+
+import pygame
+
+# Поля, которые сохраняются для каждого типа события
+EVENT_FIELDS = {
+    'QUIT': (),
+    'MOUSEMOTION': ('pos',),
+    'MOUSEBUTTONDOWN': ('pos', 'button'),
+    'MOUSEBUTTONUP': ('pos', 'button'),
+    'KEYDOWN': ('key',),
+    'KEYUP': ('key',),
+}
+EVENT_TYPES = {name: getattr(pygame, name) for name in EVENT_FIELDS}
+EVENT_NAMES = {event_type: name for name, event_type in EVENT_TYPES.items()}
+
+
+class WallClock:
+    """Реальное время: обертка над pygame.time.Clock с записью длительности кадров"""
+    def __init__(self, log=None):
+        self.clock = pygame.time.Clock()
+        self.log = log
+        self.ticks = 0
+
+    def tick(self, fps=0):
+        """Ждет начала следующего кадра и возвращает его длительность в мс"""
+        ms = self.clock.tick(fps)
+        self.ticks += ms
+        if self.log is not None:
+            self.log.record_tick(ms)
+        return ms
+
+    def get_time(self):
+        """Длительность последнего кадра в мс"""
+        return self.clock.get_time()
+
+    def get_ticks(self):
+        """Миллисекунды игрового времени: сумма длительностей прошедших кадров.
+
+        В отличие от pygame.time.get_ticks() это значение восстанавливается
+        при повторе из журнала.
+        """
+        return self.ticks
+
+
+class SimClock:
+    """Симулированные часы: время идет только вызовами tick() и advance()"""
+    def __init__(self, step_ms=1000 / 60):
+        self.step_ms = step_ms
+        self.ticks = 0.0
+        self.last_ms = 0
+
+    def tick(self, fps=0):
+        """Сдвигает время на один кадр без ожидания и возвращает его длительность"""
+        self.last_ms = self.step_ms
+        self.ticks += self.step_ms
+        return self.step_ms
+
+    def advance(self, dt):
+        """Сдвигает время на dt секунд"""
+        self.ticks += dt * 1000
+
+    def get_time(self):
+        """Длительность последнего кадра в мс"""
+        return self.last_ms
+
+    def get_ticks(self):
+        """Аналог pygame.time.get_ticks() для симулированного времени"""
+        return int(self.ticks)
+
+
+class ReplayClock(SimClock):
+    """Часы, которые повторяют длительности кадров из журнала"""
+    def __init__(self, log):
+        super().__init__()
+        self.durations = (ms for ms, count in log.ticks for _ in range(count))
+
+    def tick(self, fps=0):
+        # После конца записи кадры идут с шагом по умолчанию
+        ms = next(self.durations, self.step_ms)
+        self.last_ms = ms
+        self.ticks += ms
+        return ms
+
+
+class PygameInput:
+    """Живой ввод из очереди событий pygame, при необходимости с записью в журнал"""
+    def __init__(self, log=None):
+        self.log = log
+
+    def events_for(self, frame):
+        """Возвращает события, накопившиеся к кадру frame"""
+        events = pygame.event.get()
+        if self.log is not None:
+            self.log.record_events(frame, events)
+        return events
+
+
+class InputLog:
+    """Компактный журнал ввода.
+
+    Хранит только кадры, в которых были события, и только нужные поля
+    событий; длительности кадров хранятся сжатыми сериями [мс, повторов].
+    Журнал сам является источником ввода: events_for(frame) возвращает
+    записанные события, поэтому его можно передать в игру для повтора или
+    составить вручную через add() как сценарий.
+    """
+    def __init__(self, seed=None):
+        self.seed = seed
+        self.frames = {}
+        self.ticks = []
+
+    def add(self, frame, event):
+        """Добавляет одно событие pygame к кадру frame"""
+        name = EVENT_NAMES.get(event.type)
+        if name is None:
+            return
+        fields = {field: getattr(event, field) for field in EVENT_FIELDS[name]}
+        self.frames.setdefault(frame, []).append((name, fields))
+
+    def record_events(self, frame, events):
+        """Записывает все значимые события кадра"""
+        for event in events:
+            self.add(frame, event)
+
+    def record_tick(self, ms):
+        """Записывает длительность очередного кадра"""
+        if self.ticks and self.ticks[-1][0] == ms:
+            self.ticks[-1][1] += 1
+        else:
+            self.ticks.append([ms, 1])
+
+    def events_for(self, frame):
+        """Восстанавливает события pygame для кадра frame"""
+        return [pygame.event.Event(EVENT_TYPES[name], fields)
+                for name, fields in self.frames.get(frame, ())]
+
+    def save(self, path):
+        """Сохраняет журнал в JSON"""
+        data = {
+            'seed': self.seed,
+            'ticks': self.ticks,
+            'events': [[frame, name, fields]
+                       for frame in sorted(self.frames)
+                       for name, fields in self.frames[frame]],
+        }
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(data, f, separators=(',', ':'))
+
+    @classmethod
+    def load(cls, path):
+        """Загружает журнал из JSON"""
+        with open(path, encoding='utf-8') as f:
+            data = json.load(f)
+        log = cls(data['seed'])
+        log.ticks = [list(run) for run in data['ticks']]
+        for frame, name, fields in data['events']:
+            if 'pos' in fields:
+                fields['pos'] = tuple(fields['pos'])
+            log.frames.setdefault(frame, []).append((name, fields))
+        return log
+
+
+class Session:
+    """Seed, часы и источник ввода для одного запуска игры.
+
+    Без журнала это живая игра с реальным временем; record_path включает
+    запись, replay_path — повтор (seed берется из журнала).
+    """
+    def __init__(self, seed=None, record_path=None, replay_path=None):
+        self.record_path = record_path
+        if replay_path:
+            self.log = InputLog.load(replay_path)
+            self.seed = self.log.seed
+            self.clock = ReplayClock(self.log)
+            self.input = self.log
+        else:
+            self.seed = seed if seed is not None else random.randrange(2 ** 32)
+            self.log = InputLog(self.seed) if record_path else None
+            self.clock = WallClock(self.log)
+            self.input = PygameInput(self.log)
+
+    @classmethod
+    def from_argv(cls, argv=None):
+        """Создает сессию из аргументов командной строки --seed/--record/--replay"""
+        parser = argparse.ArgumentParser()
+        parser.add_argument('--seed', type=int, help='seed генератора случайных чисел')
+        parser.add_argument('--record', metavar='PATH', help='записать ввод в журнал')
+        parser.add_argument('--replay', metavar='PATH', help='повторить партию из журнала')
+        args, _ = parser.parse_known_args(argv)
+        return cls(args.seed, args.record, args.replay)
+
+    def close(self):
+        """Сохраняет журнал, если шла запись"""
+        if self.record_path and self.log is not None:
+            self.log.save(self.record_path)
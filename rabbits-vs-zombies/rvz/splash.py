@@ -0,0 +1,107 @@
+"""Урон по площади: все зомби в радиусе r от точки по индексу на оси x.
+
+Индекс сортирует зомби по x один раз за кадр - при первом запросе после
+reset(). Запрос двумя бинарными поисками находит окно [x - r, x + r] и
+проверяет расстояние только внутри него, а урон со спадом к краю
+считается для всего окна одной операцией numpy. blast_many() так же за
+один проход обрабатывает сразу много взрывов и складывает урон по зомби.
+
+Зомби - объекты игры с атрибутами x и y. Индекс возвращает их номера в
+списке игры (по возрастанию) и урон; применяет урон сама игра, потому что
+правила у реализаций разные: замедление, флаги alive, сообщения.
+"""
+import numpy as np
+
+
+class SplashIndex:
+    """Зомби кадра, отсортированные по x"""
+    def __init__(self):
+        self.zombies = []
+        self.built = False
+        self.keys = np.empty(0)  # x на момент построения, по возрастанию
+        # Текущие координаты в порядке keys (отдельные массивы: выборка по
+        # номерам строк из одномерного массива заметно быстрее, чем из (N, 2))
+        self.xs = np.empty(0)
+        self.ys = np.empty(0)
+        self.order = np.empty(0, dtype=np.intp)  # Строка индекса -> номер зомби в списке
+        self.rank = np.empty(0, dtype=np.intp)  # Номер зомби в списке -> строка индекса
+        # Насколько зомби сдвинулись после построения: окно поиска расширяется
+        # на столько же, поэтому сдвинутые не теряются
+        self.slack = 0.0
+
+    def reset(self, zombies):
+        """Новый кадр: индекс будет построен по списку zombies при первом запросе"""
+        self.zombies = zombies
+        self.built = False
+
+    def build(self):
+        n = len(self.zombies)
+        xs = np.fromiter((zombie.x for zombie in self.zombies), dtype=float, count=n)
+        ys = np.fromiter((zombie.y for zombie in self.zombies), dtype=float, count=n)
+        self.order = np.argsort(xs, kind='stable')
+        self.rank = np.empty(n, dtype=np.intp)
+        self.rank[self.order] = np.arange(n)
+        self.xs = xs[self.order]
+        self.ys = ys[self.order]
+        self.keys = self.xs.copy()
+        self.slack = 0.0
+        self.built = True
+
+    def moved(self, i):
+        """Зомби с номером i сдвинулся (например, отброшен попаданием)"""
+        if not self.built:
+            return  # Индекс еще не построен и прочтет новые координаты сам
+        zombie = self.zombies[i]
+        row = self.rank[i]
+        self.xs[row] = zombie.x
+        self.ys[row] = zombie.y
+        self.slack = max(self.slack, abs(zombie.x - self.keys[row]))
+
+    def window(self, x, radius):
+        return (np.searchsorted(self.keys, x - radius - self.slack, 'left'),
+                np.searchsorted(self.keys, x + radius + self.slack, 'right'))
+
+    def query(self, x, y, radius):
+        """Номера зомби (по возрастанию) строго ближе radius к (x, y) и расстояния до них"""
+        if not self.built:
+            self.build()
+        lo, hi = self.window(x, radius)
+        dx = self.xs[lo:hi] - x
+        dy = self.ys[lo:hi] - y
+        dist2 = dx * dx + dy * dy
+        inside = np.flatnonzero(dist2 < radius * radius)
+        indices = self.order[lo:hi][inside]
+        by_index = np.argsort(indices)
+        return indices[by_index], np.sqrt(dist2[inside][by_index])
+
+    def blast(self, x, y, radius, damage, falloff=0.0):
+        """Взрыв в (x, y): номера задетых зомби и урон каждому.
+
+        Урон линейно спадает от damage в центре до damage * (1 - falloff)
+        на краю; falloff=0 - одинаковый урон во всем радиусе.
+        """
+        indices, dist = self.query(x, y, radius)
+        return indices, damage * (1 - falloff * dist / radius)
+
+    def blast_many(self, points, radius, damage, falloff=0.0):
+        """Много взрывов за один проход: номера задетых зомби и суммарный урон каждому"""
+        if not self.built:
+            self.build()
+        points = np.asarray(points, dtype=float).reshape(-1, 2)
+        lo, hi = self.window(points[:, 0], radius)
+        counts = hi - lo
+        # Строки всех окон подряд: для взрыва k - lo[k], lo[k] + 1, ..., hi[k] - 1
+        blasts = np.repeat(np.arange(len(points)), counts)
+        starts = np.cumsum(counts) - counts
+        rows = np.arange(counts.sum()) - np.repeat(starts - lo, counts)
+        dx = self.xs[rows] - points[blasts, 0]
+        dy = self.ys[rows] - points[blasts, 1]
+        dist2 = dx * dx + dy * dy
+        inside = dist2 < radius * radius
+        rows = rows[inside]
+        damages = damage * (1 - falloff * np.sqrt(dist2[inside]) / radius)
+        total = np.bincount(rows, weights=damages, minlength=len(self.keys))
+        hit = np.bincount(rows, minlength=len(self.keys)) > 0
+        indices = self.order[hit]
+        by_index = np.argsort(indices)
+        return indices[by_index], total[hit][by_index]
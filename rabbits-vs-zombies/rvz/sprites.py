@@ -0,0 +1,47 @@
+"""Атлас спрайтов: заранее отрисованные кадры на одной поверхности.
+
+Неизменная часть объекта (тело зомби в данном кадре анимации) рисуется
+примитивами один раз при создании атласа, после чего вывод объекта на
+экран - один blit из нужной ячейки, сколько бы примитивов ни было в рисунке.
+"""
+import math
+
+import pygame
+
+
+class SpriteAtlas:
+    """Ячейки одинакового размера cell_size на общей поверхности.
+
+    painter(surface, key, anchor) рисует спрайт для ключа key на чистой
+    ячейке так, чтобы опорная точка объекта (обычно его координаты в игре)
+    оказалась в точке anchor ячейки. При выводе anchor совмещается с
+    переданной позицией.
+
+    Прозрачный фон задается цветовым ключом, а не альфа-каналом: примитивы
+    pygame.draw рисуют без сглаживания, а blit с RLE-ключом заметно дешевле
+    попиксельного смешивания. Цвет KEY не должен встречаться в рисунке.
+    """
+    KEY = (255, 0, 255)
+
+    def __init__(self, keys, cell_size, anchor, painter, columns=8):
+        keys = list(keys)
+        width, height = cell_size
+        columns = max(1, min(columns, len(keys)))
+        rows = math.ceil(len(keys) / columns)
+        self.anchor = anchor
+        self.surface = pygame.Surface((width * columns, height * rows))
+        self.surface.fill(self.KEY)
+        self.rects = {}
+        for i, key in enumerate(keys):
+            rect = pygame.Rect((i % columns) * width, (i // columns) * height, width, height)
+            painter(self.surface.subsurface(rect), key, anchor)
+            self.rects[key] = rect
+        # Если окно уже открыто, пиксели приводятся к его формату: blit быстрее
+        if pygame.display.get_surface() is not None:
+            self.surface = self.surface.convert()
+        self.surface.set_colorkey(self.KEY, pygame.RLEACCEL)
+
+    def blit(self, screen, key, pos):
+        """Выводит спрайт key опорной точкой в pos; возвращает затронутый прямоугольник"""
+        return screen.blit(self.surface, (int(pos[0]) - self.anchor[0], int(pos[1]) - self.anchor[1]),
+                           self.rects[key])
@@ -0,0 +1,55 @@
+"""Кэш отрисованного текста и общий реестр шрифтов"""
+from collections import OrderedDict
+
+import pygame
+
+
+class FontRegistry:
+    """Реестр шрифтов: каждый шрифт создается один раз за время работы игры"""
+    def __init__(self):
+        self.fonts = {}
+
+    def get(self, name, size, sysfont=False):
+        """Возвращает шрифт, создавая его только при первом запросе"""
+        key = (name, size, sysfont)
+        font = self.fonts.get(key)
+        if font is None:
+            if sysfont:
+                font = pygame.font.SysFont(name, size)
+            else:
+                font = pygame.font.Font(name, size)
+            self.fonts[key] = font
+        return font
+
+
+class TextCache:
+    """LRU-кэш поверхностей с текстом по ключу (шрифт, строка, цвет, сглаживание).
+
+    Строка растеризуется заново только когда она изменилась; давно не
+    использованные поверхности вытесняются при превышении capacity.
+    """
+    def __init__(self, capacity=256):
+        self.capacity = capacity
+        self.surfaces = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def render(self, font, text, color, antialias=True):
+        """Аналог font.render(text, antialias, color) с кэшированием"""
+        key = (font, text, tuple(color), antialias)
+        surface = self.surfaces.get(key)
+        if surface is not None:
+            self.surfaces.move_to_end(key)
+            self.hits += 1
+            return surface
+
+        self.misses += 1
+        surface = font.render(text, antialias, color)
+        self.surfaces[key] = surface
+        if len(self.surfaces) > self.capacity:
+            self.surfaces.popitem(last=False)
+        return surface
+
+    def clear(self):
+        """Удаляет все поверхности из кэша"""
+        self.surfaces.clear()
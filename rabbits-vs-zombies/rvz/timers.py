@@ -0,0 +1,125 @@
+"""Иерархическое колесо таймеров игрового времени.
+
+Вместо того чтобы каждый компонент копил свой float-таймер в каждом
+кадре, он один раз регистрирует обратный вызов: разовый (after) или
+периодический (every). Время делится на тики по resolution секунд.
+Таймер со сроком меньше 256 тиков лежит в ячейке нижнего колеса, более
+далекий - в ячейке колеса уровнем выше, где одна ячейка покрывает 256
+ячеек нижнего. Когда стрелка нижнего колеса проходит полный круг,
+очередная ячейка верхнего раскладывается вниз.
+
+Шаг тика - проверка одной ячейки; работа сверх этого пропорциональна
+числу сработавших таймеров, а не числу существующих. Периодический
+таймер переставляется от своего срока, а не от момента срабатывания,
+поэтому не накапливает дрейф и не теряет срабатываний при неровном dt.
+Таймеры с одинаковым сроком срабатывают в порядке регистрации.
+"""
+import math
+
+SLOT_BITS = 8
+SLOTS = 1 << SLOT_BITS
+MASK = SLOTS - 1
+
+# Погрешность перевода секунд в тики: 5.0 / (1 / 240) не должно стать 1200.0000001
+EPSILON = 1e-6
+
+
+class Timer:
+    """Зарегистрированный обратный вызов; cancel() снимает его"""
+    __slots__ = ('deadline', 'order', 'tick', 'interval', 'callback', 'args', 'active')
+
+    def __init__(self, deadline, order, interval, callback, args):
+        self.deadline = deadline
+        self.order = order
+        self.tick = 0
+        self.interval = interval
+        self.callback = callback
+        self.args = args
+        self.active = True
+
+    def cancel(self):
+        # Снятый таймер остается в ячейке и пропускается, когда до нее дойдет стрелка
+        self.active = False
+
+
+class TimerWheel:
+    """Колесо таймеров: levels колес по 256 ячеек, тик - resolution секунд.
+
+    Горизонт планирования - 256 ** levels тиков (при 1/240 с и четырех
+    уровнях - больше 200 суток игрового времени).
+    """
+    def __init__(self, resolution=1 / 240, levels=4):
+        self.resolution = resolution
+        self.now = 0.0
+        self.tick = 0  # Последний обработанный тик
+        self.wheels = [[[] for _ in range(SLOTS)] for _ in range(levels)]
+        self.registered = 0  # Счетчик регистраций: порядок таймеров с одним сроком
+
+    def after(self, delay, callback, *args):
+        """Вызовет callback(*args) через delay секунд игрового времени"""
+        self.registered += 1
+        return self.add(Timer(self.now + delay, self.registered, None, callback, args))
+
+    def every(self, interval, callback, *args):
+        """Будет вызывать callback(*args) каждые interval секунд, первый раз через interval"""
+        if interval <= 0:
+            raise ValueError('interval должен быть положительным')
+        self.registered += 1
+        return self.add(Timer(self.now + interval, self.registered, interval, callback, args))
+
+    def add(self, timer):
+        # Таймер срабатывает в первом тике, время которого не раньше срока;
+        # просроченный - в ближайшем следующем тике
+        timer.tick = max(math.ceil(timer.deadline / self.resolution - EPSILON), self.tick + 1)
+        self.place(timer)
+        return timer
+
+    def place(self, timer):
+        delta = timer.tick - self.tick
+        for level, wheel in enumerate(self.wheels):
+            if delta < 1 << (SLOT_BITS * (level + 1)):
+                wheel[(timer.tick >> (SLOT_BITS * level)) & MASK].append(timer)
+                return
+        raise ValueError(f'срок {timer.deadline} с за горизонтом колеса таймеров')
+
+    def cascade(self, level):
+        """Раскладывает текущую ячейку колеса level по нижним колесам"""
+        index = (self.tick >> (SLOT_BITS * level)) & MASK
+        wheel = self.wheels[level]
+        timers, wheel[index] = wheel[index], []
+        for timer in timers:
+            if timer.active:
+                self.place(timer)
+
+    def advance(self, dt):
+        """Продвигает время на dt секунд и вызывает наступившие таймеры по порядку сроков"""
+        self.now += dt
+        target = math.floor(self.now / self.resolution + EPSILON)
+        wheel = self.wheels[0]
+        while self.tick < target:
+            self.tick += 1
+            index = self.tick & MASK
+            if index == 0:
+                # Стрелка прошла круг: следующая ячейка верхнего колеса (и выше,
+                # если и там круг) раскладывается вниз
+                level = 1
+                while level < len(self.wheels):
+                    self.cascade(level)
+                    if (self.tick >> (SLOT_BITS * level)) & MASK:
+                        break
+                    level += 1
+            timers = wheel[index]
+            if not timers:
+                continue
+            wheel[index] = []
+            if len(timers) > 1:
+                timers.sort(key=lambda timer: (timer.deadline, timer.order))
+            for timer in timers:
+                if not timer.active:
+                    continue
+                if timer.interval is None:
+                    timer.active = False
+                else:
+                    timer.deadline += timer.interval
+                    self.add(timer)
+                timer.callback(*timer.args)
@@ -0,0 +1,510 @@
+"""Турнир реализаций «Кролики против зомби»: тысячи партий на всех ядрах.
+
+Запуск из каталога rabbits-vs-zombies:
+
+    python -m rvz.tournament --games 1000 --seconds 120
+    python -m rvz.tournament --variants glm,qwen --games 200 --out results.jsonl
+
+Каждая партия - отдельная задача ProcessPoolExecutor (по процессу на ядро):
+игра с seed, без окна, на симулированных часах, а играет бот своей
+реализации: перед каждым кадром он смотрит на состояние игры и добавляет в
+журнал ввода события этого кадра (наводит мышь на ближайшего к кролику
+зомби и стреляет тем, что есть); в консольной Grok-4-0709 бот раз в ход
+выбирает команду. Партии не ждут реального времени и не зависят друг от
+друга. Результаты приходят по мере готовности (и пишутся в JSONL, если
+задан --out), а в конце сводятся в таблицу со средними и 95%
+доверительными интервалами.
+
+Партия заканчивается, когда первый зомби дошел до кролика, или по
+истечении --seconds игрового времени. Выживание - игровое время до этого
+момента, убийства - зомби, погибшие от снарядов, цена кадра - среднее
+время логики кадра (с --render - логики и рендера) в мс, без времени
+бота. Реализации, в
+которых убить зомби нельзя при любой игре (см. NO_KILLS), в столбце
+убийств не сравниваются. У Grok-4-0709 пушка бьет лишь на 10-12 м, а
+зомби выходят со 100 м и за первые 60 с до нее не доходят: ее убийства
+имеют смысл при --seconds от 80.
+"""
+import abc
+import argparse
+import asyncio
+import contextlib
+import itertools
+import json
+import math
+import os
+import random
+import statistics
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+os.environ.setdefault('SDL_AUDIODRIVER', 'dummy')
+
+import pygame
+
+from rvz.bench import DeepSeekRunner, GLMRunner, GrokFastRunner, QwenRunner, format_table
+from rvz.replay import InputLog
+from rvz.variants import load_variant
+
+FPS = 60  # Шаг SimClock у всех pygame-реализаций в турнире
+
+NAMES = {
+    'glm': 'GLM-4.6',
+    'deepseek': 'DeepSeek-V3.2',
+    'grok-fast': 'grok-4-fast-reasoning',
+    'qwen': 'Qwen3-Max',
+    'grok': 'Grok-4-0709',
+}
+
+# Реализации, где снаряд не может убить зомби ни при какой игре, и почему.
+# Их убийства - всегда 0, поэтому в таблице вместо них прочерк
+NO_KILLS = {
+    'grok-fast': 'шаг физики снаряда - dt кадра в мс: при 60 FPS снаряд за первый кадр уходит в землю',
+    'qwen': 'огород сажает овощи, только когда их уже больше трех, а стартовый запас - ноль: стрелять нечем',
+}
+
+
+class ReleaseCounter:
+    """Считает зомби, которых игра вернула в пул: убитых и дошедших до кролика.
+
+    Оборачивает pool.release конкретного экземпляра игры; killed(zombie) и
+    breached(zombie) решают, почему зомби покинул поле.
+    """
+    def __init__(self, pool, killed, breached=None):
+        self.kills = 0
+        self.breached = False
+        release = pool.release
+
+        def counting_release(zombie):
+            if killed(zombie):
+                self.kills += 1
+            elif breached is not None and breached(zombie):
+                self.breached = True
+            release(zombie)
+
+        pool.release = counting_release
+
+
+class Player(abc.ABC):
+    """Бот pygame-реализации: играет через журнал ввода, как человек у окна.
+
+    Перед кадром frame play_frames вызывает act(frame). Раз в PERIOD кадров
+    бот выбирает цель - ближайшего к кролику зомби с упреждением на время
+    полета - и наводит на нее мышь; через SETTLE кадров, когда ствол
+    довернулся, стреляет тем, что есть. Состояние игры бот только читает.
+    """
+    PERIOD = 20
+    SETTLE = 6
+
+    def __init__(self, log):
+        self.log = log
+        self.target = None
+
+    def act(self, frame):
+        phase = frame % self.PERIOD
+        if phase == 0:
+            self.target = self.aim_point()
+            if self.target is not None:
+                self.send(frame, pygame.MOUSEMOTION, pos=self.target)
+        elif phase == self.SETTLE and self.target is not None:
+            self.fire(frame, self.target)
+
+    def send(self, frame, event_type, **fields):
+        self.log.add(frame, pygame.event.Event(event_type, **fields))
+
+    def click(self, frame, pos, button):
+        self.send(frame, pygame.MOUSEBUTTONDOWN, pos=pos, button=button)
+        self.send(frame, pygame.MOUSEBUTTONUP, pos=pos, button=button)
+
+    @abc.abstractmethod
+    def aim_point(self):
+        """Точка прицеливания (x, y) в пикселях или None, если целиться не в кого"""
+
+    @abc.abstractmethod
+    def fire(self, frame, pos):
+        """Выстрел в кадре frame по точке pos тем, что есть"""
+
+
+class GLMPlayer(Player):
+    """GLM-4.6: автоприцел (A), капуста левой кнопкой, морковь правой, сбор урожая пробелом"""
+    FLIGHT_SPEED = 500  # Средняя скорость снаряда по горизонтали для упреждения, пикс/с
+
+    def __init__(self, log, game):
+        super().__init__(log)
+        self.game = game
+        self.send(0, pygame.KEYDOWN, key=pygame.K_a)
+
+    def aim_point(self):
+        zombies = [z for z in self.game.zombies if z.active]
+        if not zombies:
+            return None
+        cannon = self.game.cannon
+        zombie = min(zombies, key=lambda z: abs(z.x - cannon.x))
+        flight = abs(zombie.x - cannon.x) / self.FLIGHT_SPEED
+        x = zombie.x - math.copysign(zombie.speed * flight, zombie.x - cannon.x)
+        return round(x), round(self.game.terrain.get_height_at(x) - zombie.size)
+
+    def fire(self, frame, pos):
+        inventory = self.game.inventory
+        if inventory['cabbage'] > 0:
+            self.click(frame, pos, 1)
+        elif inventory['carrot'] > 0:
+            self.click(frame, pos, 3)
+        else:
+            self.send(frame, pygame.KEYDOWN, key=pygame.K_SPACE)
+
+
+class DeepSeekPlayer(Player):
+    """DeepSeek-V3.2: автоприцел (A), капуста левой кнопкой, морковь правой; урожай собирается сам"""
+    FLIGHT_TIME = 1.5  # Время полета для упреждения, с
+    CANNON_X = 100  # x точки вылета снаряда (start_pos в shoot_cabbage)
+
+    def __init__(self, log, game):
+        super().__init__(log)
+        self.game = game
+        self.send(0, pygame.KEYDOWN, key=pygame.K_a)
+
+    def aim_point(self):
+        zombies = self.game.zombies
+        if zombies.count == 0:
+            return None
+        i = int(zombies.pos[:zombies.count, 0].argmin())
+        x, y = zombies.pos[i] + zombies.vel[i] * self.FLIGHT_TIME
+        if x <= self.CANNON_X:
+            return None  # Зомби уже у кролика; клик в точку вылета игра не переносит
+        return round(x), round(y)
+
+    def fire(self, frame, pos):
+        if self.game.cabbages > 0:
+            self.click(frame, pos, 1)
+        elif self.game.carrots > 0:
+            self.click(frame, pos, 3)
+
+
+class GrokFastPlayer(Player):
+    """grok-4-fast-reasoning: зомби идут слева; стрельба левой кнопкой, когда огород созрел.
+
+    Пока урожая нет, бот держит кнопку над огородом: уход ускоряет рост.
+    """
+    def __init__(self, log, game):
+        super().__init__(log)
+        self.game = game
+        self.caring = False
+
+    def act(self, frame):
+        garden = self.game.garden
+        pos = (garden.x, garden.y)
+        if not garden.cabbage_ready:
+            if not self.caring:
+                self.send(frame, pygame.MOUSEBUTTONDOWN, pos=pos, button=1)
+                self.caring = True
+            return
+        if self.caring:
+            self.send(frame, pygame.MOUSEBUTTONUP, pos=pos, button=1)
+            self.caring = False
+        super().act(frame)
+
+    def aim_point(self):
+        zombies = self.game.zombies
+        if not zombies:
+            return None
+        zombie = max(zombies, key=lambda z: z.x)
+        return round(zombie.x), round(zombie.y)
+
+    def fire(self, frame, pos):
+        if self.game.garden.cabbage_ready:
+            self.click(frame, pos, 1)
+
+
+class QwenPlayer(Player):
+    """Qwen3-Max: выстрел правой кнопкой, колесо выбирает капусту (4) или морковь (5)"""
+    FLIGHT_TIME = 1.0  # Время полета для упреждения, с
+
+    def __init__(self, log, sim, module):
+        super().__init__(log)
+        self.sim = sim
+        self.module = module
+
+    def aim_point(self):
+        zombies = [z for z in self.sim.zombies if z.alive]
+        if not zombies:
+            return None
+        zombie = min(zombies, key=lambda z: z.x)
+        return round(zombie.x - zombie.speed * 60 * self.FLIGHT_TIME), round(zombie.y)
+
+    def fire(self, frame, pos):
+        sim = self.sim
+        if sim.cabbage_count > 0:
+            self.click(frame, pos, 4)
+        elif sim.carrot_count > 0:
+            self.click(frame, pos, 5)
+        else:
+            return
+        self.click(frame, pos, 3)
+
+
+# Партии pygame-реализаций: (runner, бот, убийства(), зомби дошел()).
+# runner - обертка из бенчмарка арены с шагом update() и кадром render(),
+# ввод которой - пустой журнал, заполняемый ботом по ходу партии
+
+def glm_game(seed):
+    log = InputLog(seed)
+    runner = GLMRunner(log, seed)
+    game = runner.game
+    counter = ReleaseCounter(game.zombie_pool, lambda zombie: zombie.health <= 0)
+    return runner, GLMPlayer(log, game), lambda: counter.kills, lambda: game.game_over
+
+
+def deepseek_game(seed):
+    log = InputLog(seed)
+    runner = DeepSeekRunner(log, seed)
+    game = runner.game
+    zombies = game.zombies
+
+    def breached():
+        # Зомби у левого края атакует базу
+        return bool((zombies.pos[:zombies.count, 0] < 50).any())
+
+    return (runner, DeepSeekPlayer(log, game),
+            lambda: game.zombie_spawner.zombies_spawned - zombies.count, breached)
+
+
+def grok_fast_game(seed):
+    log = InputLog(seed)
+    runner = GrokFastRunner(log, seed)
+    counter = ReleaseCounter(runner.game.zombie_pool, lambda zombie: zombie.health <= 0)
+    # Дошедший зомби завершает игру через sys.exit() - это ловит play_frames
+    return runner, GrokFastPlayer(log, runner.game), lambda: counter.kills, lambda: False
+
+
+def qwen_game(seed):
+    log = InputLog(seed)
+    runner = QwenRunner(log, seed)
+    counter = ReleaseCounter(runner.sim.zombie_pool, lambda zombie: zombie.hp <= 0,
+                             lambda zombie: zombie.x < 0)
+    return (runner, QwenPlayer(log, runner.sim, runner.module),
+            lambda: counter.kills, lambda: counter.breached)
+
+
+GAMES = {
+    'glm': glm_game,
+    'deepseek': deepseek_game,
+    'grok-fast': grok_fast_game,
+    'qwen': qwen_game,
+}
+
+
+def play_frames(seed, seconds, render, make_game):
+    """Партия pygame-реализации кадр за кадром до прорыва или конца времени"""
+    frames = int(seconds * FPS)
+    runner, player, kills, breached = make_game(seed)
+    clock = time.perf_counter
+    cost = 0.0
+    played = 0
+    over = False
+    for frame in range(frames):
+        player.act(frame)  # Бот не входит в цену кадра
+        start = clock()
+        try:
+            runner.update()
+            if render and runner.renders:
+                runner.render()
+        except SystemExit:
+            over = True  # grok-4-fast-reasoning так сообщает о конце игры
+        cost += clock() - start
+        played += 1
+        if over or breached():
+            over = True
+            break
+    return {
+        'survival': played / FPS,
+        'kills': kills(),
+        'breached': over,
+        'frame_ms': cost / played * 1000,
+    }
+
+
+class GrokPlayer:
+    """Бот консольной игры Grok-4-0709: одна команда за ход по текущему состоянию.
+
+    Пушка бьет лишь на 10-12 м, а сильнее всего - пологим выстрелом под
+    самый дом: снаряд падает там почти на полной скорости, а урон равен
+    импульсу. Поэтому бот держит ствол в засаде - в середине диапазона
+    пологих углов, где раскачка точку падения почти не сдвигает, - и
+    стреляет, когда ближайший зомби к падению снаряда окажется в радиусе
+    поражения: морковью еще на подходе, капустой - у самого дома.
+    Остальные ходы он поливает самую подросшую грядку.
+    """
+    # Доля радиуса поражения, в которую должна попасть точка падения
+    MARGIN = 0.5
+    # Разброс точки падения (м), при котором угол еще считается засадным
+    SPREAD = 0.5
+
+    def __init__(self, game, module):
+        self.game = game
+        self.m = module
+        self.spent = 0.0  # Время на выбор команд, с: в цену хода игры не входит
+
+    def commands(self, turns):
+        return [self.command] * turns
+
+    def command(self):
+        start = time.perf_counter()
+        line = self.decide()
+        self.spent += time.perf_counter() - start
+        return line
+
+    def decide(self):
+        m, cannon, garden = self.m, self.game.cannon, self.game.garden
+        table = m.impact_table(cannon.speed, self.game.landscape)
+        rows = [row for row in table.sweep() if 0 < row[0] < 90]
+        flat = list(itertools.takewhile(lambda row: abs(row[1] - rows[0][1]) < self.SPREAD, rows))
+        angle, ambush_x, _ = flat[len(flat) // 2]
+        impact_x, _, frames = table.impact(cannon.angle)
+        if abs(impact_x - ambush_x) >= self.SPREAD:
+            # Раскачка увела ствол: наводим заново, учитывая ветер и первый шаг update_aim
+            sway = math.sin(1 / 2) * (1 / 10)
+            return f"aim {angle - cannon.wind - sway:.3f}"
+
+        zombie = min(self.game.zombies, key=lambda z: z.position, default=None)
+        if zombie is not None:
+            # Где будет зомби к падению: за полет он успевает сделать столько ходов
+            turns = int(frames * m.FLIGHT_FRAME_TIME // m.TURN_TIME)
+            miss = abs(impact_x - (zombie.position - zombie.speed * turns))
+            ready = {bed["type"] for bed in garden.beds if bed["ready"]}
+            # Капуста бьет сильнее, морковь (радиус больше) - еще на подходе
+            for ammo, radius in (("cabbage", 2), ("carrot", 10)):  # Радиусы как в Game.hit
+                if ammo in ready and miss < radius * self.MARGIN:
+                    return f"shoot {ammo}"
+        growing = [i for i, bed in enumerate(garden.beds) if not bed["ready"]]
+        if not growing:
+            return ""
+        return f"water {max(growing, key=lambda i: garden.beds[i]['growth'])}"
+
+
+def play_grok(seed, seconds):
+    """Партия Grok-4-0709 в быстром режиме: команды бота, виртуальное время"""
+    m = load_variant('grok')
+    random.seed(seed)  # Игра пользуется общим генератором random
+    rng = random.Random(seed)
+    game = m.Game(rng.choice(["speedy", "strong", "farmer"]), m.VirtualClock())
+    player = GrokPlayer(game, m)
+    start = time.perf_counter()
+    asyncio.run(game.run(player.commands(int(seconds / m.SCRIPT_COMMAND_TIME))))
+    elapsed = time.perf_counter() - start - player.spent
+    return {
+        'survival': game.clock.now,
+        'kills': game.score // 10,
+        'breached': any(z.position < 0 for z in game.zombies),
+        'frame_ms': elapsed / max(game.turn, 1) * 1000,  # «Кадр» консольной игры - ход
+    }
+
+
+def play_game(variant, seed, seconds, render=False):
+    """Одна партия в процессе-воркере; возвращает словарь результата"""
+    # Игры печатают попадания и подсказки - в воркере это только шум
+    with open(os.devnull, 'w', encoding='utf-8') as devnull, contextlib.redirect_stdout(devnull):
+        if variant == 'grok':
+            result = play_grok(seed, seconds)
+        else:
+            result = play_frames(seed, seconds, render, GAMES[variant])
+    return {'variant': variant, 'seed': seed, **result}
+
+
+def t_quantile(p, df):
+    """Квантиль распределения Стьюдента (разложение Корниша-Фишера, погрешность < 1% при df >= 3)"""
+    z = statistics.NormalDist().inv_cdf(p)
+    return (z + (z ** 3 + z) / (4 * df) + (5 * z ** 5 + 16 * z ** 3 + 3 * z) / (96 * df ** 2)
+            + (3 * z ** 7 + 19 * z ** 5 + 17 * z ** 3 - 15 * z) / (384 * df ** 3))
+
+
+def mean_ci(values, level=0.95):
+    """Среднее и полуширина доверительного интервала уровня level"""
+    n = len(values)
+    mean = statistics.fmean(values)
+    if n < 2:
+        return mean, float('nan')
+    half = t_quantile(0.5 + level / 2, n - 1) * statistics.stdev(values) / math.sqrt(n)
+    return mean, half
+
+
+def format_ci(values, digits=1):
+    mean, half = mean_ci(values)
+    return f'{mean:.{digits}f} ± {half:.{digits}f}'
+
+
+def summarize(results, variants):
+    """Таблица по реализациям: средние с 95% доверительными интервалами.
+
+    Убийства реализаций из NO_KILLS не сравниваются: вместо них прочерк и
+    сноска с причиной под таблицей.
+    """
+    rows = []
+    notes = []
+    for variant in variants:
+        games = [r for r in results if r['variant'] == variant]
+        if not games:
+            continue
+        rows.append([
+            NAMES[variant],
+            len(games),
+            format_ci([r['survival'] for r in games]),
+            f"{100 * sum(r['breached'] for r in games) / len(games):.0f}",
+            '—*' if variant in NO_KILLS else format_ci([r['kills'] for r in games], 2),
+            format_ci([r['frame_ms'] for r in games], 3),
+        ])
+        if variant in NO_KILLS:
+            notes.append(f"* {NAMES[variant]}: {NO_KILLS[variant]}")
+    table = format_table(['реализация', 'партий', 'выживание, с', 'прорыв, %', 'убийства',
+                          'кадр, мс'], rows)
+    return '\n'.join([table, *notes])
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[0])
+    parser.add_argument('--variants', default=','.join(NAMES),
+                        help='реализации через запятую (ключи rvz.variants.VARIANTS)')
+    parser.add_argument('--games', type=int, default=100, help='партий на реализацию')
+    parser.add_argument('--seconds', type=float, default=120, help='предел игрового времени партии')
+    parser.add_argument('--seed', type=int, default=0, help='seed первой партии; дальше seed+1, seed+2...')
+    parser.add_argument('--workers', type=int, default=os.cpu_count(), help='процессов (по умолчанию - по ядру)')
+    parser.add_argument('--render', action='store_true', help='включить рендер в цену кадра')
+    parser.add_argument('--out', metavar='PATH', help='писать результат каждой партии строкой JSON')
+    args = parser.parse_args(argv)
+
+    variants = args.variants.split(',')
+    for variant in variants:
+        if variant not in NAMES:
+            parser.error(f'неизвестная реализация: {variant}')
+    # Партии разных реализаций вперемешку: все реализации продвигаются равномерно
+    jobs = [(variant, args.seed + i) for i in range(args.games) for variant in variants]
+
+    results = []
+    out = open(args.out, 'w', encoding='utf-8') if args.out else None
+    start = time.perf_counter()
+    try:
+        with ProcessPoolExecutor(max_workers=args.workers) as executor:
+            futures = [executor.submit(play_game, variant, seed, args.seconds, args.render)
+                       for variant, seed in jobs]
+            for done, future in enumerate(as_completed(futures), 1):
+                result = future.result()
+                results.append(result)
+                if out is not None:
+                    out.write(json.dumps(result) + '\n')
+                    out.flush()
+                print(f'\r{done}/{len(jobs)} партий', end='', file=sys.stderr, flush=True)
+    finally:
+        if out is not None:
+            out.close()
+    elapsed = time.perf_counter() - start
+    print(file=sys.stderr)
+
+    print(f'{len(results)} партий по {args.seconds:g} с игрового времени, {args.workers} процессов, '
+          f'{elapsed:.1f} с ({len(results) / elapsed:.1f} партий/с)')
+    print(summarize(results, variants))
+
+
+if __name__ == '__main__':
+    main()
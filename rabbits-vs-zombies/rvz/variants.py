@@ -0,0 +1,39 @@
+"""Загрузка реализаций разных моделей как модулей.
+
+Имена файлов (RvZ_GLM-4.6.py и т.п.) не являются именами модулей Python,
+поэтому они загружаются по пути к файлу.
+"""
+import importlib.util
+import os
+import sys
+
+ARENA_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+VARIANTS = {
+    'deepseek': 'RvZ_DeepSeek-V3.2.py',
+    'glm': 'RvZ_GLM-4.6.py',
+    'grok': 'RvZ_Grok-4-0709.py',
+    'grok-fast': 'RvZ_grok-4-fast-reasoning.py',
+    'qwen': 'RvZ_Qwen3-Max.py',
+}
+
+
+def load_variant(name):
+    """Импортирует реализацию по короткому имени (ключу VARIANTS)"""
+    module_name = 'rvz_variant_' + name.replace('-', '_')
+    module = sys.modules.get(module_name)
+    if module is not None:
+        return module
+
+    if ARENA_DIR not in sys.path:
+        sys.path.insert(0, ARENA_DIR)
+    path = os.path.join(ARENA_DIR, VARIANTS[name])
+    spec = importlib.util.spec_from_file_location(module_name, path)
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[module_name] = module
+    try:
+        spec.loader.exec_module(module)
+    except BaseException:
+        del sys.modules[module_name]
+        raise
+    return module